@@ -1,5 +1,14 @@
+from pathlib import Path
+
 import streamlit as st
-from streamlit.components.v1 import html
+
+ASSETS = Path(__file__).parent / "assets"
+
+
+@st.cache_resource(show_spinner=False)
+def local_css(name):
+    # read once per process; inlined, so the page makes no CDN request
+    return (ASSETS / name).read_text(encoding="utf-8")
 
 # ==========================================================
 # 🌐 PAGE CONFIGURATION
@@ -11,12 +20,10 @@ st.set_page_config(
 )
 
 # ==========================================================
-# 🎨 LOAD BOOTSTRAP + ANIMATIONS + DARK THEME FIX
+# 🎨 LOCAL BOOTSTRAP SUBSET + ANIMATIONS + DARK THEME FIX
 # ==========================================================
+st.markdown(f"<style>{local_css('home.css')}</style>", unsafe_allow_html=True)
 st.markdown("""
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
-<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js"></script>
-
 <style>
 
 /* ---------------- GLOBAL ---------------- */
@@ -109,36 +116,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==========================================================
-# WELCOME TOAST
+# WELCOME TOAST (once per session, no iframe component)
 # ==========================================================
-html("""
-<script>
-document.addEventListener("DOMContentLoaded", function() {
-    let msg = document.createElement('div');
-    msg.innerHTML = '<div style="
-        position:fixed;
-        top:20px;
-        right:20px;
-        padding:12px 22px;
-        background:#00B4D8;
-        color:white;
-        border-radius:10px;
-        font-weight:bold;
-        box-shadow:0 2px 10px rgba(0,0,0,0.35);
-        z-index:99999;
-        animation:toastAnim 3s ease forwards;
-    ">✨ Welcome Ra!</div>';
-
-    document.body.appendChild(msg);
-    setTimeout(() => msg.remove(), 2500);
-});
-</script>
-<style>
-@keyframes toastAnim {
-    0% { opacity:0; transform: translateY(-10px); }
-    10% { opacity:1; transform: translateY(0); }
-    90% { opacity:1; }
-    100% { opacity:0; transform: translateY(-10px); }
-}
-</style>
-""", height=0)
+if not st.session_state.get("welcomed"):
+    st.session_state.welcomed = True
+    st.toast("✨ Welcome Ra!")
@@ -0,0 +1,283 @@
+# api.py
+"""
+Local read-only HTTP API over usa_data.db
+------------------------------------------
+✔ GET /version                       data version, panel shape, date range
+✔ GET /ohlcv/<TICKER>                start, end, adjust=split|total|raw
+✔ GET /signals/latest                zone_state for every ticker + latest flips
+✔ GET /screen?rule=...&rank=...      screener results (day=YYYY-MM-DD, sector=..., all=1, limit=N)
+✔ format=json (default) or format=arrow (Arrow IPC stream, needs pyarrow)
+✔ ETag derived from the data version: unchanged data answers 304
+✔ gzip when the client accepts it; encoded (and gzipped) bodies cached per data version
+Reads go through panel.shared_panel(), so the API process holds one panel
+per data version no matter how many clients poll it. Nothing here writes.
+Usage: python api.py [--host 127.0.0.1] [--port 8502]
+"""
+
+import gzip
+import hashlib
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import retention
+import sectors
+import zones
+from barcache import BoundedCache
+from panel import DB_PATH, FIELDS, StoreMissing, data_version, shared_panel
+from screener import RuleError, Screen
+
+HOST = "127.0.0.1"
+PORT = 8502
+GZIP_MIN_BYTES = 1024
+CACHE_MAX_MB = 64
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+ADJUST = {"split": "split", "total": "total", "raw": None}
+
+# (version, path, query, format) -> (content_type, body, gzipped body or None)
+responses = BoundedCache(CACHE_MAX_MB * 1024 * 1024, max_entries=2000,
+                         sizeof=lambda v: len(v[1]) + len(v[2] or b"") + 200)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------
+# ENCODING
+# --------------------------
+def _column(values):
+    """JSON-ready list with NaN -> null."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == "f":
+        return [None if x != x else x for x in arr.tolist()]
+    if arr.dtype.kind == "M":
+        return np.datetime_as_string(arr, unit="D").tolist()
+    return arr.tolist()
+
+
+def encode(frame, meta, fmt):
+    """(content_type, body) for a DataFrame plus a small metadata dict."""
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ApiError(406, "format=arrow needs pyarrow")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({k: str(v) for k, v in meta.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ARROW_TYPE, sink.getvalue().to_pybytes()
+
+    body = dict(meta)
+    body["columns"] = list(frame.columns)
+    body["data"] = {c: _column(frame[c].to_numpy()) for c in frame.columns}
+    return "application/json", json.dumps(body, separators=(",", ":")).encode()
+
+
+def encode_json(obj):
+    return "application/json", json.dumps(obj, separators=(",", ":")).encode()
+
+
+# --------------------------
+# ENDPOINTS
+# --------------------------
+def _one(query, name, default=None):
+    return query.get(name, [default])[0]
+
+
+def _adjust(query):
+    name = _one(query, "adjust", "split")
+    if name not in ADJUST:
+        raise ApiError(400, f"adjust must be one of {', '.join(ADJUST)}")
+    return name
+
+
+def _panel(adjust="split"):
+    try:
+        return shared_panel(DB_PATH, adjust)
+    except StoreMissing:
+        raise ApiError(503, "store not built: run usadb.py build")
+
+
+def get_version(query, fmt, version):
+    panel = _panel()
+    dates = panel.dates
+    return encode_json({
+        "version": version,
+        "tickers": len(panel),
+        "days": int(panel.shape[1]),
+        "first": str(dates[0]) if len(dates) else None,
+        "last": str(dates[-1]) if len(dates) else None,
+    })
+
+
+def get_ohlcv(query, fmt, version, ticker):
+    ticker = ticker.upper()
+    adjust = _adjust(query)
+    panel = _panel(ADJUST[adjust])
+    if ticker not in panel.ticker_index:
+        raise ApiError(404, f"unknown ticker {ticker}")
+    try:
+        df = panel.view(ticker, start=_one(query, "start"))
+        end = _one(query, "end")
+        if end:
+            df = df[df.index <= pd.Timestamp(end)]
+    except ValueError as e:
+        raise ApiError(400, f"bad date: {e}")
+    df = df.dropna(how="all").reset_index()
+    return encode(df[["date"] + FIELDS], {"ticker": ticker, "adjust": adjust,
+                                          "version": version, "rows": len(df)}, fmt)
+
+
+def get_signals(query, fmt, version):
+    state = pd.DataFrame(columns=["ticker", "date", "zone", "vol20", "vol50"])
+    conn = retention.open_read_only(DB_PATH)
+    if conn is not None:
+        try:
+            if retention.has_table(conn, "zone_state"):
+                state = pd.read_sql_query(
+                    "SELECT ticker, date, zone, vol20, vol50 FROM zone_state ORDER BY ticker", conn)
+        finally:
+            conn.close()
+    flips = zones.latest_flips(DB_PATH)
+    if fmt == "arrow":
+        return encode(state, {"version": version, "rows": len(state)}, fmt)
+    return encode_json({
+        "version": version,
+        "zones": state.to_dict(orient="records"),
+        "flips": [dict(zip(("ticker", "date", "from_zone", "to_zone"), f)) for f in flips],
+    })
+
+
+def get_screen(query, fmt, version):
+    rule = _one(query, "rule")
+    if not rule:
+        raise ApiError(400, "rule is required")
+    panel = _panel(ADJUST[_adjust(query)])
+    sector = _one(query, "sector")
+    members = sectors.tickers_in(sector, DB_PATH) if sector else None
+    if sector and not members:
+        raise ApiError(404, f"unknown sector {sector}")
+    try:
+        screen = Screen(rule, rank=_one(query, "rank") or None)
+        res = screen.run(panel, day=_one(query, "day", -1), tickers=members)
+    except RuleError as e:
+        raise ApiError(400, f"rule error: {e}")
+    except ValueError as e:
+        raise ApiError(400, f"bad day: {e}")
+    if _one(query, "all") not in ("1", "true"):
+        res = res[res["match"]]
+    limit = _one(query, "limit")
+    if limit:
+        if not limit.isdigit():
+            raise ApiError(400, "limit must be a positive integer")
+        res = res.head(int(limit))
+    return encode(res.reset_index(), {"rule": rule, "sector": sector, "version": version,
+                                      "rows": len(res)}, fmt)
+
+
+ROUTES = [
+    ("/version", get_version),
+    ("/ohlcv/", get_ohlcv),
+    ("/signals/latest", get_signals),
+    ("/screen", get_screen),
+]
+
+
+def resolve(path):
+    for prefix, fn in ROUTES:
+        if prefix.endswith("/") and path.startswith(prefix) and len(path) > len(prefix):
+            return fn, (path[len(prefix):],)
+        if path == prefix:
+            return fn, ()
+    raise ApiError(404, f"no route for {path}")
+
+
+# --------------------------
+# HTTP
+# --------------------------
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "usa-data-api/1.0"
+
+    def do_GET(self):
+        t0 = time.perf_counter()
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        fmt = _one(query, "format", "json")
+        version = data_version(DB_PATH)
+        etag = 'W/"%s"' % hashlib.sha1(f"{version}|{url.path}|{url.query}".encode()).hexdigest()[:20]
+
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        key = (version, url.path, url.query, fmt)
+        try:
+            hit = responses.get(key)
+            if hit is None:
+                fn, args = resolve(url.path.rstrip("/") or "/")
+                if fmt not in ("json", "arrow"):
+                    raise ApiError(400, "format must be json or arrow")
+                content_type, body = fn(query, fmt, version, *args)
+                gz = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+                responses.put(key, (content_type, body, gz))
+            else:
+                content_type, body, gz = hit
+        except ApiError as e:
+            return self.send_error_json(e.status, str(e))
+        except Exception as e:
+            return self.send_error_json(500, repr(e))
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")  # always revalidate, 304 is cheap
+        self.send_header("Vary", "Accept-Encoding")
+        if gz is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gz
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Server-Timing", f"app;dur={(time.perf_counter() - t0) * 1000:.1f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        print(f"[API] {self.address_string()} {fmt % args}")
+
+
+def serve(host=HOST, port=PORT):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    print(f"[INFO] Serving {DB_PATH} on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 API stopped.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    opts = dict(zip(args[::2], args[1::2]))
+    sys.exit(serve(opts.get("--host", HOST), int(opts.get("--port", PORT))))
@@ -0,0 +1,345 @@
+# async_fetch.py
+"""
+Asyncio fetch engine for daily bars
+------------------------------------
+✔ One aiohttp.ClientSession on one thread: a keep-alive connection pool
+  capped at IN_FLIGHT connections (PER_HOST per host), cached DNS
+✔ Hundreds of requests in flight at once; per-request timeout, retries with
+  backoff on timeouts / 429 / 5xx
+✔ Yahoo v8 chart JSON (interval=1d, div + split events) parsed straight into
+  arrays and passed through normalize.normalize_arrays: no yfinance, no
+  pandas, and the same raw prices + corporate actions as the thread engine
+✔ fetch_all() yields refresh_db.run_pipeline's (ticker, dates, ohlcv,
+  actions, err) tuples, so ingest() runs on either engine
+  (refresh_db.ENGINE, or usadb.py refresh --engine async)
+✔ Each response body is kept in rawcache.py before parsing, so a parse /
+  normalize bug can be fixed and replayed without re-downloading
+✔ bench: a local stub chart server with configurable latency, thread-pool
+  engine vs asyncio engine on the same payloads
+Needs aiohttp (pip install aiohttp); the thread engine does not.
+Usage: python async_fetch.py bench [--tickers N] [--latency S] [--threads N] [--in-flight N]
+"""
+
+import asyncio
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from calendar import timegm
+from datetime import datetime
+
+import numpy as np
+
+import normalize
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/"
+IN_FLIGHT = 200         # connections (= requests in flight) in the pool
+PER_HOST = 100          # Yahoo is one host: this is the effective cap there
+TIMEOUT = 20
+RETRY_COUNT = 3
+BACKOFF = 0.5
+RETRY_STATUS = {429, 500, 502, 503, 504}
+PERIOD = "max"          # full-history range (no start given); refresh_db passes its YF_PERIOD
+COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+QUOTE_FIELDS = ["open", "high", "low", "close", "volume"]
+UA = {"User-Agent": "Mozilla/5.0"}
+
+
+def _aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError("the asyncio engine needs aiohttp: pip install aiohttp")
+    return aiohttp
+
+
+def _epoch(day):
+    return timegm(datetime.strptime(day, "%Y-%m-%d").timetuple())
+
+
+# --------------------------
+# CHART JSON -> ARRAYS
+# --------------------------
+def parse_daily(ticker, payload):
+    """
+    Yahoo v8 daily chart JSON -> normalize_arrays() output (ticker, dates,
+    ohlcv, actions), or None when the chart has no bars.
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error"):
+        raise ValueError(chart["error"].get("description") or chart["error"])
+    result = chart.get("result") or []
+    if not result or not result[0].get("timestamp"):
+        return None
+    res = result[0]
+    offset = int((res.get("meta") or {}).get("gmtoffset") or 0)
+    stamps = np.asarray(res["timestamp"], dtype="int64")
+    days = ((stamps + offset) // 86400).astype("datetime64[D]")
+    quote = res["indicators"]["quote"][0]
+    n = len(stamps)
+
+    events = res.get("events") or {}
+    dividends, splits = np.zeros(n), np.zeros(n)
+    for kind, out, value in (("dividends", dividends, lambda e: e["amount"]),
+                             ("splits", splits, lambda e: e["numerator"] / e["denominator"])):
+        for e in (events.get(kind) or {}).values():
+            day = np.datetime64((int(e["date"]) + offset) // 86400, "D")
+            i = int(np.searchsorted(days, day))
+            if i < n and days[i] == day:
+                out[i] = value(e)
+
+    values = np.column_stack([np.asarray(quote.get(f) or [None] * n, dtype="float64")
+                              for f in QUOTE_FIELDS] + [dividends, splits])
+    return normalize.normalize_arrays(ticker, days, COLUMNS, values)
+
+
+def chart_params(start=None, end=None, period=PERIOD):
+    params = {"interval": "1d", "events": "div,splits", "includePrePost": "false"}
+    if start:
+        params["period1"] = str(_epoch(start))
+        params["period2"] = str(_epoch(end) if end else int(time.time()) + 86400)
+    else:
+        params["range"] = period
+    return params
+
+
+# --------------------------
+# ENGINE
+# --------------------------
+class AsyncFetcher:
+    def __init__(self, base_url=YAHOO_CHART_URL, in_flight=IN_FLIGHT, per_host=PER_HOST,
+                 timeout=TIMEOUT, retries=RETRY_COUNT, raw_cache=True, period=PERIOD):
+        self.base_url = base_url
+        self.period = period
+        self.raw_cache = raw_cache
+        self.in_flight = in_flight
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+        self.retried = 0
+        self.bytes = 0
+
+    async def fetch(self, session, ticker, start=None, end=None):
+        aiohttp = _aiohttp()
+        url = self.base_url + ticker.replace(".", "-").strip()
+        params = chart_params(start, end, self.period)
+        last_error = None
+        for attempt in range(1, self.retries + 1):
+            if attempt > 1:
+                self.retried += 1
+                await asyncio.sleep(BACKOFF * 2 ** (attempt - 2))
+            try:
+                async with session.get(url, params=params) as r:
+                    self.requests += 1
+                    if r.status in RETRY_STATUS:
+                        last_error = f"HTTP {r.status}"
+                        continue
+                    body = await r.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = repr(e)
+                continue
+            self.bytes += len(body)
+            if self.raw_cache and r.status < 400:
+                await self.keep_raw(ticker, start, end, body)
+            try:
+                parsed = parse_daily(ticker, json.loads(body))
+            except (ValueError, KeyError, TypeError, IndexError) as e:
+                stage = "DOWNLOAD" if r.status >= 400 else "NORMALIZE"
+                return ticker, None, None, None, f"{stage}: {e!r}"
+            if parsed is None:
+                return ticker, None, None, None, "DOWNLOAD: empty chart"
+            return (ticker,) + parsed[1:] + (None,)
+        return ticker, None, None, None, f"DOWNLOAD: {last_error}"
+
+    async def keep_raw(self, ticker, start, end, body):
+        # file + index write off the event loop; a cache failure never fails the fetch
+        import rawcache
+        try:
+            await asyncio.to_thread(rawcache.put, ticker, rawcache.span_key(start, end, self.period),
+                                    body, "chart-json")
+        except Exception as e:
+            print(f"[WARN] {ticker}: raw cache write failed: {e!r}")
+
+    async def run(self, tickers, starts=None, ends=None, emit=print):
+        """Fetch every ticker concurrently; emit(result) in completion order."""
+        aiohttp = _aiohttp()
+        starts, ends = starts or {}, ends or {}
+        connector = aiohttp.TCPConnector(limit=self.in_flight, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=UA) as session:
+            tasks = [asyncio.ensure_future(self.fetch(session, t, starts.get(t), ends.get(t)))
+                     for t in tickers]
+            for fut in asyncio.as_completed(tasks):
+                emit(await fut)
+
+
+def fetch_all(tickers, starts=None, ends=None, **options):
+    """
+    Blocking generator over AsyncFetcher(**options): the event loop runs on
+    a helper thread and results are yielded as they complete, so the caller
+    can write to SQLite while the rest is still in flight.
+    """
+    _aiohttp()
+    fetcher = AsyncFetcher(**options)
+    results, done = queue.Queue(), object()
+
+    def loop():
+        try:
+            asyncio.run(fetcher.run(tickers, starts, ends, results.put))
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(done)
+
+    threading.Thread(target=loop, name="async-fetch", daemon=True).start()
+    while True:
+        item = results.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+# --------------------------
+# THREAD-POOL ENGINE (baseline for the bench)
+# --------------------------
+def fetch_threads(tickers, base_url, threads=12, pooled=False):
+    """
+    refresh_db's shape without yfinance: THREADS workers, one blocking GET
+    per ticker. pooled=False opens a connection per request like each
+    yf.download call does; pooled=True shares one requests.Session.
+    """
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+    from requests.adapters import HTTPAdapter
+
+    session = None
+    if pooled:
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_maxsize=threads))
+        session.mount("https://", HTTPAdapter(pool_maxsize=threads))
+
+    def one(ticker):
+        try:
+            r = (session or requests).get(base_url + ticker, params=chart_params(),
+                                          headers=UA, timeout=TIMEOUT)
+            r.raise_for_status()
+            parsed = parse_daily(ticker, r.json())
+        except Exception as e:
+            return ticker, None, None, None, repr(e)
+        return (ticker,) + parsed[1:] + (None,)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(one, tickers))
+
+
+# --------------------------
+# STUB SERVER + BENCH
+# --------------------------
+def stub_payload(ticker, bars=252):
+    """Deterministic v8 daily chart JSON with a split and a dividend."""
+    rng = np.random.default_rng(sum(map(ord, ticker)))
+    end = np.datetime64("today", "D")
+    days = np.busday_offset(end, np.arange(-bars + 1, 1), roll="backward")
+    stamps = (days.astype("int64") * 86400 + 13 * 3600 + 1800).tolist()   # 09:30 New York
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    quote = {"open": (close + rng.normal(0, 0.5, bars)).tolist(), "high": (close + spread).tolist(),
+             "low": (close - spread).tolist(), "close": close.tolist(),
+             "volume": rng.integers(100_000, 50_000_000, bars).tolist()}
+    quote["close"][bars // 3] = None
+    events = {"dividends": {str(stamps[bars // 2]): {"amount": 0.25, "date": stamps[bars // 2]}},
+              "splits": {str(stamps[bars // 4]): {"date": stamps[bars // 4], "numerator": 2,
+                                                   "denominator": 1, "splitRatio": "2:1"}}}
+    return {"chart": {"result": [{"meta": {"symbol": ticker, "gmtoffset": -14400},
+                                  "timestamp": stamps, "events": events,
+                                  "indicators": {"quote": [quote]}}], "error": None}}
+
+
+def serve_stub(port, latency, bars):
+    """Stub chart server (run in its own process): fixed payloads, `latency` seconds per request."""
+    _aiohttp()
+    from aiohttp import web
+
+    bodies = {}
+
+    async def chart(request):
+        await asyncio.sleep(latency)
+        ticker = request.match_info["ticker"]
+        if ticker not in bodies:
+            bodies[ticker] = json.dumps(stub_payload(ticker, bars)).encode()
+        return web.Response(body=bodies[ticker], content_type="application/json")
+
+    app = web.Application()
+    app.router.add_get("/v8/finance/chart/{ticker}", chart)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None,
+                backlog=1024, handle_signals=False)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench(n_tickers=500, latency=0.2, threads=12, in_flight=IN_FLIGHT, bars=252):
+    import multiprocessing as mp
+
+    port = _free_port()
+    server = mp.Process(target=serve_stub, args=(port, latency, bars), daemon=True)
+    server.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}/v8/finance/chart/"
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+    fetch_threads(tickers[:threads], base_url, threads, pooled=True)   # warm the stub's payloads
+
+    print(f"[INFO] {n_tickers} tickers x {bars} bars · stub latency {latency * 1000:.0f}ms "
+          f"· ideal serial {n_tickers * latency:.1f}s")
+    runs = [
+        (f"threads x{threads}, new connection per GET (yf.download style)",
+         lambda: fetch_threads(tickers, base_url, threads, pooled=False)),
+        (f"threads x{threads}, pooled Session",
+         lambda: fetch_threads(tickers, base_url, threads, pooled=True)),
+        (f"asyncio, {in_flight} in flight, keep-alive pool",
+         lambda: list(fetch_all(tickers, base_url=base_url, in_flight=in_flight, per_host=in_flight,
+                                raw_cache=False))),
+    ]
+    results, base = {}, None
+    try:
+        for label, fn in runs:
+            t0 = time.perf_counter()
+            out = fn()
+            secs = time.perf_counter() - t0
+            base = base or secs
+            ok = sum(1 for r in out if r[4] is None)
+            results[label] = {r[0]: r for r in out}
+            print(f"  {label:<58} {secs:6.2f}s  {n_tickers / secs:7.0f} tickers/s  "
+                  f"x{base / secs:5.1f}  ok {ok}/{n_tickers}")
+    finally:
+        server.terminate()
+
+    first, *rest = results.values()
+    same = all(np.array_equal(first[t][2], r[t][2], equal_nan=True) and first[t][3] == r[t][3]
+               for r in rest for t in tickers if first[t][4] is None and r[t][4] is None)
+    print(f"[{'OK' if same else 'ERR'}] engines returned {'identical' if same else 'DIFFERENT'} arrays")
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "bench":
+        print(__doc__)
+        sys.exit(1)
+    opts = dict(zip(args[1::2], args[2::2]))
+    bench(int(opts.get("--tickers", 500)), float(opts.get("--latency", 0.2)),
+          int(opts.get("--threads", 12)), int(opts.get("--in-flight", IN_FLIGHT)))
@@ -0,0 +1,313 @@
+# audit.py
+"""
+Data-quality audit of stock_data in one vectorized pass
+--------------------------------------------------------
+✔ Missing sessions inside each ticker's span (local NYSE calendar)
+✔ Bars dated on weekends / exchange holidays
+✔ Malformed, duplicate or out-of-order date strings
+✔ Zero / negative volume, non-positive prices, low > high,
+  open or close outside [low, high]
+✔ Tickers whose last bar lags the latest stored session
+✔ --repair re-fetches only the missing ranges (one small download per
+  ticker instead of a full-year fetch) and re-checks the bad bars
+Usage: python audit.py [--repair] [TICKER ...]
+"""
+
+import sqlite3
+import sys
+import time
+from datetime import timedelta
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+import corporate_actions
+import market_calendar
+
+DB_PATH = "usa_data.db"
+REPORT_FILE = "audit_report.csv"
+CLOSURE_SHARE = 0.9   # a session this far below the typical bar count is an unscheduled closure
+REPAIRABLE = ("missing", "bad_ohlc")
+MERGE_DAYS = 10       # repair issues closer than this in one download
+ISSUE_COLUMNS = ["ticker", "kind", "start", "end", "bars", "detail"]
+
+
+# --------------------------
+# LOAD
+# --------------------------
+def load_rows(db_path=DB_PATH, tickers=None):
+    sql = "SELECT ticker, date, open, high, low, close, volume FROM stock_data"
+    params = []
+    if tickers:
+        sql += f" WHERE ticker IN ({','.join('?' * len(tickers))})"
+        params = list(tickers)
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query(sql + " ORDER BY ticker, date", conn, params=params)
+    conn.close()
+    return df
+
+
+# --------------------------
+# CHECKS
+# --------------------------
+def _issues(kind, ticker, start, end, bars, detail=""):
+    n = len(ticker)
+    return pd.DataFrame({
+        "ticker": ticker, "kind": kind, "start": start, "end": end,
+        "bars": bars, "detail": detail if not isinstance(detail, str) else [detail] * n,
+    }, columns=ISSUE_COLUMNS)
+
+
+def _day_str(days):
+    return np.datetime_as_string(days, unit="D").astype(object)
+
+
+def check_bars(df):
+    """Row-level checks: dates, volume and OHLC consistency."""
+    out = []
+    tick = df["ticker"].to_numpy()
+    raw = df["date"].to_numpy()
+    parsed = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce").to_numpy()
+    days = parsed.astype("datetime64[D]")
+
+    bad_date = np.isnat(days)
+    if bad_date.any():
+        out.append(_issues("bad_date", tick[bad_date], raw[bad_date], raw[bad_date], 1))
+
+    ok = ~bad_date
+    t, d = tick[ok], days[ok]
+    if len(d) > 1:
+        # rows come ordered by (ticker, date string): the parsed days must follow
+        same = t[1:] == t[:-1]
+        dup = same & (d[1:] == d[:-1])
+        back = same & (d[1:] < d[:-1])
+        for kind, m in (("duplicate", dup), ("non_monotonic", back)):
+            if m.any():
+                s = _day_str(d[1:][m])
+                out.append(_issues(kind, t[1:][m], s, s, 1))
+
+    o, h, l, c, v = (df[f].to_numpy(dtype="float64") for f in ("open", "high", "low", "close", "volume"))
+    with np.errstate(invalid="ignore"):
+        bad_vol = ~(v > 0)
+        bad_price = ~((o > 0) & (h > 0) & (l > 0) & (c > 0))
+        bad_range = (l > h) | (o > h) | (o < l) | (c > h) | (c < l)
+    bad_vol &= ok
+    if bad_vol.any():
+        s = raw[bad_vol]
+        out.append(_issues("bad_volume", tick[bad_vol], s, s, 1, v[bad_vol].astype(str)))
+    bad = (bad_price | bad_range) & ok
+    if bad.any():
+        s = raw[bad]
+        detail = [f"o={a:g} h={b:g} l={x:g} c={y:g}" for a, b, x, y in
+                  zip(o[bad], h[bad], l[bad], c[bad])]
+        out.append(_issues("bad_ohlc", tick[bad], s, s, 1, detail))
+    return out
+
+
+def find_closures(day_counts):
+    """
+    Unscheduled closures (national days of mourning, storms): sessions the
+    calendar expects but that hold bars for almost no ticker. day_counts is
+    a Series of bars per date over the whole table.
+    """
+    if day_counts.empty:
+        return []
+    days = pd.to_datetime(day_counts.index, format="%Y-%m-%d", errors="coerce")
+    counts = pd.Series(day_counts.to_numpy(), index=days)[lambda x: x.index.notna()]
+    cal = market_calendar.trading_days(counts.index.min().date(), counts.index.max().date())
+    per_session = counts.groupby(counts.index.to_numpy().astype("datetime64[D]")).sum()
+    per_session = per_session.reindex(cal, fill_value=0)
+    floor = (1 - CLOSURE_SHARE) * per_session[per_session > 0].median()
+    return _day_str(cal[per_session.to_numpy() < floor]).tolist()
+
+
+def check_calendar(df, closures=()):
+    """Gaps against the exchange calendar, off-calendar bars and stale tails."""
+    days = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce").to_numpy()
+    ok = ~np.isnat(days)
+    days = days[ok].astype("datetime64[D]")
+    if not len(days):
+        return []
+    codes, names = pd.factorize(df["ticker"].to_numpy()[ok], sort=True)
+    names = np.asarray(names, dtype=object)
+
+    first = days.min().astype(object)
+    last = days.max().astype(object)
+    cal = market_calendar.trading_days(first, last)
+    cal = np.setdiff1d(cal, np.asarray(closures, dtype="datetime64[D]"))
+
+    out = []
+    pos = np.searchsorted(cal, days)
+    on_cal = (pos < len(cal)) & (cal[np.minimum(pos, len(cal) - 1)] == days)
+    if (~on_cal).any():
+        s = _day_str(days[~on_cal])
+        out.append(_issues("off_calendar", names[codes[~on_cal]], s, s, 1))
+
+    t, p = codes[on_cal], pos[on_cal]
+    order = np.lexsort((p, t))
+    t, p = t[order], p[order]
+    keep = np.append(True, (t[1:] != t[:-1]) | (p[1:] != p[:-1]))
+    t, p = t[keep], p[keep]
+    gap = (t[1:] == t[:-1]) & (p[1:] - p[:-1] > 1)
+    if gap.any():
+        a, b = p[:-1][gap] + 1, p[1:][gap] - 1
+        out.append(_issues("missing", names[t[1:][gap]], _day_str(cal[a]), _day_str(cal[b]), b - a + 1))
+
+    ends = np.append(t[1:] != t[:-1], True)
+    lag = (len(cal) - 1) - p[ends]
+    stale = lag > 0
+    if stale.any():
+        out.append(_issues("stale", names[t[ends][stale]], _day_str(cal[p[ends][stale] + 1]),
+                           _day_str(np.repeat(cal[-1], stale.sum())), lag[stale]))
+    return out
+
+
+def run_audit(db_path=DB_PATH, tickers=None):
+    """(issues DataFrame, info dict) for the whole table (or a ticker subset)."""
+    t0 = time.perf_counter()
+    df = load_rows(db_path, tickers)
+    t_load = time.perf_counter() - t0
+    if df.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS), {"rows": 0, "tickers": 0}
+
+    if tickers:
+        conn = sqlite3.connect(db_path)
+        day_counts = pd.read_sql_query(
+            "SELECT date, COUNT(*) AS n FROM stock_data GROUP BY date", conn).set_index("date")["n"]
+        conn.close()
+    else:
+        day_counts = df["date"].value_counts()
+    closures = find_closures(day_counts)
+
+    parts = check_bars(df)
+    gaps = check_calendar(df, closures)
+    parts = [p for p in parts + gaps if len(p)]
+    issues = (pd.concat(parts, ignore_index=True) if parts
+              else pd.DataFrame(columns=ISSUE_COLUMNS))
+    issues = issues.sort_values(["ticker", "start", "kind"], ignore_index=True)
+    info = {
+        "rows": len(df),
+        "tickers": df["ticker"].nunique(),
+        "closures": closures,
+        "load_s": round(t_load, 2),
+        "check_s": round(time.perf_counter() - t0 - t_load, 2),
+    }
+    return issues, info
+
+
+# --------------------------
+# TARGETED REPAIR
+# --------------------------
+def repair_spans(issues, merge_days=MERGE_DAYS):
+    """
+    ticker -> [(start, exclusive end), ...] covering its repairable issues;
+    issues less than merge_days apart share one download.
+    """
+    todo = issues[issues["kind"].isin(REPAIRABLE)].sort_values(["ticker", "start"])
+    spans = {}
+    for ticker, start, end in zip(todo["ticker"], pd.to_datetime(todo["start"]), pd.to_datetime(todo["end"])):
+        runs = spans.setdefault(ticker, [])
+        if runs and (start - runs[-1][1]).days <= merge_days:
+            runs[-1][1] = max(runs[-1][1], end)
+        else:
+            runs.append([start, end])
+    return {t: [(s.strftime("%Y-%m-%d"), (e + timedelta(days=1)).strftime("%Y-%m-%d")) for s, e in runs]
+            for t, runs in spans.items()}
+
+
+def _split_factor_after(actions, ticker, end):
+    """Yahoo adjusts past bars for every later split; splits after `end` are not in the payload."""
+    f = 1.0
+    for t, d, kind, value in actions:
+        if t == ticker and kind == "split" and d >= end and value:
+            f *= value
+    return f
+
+
+def repair(issues, db_path=DB_PATH):
+    """Re-fetch only the spans around missing / bad bars. Returns (fixed, failed) tickers."""
+    import refresh_db  # yfinance only when a repair actually runs
+
+    spans = repair_spans(issues)
+    if not spans:
+        print("[INFO] Nothing to repair.")
+        return [], []
+    print(f"[INFO] Repairing {len(spans)} tickers, {sum(map(len, spans.values()))} spans "
+          f"({sum(issues['kind'].isin(REPAIRABLE))} issues)...")
+
+    conn = sqlite3.connect(db_path)
+    corporate_actions.create_actions_table(conn)
+    known = corporate_actions.load_actions(conn, list(spans))
+    fixed, failed = set(), set()
+
+    # the pipeline takes one span per ticker, so a ticker's k-th span goes in round k
+    for k in range(max(map(len, spans.values()))):
+        batch = {t: runs[k] for t, runs in spans.items() if len(runs) > k}
+        starts = {t: s for t, (s, _) in batch.items()}
+        ends = {t: e for t, (_, e) in batch.items()}
+        for ticker, dates, ohlcv, actions, err in refresh_db.run_pipeline(list(batch), starts=starts, ends=ends):
+            if err:
+                print(f"[WARN] {ticker} repair FAILED: {err}")
+                failed.add(ticker)
+                continue
+            start, end = batch[ticker]
+            inside = (dates >= start) & (dates < end)
+            dates, ohlcv = dates[inside], ohlcv[inside]
+            f = _split_factor_after(known, ticker, end)
+            if f != 1.0:
+                ohlcv = ohlcv.copy()
+                ohlcv[:, :4] *= f
+                ohlcv[:, 4] /= f
+            conn.executemany("""
+                INSERT OR REPLACE INTO stock_data
+                (ticker, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, zip(repeat(ticker), dates.tolist(), *ohlcv.T.tolist()))
+            corporate_actions.record_actions(conn, ticker, actions)
+            conn.commit()
+            fixed.add(ticker)
+            print(f"[OK] {ticker} {start}..{end}: {len(dates)} bars re-fetched")
+
+    conn.close()
+    return sorted(fixed - failed), sorted(failed)
+
+
+# --------------------------
+# MAIN
+# --------------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    do_repair = "--repair" in argv
+    tickers = [a.upper() for a in argv if not a.startswith("--")] or None
+
+    issues, info = run_audit(DB_PATH, tickers)
+    if not info["rows"]:
+        print("[ERR] stock_data is empty.")
+        return 1
+    issues.to_csv(REPORT_FILE, index=False)
+
+    print(f"[INFO] Audited {info['rows']:,} rows / {info['tickers']} tickers "
+          f"(load {info['load_s']}s, checks {info['check_s']}s)")
+    if info["closures"]:
+        print(f"[INFO] Sessions treated as market closures: {', '.join(info['closures'])}")
+    if issues.empty:
+        print("[OK] No issues found.")
+    else:
+        counts = issues.groupby("kind").agg(issues=("ticker", "size"), tickers=("ticker", "nunique"),
+                                            bars=("bars", "sum"))
+        print(counts.to_string())
+        print(f"[INFO] Details: {REPORT_FILE}")
+
+    if do_repair:
+        fixed, failed = repair(issues)
+        if fixed:
+            after, _ = run_audit(DB_PATH, fixed)
+            left = after[after["kind"].isin(REPAIRABLE)]
+            print(f"[INFO] Repaired {len(fixed)} tickers, {len(failed)} failed; "
+                  f"{len(left)} repairable issues remain (e.g. Yahoo has no bar either).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
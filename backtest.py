@@ -0,0 +1,161 @@
+# backtest.py
+"""
+Vectorized backtests over every ticker in stock_data at once.
+
+Signals are (tickers, days) boolean matrices built from the panel, so one
+parameter combination costs a few array ops and a grid of thousands runs in
+one go. Rolling windows and forward returns are computed once and shared
+across combinations (screener.field memoizes them on the panel).
+
+Built-in signals
+    bull_zone  vol{slow} > vol{fast}          (viewer default 50 / 20)
+    breakout   volume > mult * vol{window}     (viewer inst_level 1.8 x vol50)
+    any screener rule via Screen(rule).evaluate(panel)
+
+For every entry and holding period H (in bars) we report the forward
+return close[t+H] / close[t] - 1, the hit rate (share of positive
+returns) and the drawdown min(low[t+1..t+H]) / close[t] - 1. Prices are
+split- and dividend-adjusted (corporate_actions "total" mode).
+
+Usage: python backtest.py [days]
+"""
+
+import sys
+import time
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+import indicators
+import screener
+from panel import load_panel, DB_PATH
+from screener import Screen, field
+
+HOLDS = (5, 10, 20, 60)
+RESULTS_FILE = "backtest_results.csv"
+
+
+# --------------------------
+# SIGNALS
+# --------------------------
+def entries(state, mode="cross"):
+    """Entry days: first day of each True run ("cross") or every True day ("state")."""
+    state = np.asarray(state, dtype=bool)
+    if mode == "state":
+        return state
+    prev = np.zeros_like(state)
+    prev[:, 1:] = state[:, :-1]
+    return state & ~prev
+
+
+def bull_zone_signal(panel, fast=20, slow=50):
+    slow_v, fast_v = field(panel, f"vol{slow}"), field(panel, f"vol{fast}")
+    with np.errstate(invalid="ignore"):
+        return slow_v > fast_v
+
+
+def breakout_signal(panel, window=50, mult=1.8):
+    with np.errstate(invalid="ignore"):
+        return field(panel, "volume") > mult * field(panel, f"vol{window}")
+
+
+def rule_signal(panel, rule):
+    return Screen(rule).evaluate(panel)
+
+
+# --------------------------
+# FORWARD OUTCOMES
+# --------------------------
+def forward_outcomes(panel, hold):
+    """(returns, drawdowns) for holding `hold` bars from each day's close, memoized on the panel."""
+    key = f"_fwd{hold}"
+    if key in panel.cache:
+        return panel.cache[key]
+    close = field(panel, "close")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = indicators.shift(close, -hold) / close - 1.0
+        worst_low = indicators.per_bar(
+            field(panel, "low"),
+            lambda d: d.rolling(hold, min_periods=hold).min().shift(-hold))
+        dd = np.minimum(worst_low / close - 1.0, 0.0)
+    if sum(isinstance(k, str) for k in panel.cache) < screener.MAX_FIELDS:
+        panel.cache[key] = (ret, dd)   # same cap as screener.field()
+    return ret, dd
+
+
+def summarize(panel, signal, holds=HOLDS):
+    """One stats dict per holding period for a boolean entry matrix."""
+    rows = []
+    for hold in holds:
+        ret, dd = forward_outcomes(panel, hold)
+        pick = signal & ~np.isnan(ret)
+        r, d = ret[pick], dd[pick]
+        base = ret[~np.isnan(ret)]
+        n = int(r.size)
+        rows.append({
+            "hold": hold,
+            "signals": n,
+            "tickers": int(pick.any(axis=1).sum()),
+            "mean_ret": float(r.mean()) if n else np.nan,
+            "median_ret": float(np.median(r)) if n else np.nan,
+            "hit_rate": float((r > 0).mean()) if n else np.nan,
+            "mean_dd": float(d.mean()) if n else np.nan,
+            "worst_dd": float(d.min()) if n else np.nan,
+            "edge": (float(r.mean()) - float(base.mean())) if n and base.size else np.nan,
+        })
+    return rows
+
+
+# --------------------------
+# PARAMETER GRIDS
+# --------------------------
+def run_grid(panel, signal_fn, grid, holds=HOLDS, mode="cross"):
+    """
+    Evaluate signal_fn(panel, **params) for every combination in grid
+    (dict of name -> list of values). Returns one row per combo x hold.
+    """
+    names = list(grid)
+    rows = []
+    for values in product(*(grid[n] for n in names)):
+        params = dict(zip(names, values))
+        signal = entries(signal_fn(panel, **params), mode)
+        for row in summarize(panel, signal, holds):
+            rows.append({"signal": signal_fn.__name__.replace("_signal", ""), **params, **row})
+    return pd.DataFrame(rows)
+
+
+def default_grids(panel, holds=HOLDS):
+    bull = run_grid(panel, bull_zone_signal,
+                    {"fast": [5, 10, 15, 20, 30], "slow": [40, 50, 60, 100, 200]}, holds)
+    bull = bull[bull["fast"] < bull["slow"]]
+    brk = run_grid(panel, breakout_signal,
+                   {"window": [20, 50, 100], "mult": np.round(np.arange(1.2, 3.01, 0.1), 2)}, holds)
+    return pd.concat([bull, brk], ignore_index=True)
+
+
+def main(days=None):
+    t0 = time.perf_counter()
+    panel = load_panel(DB_PATH, days=days, adjust="total")
+    if len(panel) == 0:
+        print("[ERR] stock_data is empty.")
+        return 1
+    print(f"[INFO] Panel {panel.shape[0]} tickers x {panel.shape[1]} days "
+          f"loaded in {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    res = default_grids(panel)
+    print(f"[INFO] {len(res)} combo x hold rows in {time.perf_counter() - t0:.2f}s")
+    res.to_csv(RESULTS_FILE, index=False)
+
+    pd.set_option("display.width", 160)
+    print("\n=== Viewer defaults (cross entries) ===")
+    print(res[((res["signal"] == "bull_zone") & (res["fast"] == 20) & (res["slow"] == 50))
+              | ((res["signal"] == "breakout") & (res["window"] == 50) & (res["mult"] == 1.8))]
+          .dropna(axis=1, how="all").round(4).to_string(index=False))
+    print(f"\nAll results: {RESULTS_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(a) for a in sys.argv[1:2]]))
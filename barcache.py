@@ -0,0 +1,131 @@
+# barcache.py
+"""
+Size-bounded in-memory cache for downloaded bars.
+
+BoundedCache is a thread-safe LRU with a TTL, an entry cap and a byte cap;
+every entry carries its own size so the cache can report (and limit) how
+much memory it holds. CompactBars is the stored form of an OHLCV frame:
+float32 prices, int64 volume, int64 timestamps (32 bytes per bar, about a
+third of the old cached float64 frame with its vol/vol20/vol50/inst_level
+copies); derived columns are rebuilt on read.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLS = ["Open", "High", "Low", "Close"]
+
+
+# --------------------------
+# COMPACT REPRESENTATION
+# --------------------------
+class CompactBars:
+    __slots__ = ("index", "tz", "prices", "volume")
+
+    def __init__(self, index, tz, prices, volume):
+        self.index, self.tz, self.prices, self.volume = index, tz, prices, volume
+
+    @classmethod
+    def from_frame(cls, df):
+        """From a yfinance frame (MultiIndex columns allowed)."""
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+        idx = pd.DatetimeIndex(df.index)
+        tz = str(idx.tz) if idx.tz is not None else None
+        stamps = (idx.tz_convert("UTC").tz_localize(None) if tz else idx).asi8.copy()
+        prices = df[PRICE_COLS].to_numpy(dtype="float32")
+        volume = np.nan_to_num(df["Volume"].to_numpy(dtype="float64")).astype("int64")
+        return cls(stamps, tz, prices, volume)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, "int64"), None, np.empty((0, 4), "float32"), np.empty(0, "int64"))
+
+    def to_frame(self):
+        idx = pd.to_datetime(self.index)
+        if self.tz:
+            idx = idx.tz_localize("UTC").tz_convert(self.tz)
+        df = pd.DataFrame(self.prices, index=pd.DatetimeIndex(idx, name="Date"), columns=PRICE_COLS)
+        df["Volume"] = self.volume
+        return df
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + self.prices.nbytes + self.volume.nbytes + 64
+
+    def __len__(self):
+        return len(self.index)
+
+
+# --------------------------
+# BOUNDED LRU + TTL
+# --------------------------
+class BoundedCache:
+    def __init__(self, max_bytes, max_entries=None, ttl=None, sizeof=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda v: getattr(v, "nbytes", 0))
+        self._data = OrderedDict()  # key -> (expires_at, value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            if item[0] is not None and item[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        size = int(self.sizeof(value))
+        if size > self.max_bytes:
+            return False  # would evict everything and still not fit
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (expires, value, size)
+            self._bytes += size
+            while self._data and (self._bytes > self.max_bytes or
+                                  (self.max_entries and len(self._data) > self.max_entries)):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def _drop(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,67 @@
+# bench_normalize.py
+"""
+Synthetic benchmark for the refresh CPU stage (normalize.normalize_arrays).
+
+Builds N fake yfinance payloads (default 5,000 tickers x 1y of daily bars,
+with the Adj Close column and a few NaN rows like the real thing) and runs
+the CPU stage inline and on process pools of increasing size.
+
+Usage: python bench_normalize.py [tickers] [bars]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import normalize
+
+COLUMNS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+
+
+def synthetic_payloads(n_tickers=5000, n_bars=252, seed=0):
+    rng = np.random.default_rng(seed)
+    index = np.arange(np.datetime64("2024-01-02"), np.datetime64("2024-01-02") + n_bars,
+                      dtype="datetime64[D]").astype("datetime64[ns]")
+    payloads = []
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+        spread = np.abs(rng.normal(0, 0.01, n_bars)) * close
+        values = np.column_stack([
+            close * 0.99, close, close + spread, close - spread,
+            close + rng.normal(0, 0.5, n_bars), rng.integers(1e5, 5e7, n_bars),
+        ]).astype("float64")
+        values[rng.integers(0, n_bars, 3)] = np.nan
+        payloads.append((f"T{i:05d}", index, COLUMNS, values))
+    return payloads
+
+
+def run(payloads, processes):
+    start = time.perf_counter()
+    if processes == 0:
+        for p in payloads:
+            normalize.normalize_arrays(*p)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for _ in pool.map(normalize.normalize_arrays, *zip(*payloads), chunksize=64):
+                pass
+    return time.perf_counter() - start
+
+
+def main(n_tickers=5000, n_bars=252):
+    payloads = synthetic_payloads(n_tickers, n_bars)
+    print(f"[INFO] {n_tickers} tickers x {n_bars} bars")
+
+    sizes = [0] + [p for p in (1, 2, 4, 8, 16) if p <= (os.cpu_count() or 1)]
+    base = None
+    for processes in sizes:
+        secs = run(payloads, processes)
+        base = base or secs
+        label = "inline" if processes == 0 else f"{processes} proc"
+        print(f"  {label:>8}: {secs:6.2f}s  {n_tickers / secs:8.0f} tickers/s  x{base / secs:.2f}")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
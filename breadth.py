@@ -0,0 +1,77 @@
+# breadth.py
+"""
+Market breadth from one cross-sectional pass over the panel.
+
+    b = compute_breadth(shared_panel())   # DataFrame indexed by date
+
+Every column is a reduction over the ticker axis of a (tickers, days)
+array, so a year of daily breadth for the whole universe is a few numpy
+ops instead of one load_from_db() per ticker per date. Indicators come
+from screener.field(), memoized on the panel, so they are shared with any
+screen already run on the same panel.
+
+Columns:
+    tickers          tickers with a bar that day
+    pct_above_sma50  % of tickers (with a full SMA window) closing above it
+    pct_above_sma200
+    bull_zone        tickers with vol50 > vol20 (the viewers' bull zone)
+    bull_zone_pct
+    advances / declines / unchanged   close vs the ticker's previous bar
+    ad_line          cumulative advances - declines
+    new_highs / new_lows              high (low) at its HIGH_LOW_BARS extreme
+"""
+
+import numpy as np
+import pandas as pd
+
+from screener import field
+
+HIGH_LOW_BARS = 252  # 52 weeks
+
+
+def _pct(hit, valid):
+    n = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, 100.0 * (hit & valid).sum(axis=0) / n, np.nan)
+
+
+def compute_breadth(panel, high_low_bars=HIGH_LOW_BARS):
+    close = field(panel, "close")
+    has_bar = ~np.isnan(close)
+    out = {"tickers": has_bar.sum(axis=0)}
+
+    with np.errstate(invalid="ignore"):
+        for n in (50, 200):
+            sma = field(panel, f"sma{n}")
+            out[f"pct_above_sma{n}"] = _pct(close > sma, ~np.isnan(sma) & has_bar)
+
+        bull = field(panel, "bull_zone")
+        zone_ok = ~np.isnan(bull)
+        out["bull_zone"] = (zone_ok & (bull == 1)).sum(axis=0)
+        out["bull_zone_pct"] = _pct(bull == 1, zone_ok)
+
+        change = close - field(panel, "close_prev")
+        out["advances"] = (change > 0).sum(axis=0)
+        out["declines"] = (change < 0).sum(axis=0)
+        out["unchanged"] = (change == 0).sum(axis=0)
+        out["ad_line"] = np.cumsum(out["advances"] - out["declines"])
+
+        high, low = field(panel, "high"), field(panel, "low")
+        out["new_highs"] = (high >= field(panel, f"hhv{high_low_bars}")).sum(axis=0)
+        out["new_lows"] = (low <= field(panel, f"llv{high_low_bars}")).sum(axis=0)
+
+    df = pd.DataFrame(out, index=pd.DatetimeIndex(panel.dates, name="date"))
+    return df[df["tickers"] > 0]
+
+
+if __name__ == "__main__":
+    import time
+    from panel import shared_panel
+
+    t0 = time.perf_counter()
+    p = shared_panel()
+    t1 = time.perf_counter()
+    b = compute_breadth(p)
+    t2 = time.perf_counter()
+    print(b.tail(10).round(1).to_string())
+    print(f"[OK] {p.shape[0]} tickers × {p.shape[1]} days · load {t1 - t0:.2f}s · breadth {t2 - t1:.2f}s")
@@ -0,0 +1,155 @@
+# corporate_actions.py
+"""
+Split / dividend factors stored next to the raw bars.
+
+stock_data keeps raw (as-traded) prices: normalize.py undoes Yahoo's split
+adjustment before storing, so rows never have to be rewritten when a split
+happens. corporate_actions holds one row per event:
+
+    kind='split'     value = shares after / shares before (4.0 for a 4:1 split)
+    kind='dividend'  value = cash amount per share on the ex-date
+
+Adjusted series are produced at read time (panel.shared_panel / zones):
+every bar before an event is multiplied by that event's price factor, so a
+split costs one inserted row instead of a full history re-download.
+
+Modes
+    "split"  prices / split ratio, volume * split ratio (charts, screener)
+    "total"  split + dividend factor 1 - div / prev close (backtests)
+
+Usage: python corporate_actions.py --split TICKER YYYY-MM-DD RATIO
+       python corporate_actions.py --list [TICKER]
+"""
+
+import sqlite3
+import sys
+from datetime import datetime
+
+import numpy as np
+
+DB_PATH = "usa_data.db"
+MODES = (None, "split", "total")
+
+
+# --------------------------
+# TABLE
+# --------------------------
+def create_actions_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS corporate_actions (
+            ticker TEXT,
+            date TEXT,
+            kind TEXT,
+            value REAL,
+            recorded_at TEXT,
+            PRIMARY KEY (ticker, date, kind)
+        )
+    """)
+
+
+def record_actions(conn, ticker, actions):
+    """Upsert [(date, kind, value), ...] for one ticker; returns rows written."""
+    if not actions:
+        return 0
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany("""
+        INSERT OR REPLACE INTO corporate_actions (ticker, date, kind, value, recorded_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(ticker, d, kind, float(v), now) for d, kind, v in actions])
+    return len(actions)
+
+
+def add_split(conn, ticker, date, ratio):
+    create_actions_table(conn)
+    record_actions(conn, ticker, [(date, "split", ratio)])
+    conn.commit()
+
+
+def load_actions(conn, tickers=None):
+    """[(ticker, date, kind, value), ...] ordered by ticker, date."""
+    try:
+        sql = "SELECT ticker, date, kind, value FROM corporate_actions"
+        params = []
+        if tickers:
+            sql += f" WHERE ticker IN ({','.join('?' * len(tickers))})"
+            params = list(tickers)
+        return conn.execute(sql + " ORDER BY ticker, date", params).fetchall()
+    except sqlite3.OperationalError:
+        return []  # table not created yet: nothing to adjust
+
+
+# --------------------------
+# FACTORS
+# --------------------------
+def _suffix_product(events):
+    """factor[..., k] = prod(events[..., k+1:]), i.e. every event after bar k."""
+    rev = np.cumprod(events[..., ::-1], axis=-1)[..., ::-1]
+    out = np.ones_like(events)
+    out[..., :-1] = rev[..., 1:]
+    return out
+
+
+def factor_matrix(tickers, dates, actions, close=None, mode="split"):
+    """
+    (price_factor, volume_factor), both (len(tickers), len(dates)).
+
+    dates is a sorted datetime64[D] array; close (same shape as the factors,
+    raw prices) is only needed for dividends in "total" mode. An event on
+    date d applies to every bar strictly before d.
+    """
+    shape = (len(tickers), len(dates))
+    price = np.ones(shape)
+    volume = np.ones(shape)
+    if mode is None or not actions or not len(dates):
+        return price, volume
+
+    row = {t: i for i, t in enumerate(tickers)}
+    for ticker, date, kind, value in actions:
+        i = row.get(ticker)
+        if i is None or not value:
+            continue
+        j = int(np.searchsorted(dates, np.datetime64(date, "D")))
+        if j == 0 or j >= len(dates):
+            continue  # nothing stored before it, or not reached yet
+        if kind == "split":
+            price[i, j] /= value
+            volume[i, j] *= value
+        elif kind == "dividend" and mode == "total" and close is not None:
+            prev = close[i, :j][~np.isnan(close[i, :j])]
+            if len(prev) and prev[-1] > value:
+                price[i, j] *= 1.0 - value / prev[-1]
+
+    return _suffix_product(price), _suffix_product(volume)
+
+
+def adjust_values(tickers, dates, values, actions, mode="split", close_col=3, volume_col=4):
+    """
+    Adjusted copy of a (tickers, dates, fields) OHLCV array; values itself is
+    left untouched. Returns values unchanged when there is nothing to apply.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown adjust mode {mode!r}, expected one of {MODES}")
+    if mode is None or not actions:
+        return values
+    price, volume = factor_matrix(tickers, dates, actions, values[:, :, close_col], mode)
+    out = values * price[:, :, None]
+    out[:, :, volume_col] = values[:, :, volume_col] * volume
+    return out
+
+
+# --------------------------
+# CLI
+# --------------------------
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    conn = sqlite3.connect(DB_PATH)
+    create_actions_table(conn)
+    if args[:1] == ["--split"] and len(args) == 4:
+        add_split(conn, args[1].upper(), args[2], float(args[3]))
+        print(f"[OK] {args[1].upper()} split {args[3]} on {args[2]} recorded.")
+    elif args[:1] == ["--list"]:
+        for row in load_actions(conn, [a.upper() for a in args[1:]] or None):
+            print(*row, sep="\t")
+    else:
+        print(__doc__.split("Usage:")[1].strip())
+    conn.close()
@@ -0,0 +1,77 @@
+# indicators.py
+"""
+Vectorized indicators over (tickers, days) arrays.
+
+Every function takes a 2-D float array with one row per ticker and one
+column per trading day (NaN where a ticker has no bar) and returns an array
+of the same shape. Windows are counted in bars, like the per-ticker
+rolling() calls in the viewers, and need a full window (NaN before that).
+Gaps (NaN) are skipped rather than breaking the window: each row is packed
+left, rolled, and scattered back to its original columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def per_bar(x, fn):
+    """
+    Apply fn (days x tickers DataFrame -> same shape) over each ticker's own
+    bars, ignoring NaN gaps, and return a (tickers, days) array.
+
+    x must be a raw field: every NaN is taken as a missing bar, so chain
+    derived steps inside fn rather than feeding one indicator's warm-up
+    NaNs into the next.
+    """
+    x = np.asarray(x, dtype="float64")
+    valid = ~np.isnan(x)
+    if valid.all():
+        return fn(pd.DataFrame(x.T)).to_numpy().T
+
+    order = np.argsort(~valid, axis=1, kind="stable")   # bars first, gaps last
+    packed = np.take_along_axis(x, order, axis=1)
+    rolled = fn(pd.DataFrame(packed.T)).to_numpy().T
+
+    out = np.empty_like(x)
+    np.put_along_axis(out, order, rolled, axis=1)
+    out[~valid] = np.nan
+    return out
+
+
+def rolling_mean(x, n):
+    return per_bar(x, lambda d: d.rolling(n, min_periods=n).mean())
+
+
+def rolling_max(x, n):
+    return per_bar(x, lambda d: d.rolling(n, min_periods=n).max())
+
+
+def rolling_min(x, n):
+    return per_bar(x, lambda d: d.rolling(n, min_periods=n).min())
+
+
+def ema(x, n):
+    return per_bar(x, lambda d: d.ewm(span=n, min_periods=n, adjust=False).mean())
+
+
+def shift(x, n=1):
+    """Value n bars ago."""
+    return per_bar(x, lambda d: d.shift(n))
+
+
+def pct_change(x, n=1):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / shift(x, n) - 1.0
+
+
+def _rsi(d, n):
+    diff = d.diff()
+    up = diff.clip(lower=0).ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    down = (-diff).clip(lower=0).ewm(alpha=1 / n, min_periods=n, adjust=False).mean()
+    out = 100 - 100 / (1 + up / down)
+    return out.mask((down == 0) & (up > 0), 100.0)
+
+
+def rsi(close, n=14):
+    """Wilder RSI, same smoothing as ta.momentum.RSIIndicator."""
+    return per_bar(close, lambda d: _rsi(d, n))
@@ -0,0 +1,353 @@
+# live.py
+"""
+Live intraday poller with in-memory ring buffers.
+
+One LivePoller per server process runs an asyncio loop on a daemon thread.
+Sessions call watch(ticker, session_id) on every fragment run; the poller
+fetches each watched ticker at most once per POLL_SECONDS no matter how
+many sessions watch it (requests are coalesced per ticker), under a global
+token-bucket rate limit and a concurrency cap. New 1-minute bars go into a
+fixed-size RingBuffer per ticker; the forming bar is updated in place.
+Watches that are not renewed within WATCH_TTL (closed tabs) lapse.
+
+Feeds are async callables feed(ticker, since) -> (stamps, ohlcv):
+    ChartFeed  Yahoo v8 chart JSON over a pooled requests.Session; each
+               blocking GET runs in asyncio.to_thread (at most
+               MAX_CONCURRENCY at once), so live charts need no aiohttp.
+               base_url can point at a local stub server
+    StubFeed   in-process random walk with optional latency, for tests
+
+Usage: python live.py [--sessions N] [--seconds S] [TICKER ...]   # stub demo
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+import numpy as np
+
+CAPACITY = 512          # 1-minute bars kept per ticker (a session is 390)
+POLL_SECONDS = 15       # per-ticker refresh interval
+WATCH_TTL = 120         # seconds a watch survives without being renewed
+MAX_RPS = 4.0           # global request rate
+MAX_CONCURRENCY = 8
+TICK = 0.5              # scheduler granularity
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/"
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+# --------------------------
+# RING BUFFER
+# --------------------------
+class RingBuffer:
+    """Fixed-capacity (stamps, ohlcv) buffer; stamps are epoch seconds, ascending."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.stamps = np.zeros(capacity, dtype="int64")
+        self.values = np.full((capacity, len(FIELDS)), np.nan)
+        self.start = 0
+        self.size = 0
+        self.version = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_stamp(self):
+        return int(self.stamps[(self.start + self.size - 1) % self.capacity]) if self.size else None
+
+    def merge(self, stamps, ohlcv):
+        """Append bars newer than the last one and overwrite the forming (last) bar."""
+        changed = False
+        last = self.last_stamp
+        for ts, row in zip(np.asarray(stamps, dtype="int64"), np.asarray(ohlcv, dtype="float64")):
+            if last is not None and ts < last:
+                continue
+            if last is not None and ts == last:
+                i = (self.start + self.size - 1) % self.capacity
+                if not np.array_equal(self.values[i], row):
+                    self.values[i] = row
+                    changed = True
+                continue
+            i = (self.start + self.size) % self.capacity
+            if self.size == self.capacity:
+                self.start = (self.start + 1) % self.capacity  # overwrite the oldest
+            else:
+                self.size += 1
+            self.stamps[i], self.values[i] = ts, row
+            last = int(ts)
+            changed = True
+        if changed:
+            self.version += 1
+        return changed
+
+    def arrays(self):
+        """Ordered copies of (stamps, ohlcv)."""
+        idx = (self.start + np.arange(self.size)) % self.capacity
+        return self.stamps[idx].copy(), self.values[idx].copy()
+
+
+# --------------------------
+# FEEDS
+# --------------------------
+def parse_chart(payload):
+    """Yahoo v8 chart JSON -> (stamps int64, ohlcv float64 (n, 5)); null rows dropped."""
+    result = (payload.get("chart") or {}).get("result") or []
+    if not result or not result[0].get("timestamp"):
+        return np.empty(0, dtype="int64"), np.empty((0, len(FIELDS)))
+    res = result[0]
+    quote = res["indicators"]["quote"][0]
+    stamps = np.asarray(res["timestamp"], dtype="int64")
+    ohlcv = np.column_stack([np.asarray(quote.get(f) or [None] * len(stamps), dtype="float64")
+                             for f in FIELDS])
+    keep = ~np.isnan(ohlcv[:, :4]).any(axis=1)
+    ohlcv[:, 4] = np.nan_to_num(ohlcv[:, 4])
+    return stamps[keep], ohlcv[keep]
+
+
+class ChartFeed:
+    """Yahoo chart endpoint (or a stub with the same JSON): blocking requests on worker threads, one pooled Session."""
+
+    def __init__(self, base_url=YAHOO_CHART_URL, interval="1m", timeout=10):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url
+        self.interval = interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0"
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=MAX_CONCURRENCY))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENCY))
+        self.calls = 0
+
+    def _get(self, ticker, since):
+        params = {"interval": self.interval, "includePrePost": "false"}
+        if since:
+            params.update(period1=int(since), period2=int(time.time()) + 60)
+        else:
+            params["range"] = "1d"
+        r = self.session.get(self.base_url + ticker.replace(".", "-"), params=params,
+                             timeout=self.timeout)
+        r.raise_for_status()
+        return parse_chart(r.json())
+
+    async def __call__(self, ticker, since=None):
+        self.calls += 1
+        return await asyncio.to_thread(self._get, ticker, since)
+
+
+class StubFeed:
+    """Deterministic per-ticker random walk of 1-minute bars up to now."""
+
+    def __init__(self, latency=0.0, start=None, seed=0):
+        self.latency = latency
+        self.start = int(start or time.time() - 60 * 60) // 60 * 60
+        self.seed = seed
+        self.calls = 0
+        self.calls_by_ticker = {}
+
+    async def __call__(self, ticker, since=None):
+        self.calls += 1
+        self.calls_by_ticker[ticker] = self.calls_by_ticker.get(ticker, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        now = int(time.time())
+        stamps = np.arange(self.start, now + 1, 60, dtype="int64")
+        rng = np.random.default_rng([self.seed, sum(map(ord, ticker))])
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(stamps))))
+        spread = np.abs(rng.normal(0, 0.0005, len(stamps))) * close
+        ohlcv = np.column_stack([close, close + spread, close - spread, close,
+                                 rng.integers(1_000, 50_000, len(stamps)).astype("float64")])
+        # forming bar: only the part of the minute that has elapsed
+        ohlcv[-1, 4] *= ((now - stamps[-1]) % 60 + 1) / 60
+        if since:
+            keep = stamps >= since
+            stamps, ohlcv = stamps[keep], ohlcv[keep]
+        return stamps, ohlcv
+
+
+# --------------------------
+# RATE LIMIT
+# --------------------------
+class TokenBucket:
+    def __init__(self, rate=MAX_RPS, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# --------------------------
+# POLLER
+# --------------------------
+class LivePoller:
+    def __init__(self, feed=None, poll_seconds=POLL_SECONDS, capacity=CAPACITY,
+                 max_rps=MAX_RPS, max_concurrency=MAX_CONCURRENCY, watch_ttl=WATCH_TTL):
+        self.feed = feed or ChartFeed()
+        self.poll_seconds = poll_seconds
+        self.capacity = capacity
+        self.max_rps = max_rps
+        self.max_concurrency = max_concurrency
+        self.watch_ttl = watch_ttl
+        self.buffers = {}      # ticker -> RingBuffer
+        self.watchers = {}     # ticker -> {session_id: last_seen}
+        self.last_fetch = {}   # ticker -> monotonic time of the last fetch start
+        self.errors = {}       # ticker -> last error string
+        self.inflight = set()
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- called from Streamlit threads ----
+    def watch(self, ticker, session_id):
+        with self._lock:
+            self.watchers.setdefault(ticker, {})[session_id] = time.monotonic()
+        self.start()
+
+    def unwatch(self, ticker, session_id):
+        with self._lock:
+            self.watchers.get(ticker, {}).pop(session_id, None)
+
+    def snapshot(self, ticker):
+        """(stamps, ohlcv, version) copies for one ticker; empty arrays if nothing yet."""
+        with self._lock:
+            buf = self.buffers.get(ticker)
+            if buf is None:
+                return np.empty(0, dtype="int64"), np.empty((0, len(FIELDS))), 0
+            stamps, ohlcv = buf.arrays()
+            return stamps, ohlcv, buf.version
+
+    def frame(self, ticker, tz="America/New_York"):
+        import pandas as pd
+
+        stamps, ohlcv, _ = self.snapshot(ticker)
+        idx = pd.to_datetime(stamps, unit="s", utc=True).tz_convert(tz)
+        return pd.DataFrame(ohlcv, index=pd.DatetimeIndex(idx, name="time"), columns=FIELDS)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "watched": sum(1 for w in self.watchers.values() if w),
+                "sessions": len({s for w in self.watchers.values() for s in w}),
+                "buffers": len(self.buffers),
+                "fetches": self.fetches,
+                "inflight": len(self.inflight),
+                "errors": dict(self.errors),
+            }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._run()),
+                                            name="live-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    # ---- event loop side ----
+    def _due(self):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for ticker, sessions in self.watchers.items():
+                for sid in [s for s, seen in sessions.items() if now - seen > self.watch_ttl]:
+                    del sessions[sid]
+                if not sessions or ticker in self.inflight:
+                    continue  # nobody watching, or a fetch for it is already running
+                if now - self.last_fetch.get(ticker, -1e9) >= self.poll_seconds:
+                    self.inflight.add(ticker)
+                    self.last_fetch[ticker] = now
+                    due.append(ticker)
+        return due
+
+    async def _fetch(self, ticker, bucket, sem):
+        try:
+            async with sem:
+                await bucket.acquire()
+                with self._lock:
+                    buf = self.buffers.get(ticker)
+                    since = buf.last_stamp if buf is not None else None
+                stamps, ohlcv = await self.feed(ticker, since)
+            with self._lock:
+                self.fetches += 1
+                buf = self.buffers.setdefault(ticker, RingBuffer(self.capacity))
+                buf.merge(stamps, ohlcv)
+                self.errors.pop(ticker, None)
+        except Exception as e:
+            with self._lock:
+                self.errors[ticker] = repr(e)
+        finally:
+            with self._lock:
+                self.inflight.discard(ticker)
+
+    async def _run(self):
+        bucket = TokenBucket(self.max_rps)
+        sem = asyncio.Semaphore(self.max_concurrency)
+        tasks = set()
+        while not self._stop.is_set():
+            for ticker in self._due():
+                task = asyncio.create_task(self._fetch(ticker, bucket, sem))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.sleep(TICK)
+        for task in tasks:
+            task.cancel()
+
+
+# --------------------------
+# STUB DEMO
+# --------------------------
+def demo(tickers, sessions=3, seconds=10.0, poll_seconds=2.0):
+    """Several fake sessions watch the same tickers against StubFeed; prints coalescing stats."""
+    feed = StubFeed(latency=0.05)
+    poller = LivePoller(feed, poll_seconds=poll_seconds)
+    t_end = time.monotonic() + seconds
+    renders = 0
+    while time.monotonic() < t_end:
+        for s in range(sessions):
+            for t in tickers:
+                poller.watch(t, f"session-{s}")
+                poller.snapshot(t)
+                renders += 1
+        time.sleep(0.25)
+    poller.stop()
+
+    expected = len(tickers) * (seconds // poll_seconds + 1)
+    print(f"[INFO] {sessions} sessions x {len(tickers)} tickers, {renders} snapshot reads in {seconds:.0f}s")
+    print(f"[INFO] feed calls {feed.calls} (coalesced; at most ~{expected:.0f} at one per "
+          f"{poll_seconds:.0f}s per ticker)")
+    for t in tickers:
+        stamps, ohlcv, version = poller.snapshot(t)
+        print(f"  {t:6s} calls {feed.calls_by_ticker.get(t, 0):3d} · bars {len(stamps):3d} · "
+              f"version {version} · last close {ohlcv[-1, 3]:.2f}")
+    return feed.calls
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    opts = {a: args[i + 1] for i, a in enumerate(args[:-1]) if a.startswith("--")}
+    names = [a for i, a in enumerate(args) if not a.startswith("--")
+             and (i == 0 or not args[i - 1].startswith("--"))]
+    demo([t.upper() for t in names] or ["AAPL", "MSFT", "NVDA"],
+         sessions=int(opts.get("--sessions", 3)), seconds=float(opts.get("--seconds", 10)))
@@ -0,0 +1,251 @@
+# loadtest.py
+"""
+Multi-session load test for the Streamlit pages
+------------------------------------------------
+✔ Synthetic usa_data.db (random-walk OHLCV, zones, sectors) in a scratch dir
+✔ N concurrent sessions, each an AppTest driving the page headlessly in
+  its own process (AppTest swaps a global Runtime around every run, so it
+  is one session per process); they compete for the same CPUs and DB file
+✔ Every session switches tickers and moves lookback / bars / as-of / chart
+  sliders at random (seeded), with no think time
+✔ Rerun latency p50 / p90 / p95 / p99 / max, reruns per second, CPU use
+  (cores busy) and RSS per session after warm-up plus its growth by the end
+  of the level; timing starts once every session has loaded the page
+✔ --max-p95 exits 1 when any level is slower, so capacity regressions fail CI
+✔ --json writes the report for comparing runs
+Live polling is switched off in every session: nothing touches the network.
+Usage: python loadtest.py [--sessions 1,2,4,8] [--actions 20] [--page pages/Volumes.py]
+                          [--tickers 500] [--days 400] [--db DIR] [--max-p95 SECONDS] [--json FILE]
+"""
+
+import json
+import multiprocessing as mp
+import os
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGE = "pages/Volumes.py"
+SESSIONS = [1, 2, 4, 8]
+ACTIONS = 20            # reruns per session per level, after one warm-up run
+TICKERS = 500
+DAYS = 400              # trading days per synthetic ticker
+TIMEOUT = 120           # seconds one AppTest rerun may take
+OFFLINE_TOGGLES = ("live",)   # toggles switched off so no session polls Yahoo
+SECTOR_NAMES = ["Energy", "Financials", "Health Care", "Industrials", "Information Technology", "Utilities"]
+PERCENTILES = [50, 90, 95, 99]
+
+
+# --------------------------
+# SYNTHETIC DB
+# --------------------------
+def make_db(path, n_tickers=TICKERS, days=DAYS, seed=0):
+    """usa_data.db + usastocks.txt + bull_zone_stocks.txt in directory `path`."""
+    import sectors
+    import zones
+    from retention import STOCK_DATA_SCHEMA
+
+    os.makedirs(path, exist_ok=True)
+    db_path = os.path.join(path, "usa_data.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+    end = np.datetime64(date.today() - timedelta(days=1), "D")
+    sessions = np.busday_offset(end, np.arange(-days + 1, 1), roll="backward")
+    day_str = np.datetime_as_string(sessions, unit="D").tolist()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(STOCK_DATA_SCHEMA.format(schema="main"))
+    sectors.create_sector_tables(conn)
+    for t in tickers:
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+        spread = close * rng.uniform(0.002, 0.03, days)
+        open_ = close + rng.normal(0, 0.5, days) * spread
+        volume = rng.lognormal(15, 0.5, days) * (1 + np.sin(np.arange(days) / rng.uniform(10, 40)) / 2)
+        conn.executemany("INSERT INTO stock_data VALUES (?, ?, ?, ?, ?, ?, ?)", zip(
+            [t] * days, day_str, open_.tolist(), (np.maximum(open_, close) + spread).tolist(),
+            (np.minimum(open_, close) - spread).tolist(), close.tolist(), np.round(volume).tolist()))
+    conn.commit()
+    zones.update_zones(conn, tickers, bull_file=os.path.join(path, "bull_zone_stocks.txt"))
+    conn.close()
+
+    sectors.save_meta([[t, t, SECTOR_NAMES[i % len(SECTOR_NAMES)], None] for i, t in enumerate(tickers)],
+                      "synthetic", db_path)
+    with open(os.path.join(path, "usastocks.txt"), "w") as f:
+        f.write("\n".join(tickers))
+    return db_path
+
+
+# --------------------------
+# PROCESS STATS
+# --------------------------
+def rss_mb():
+    """Current resident set size (Linux /proc), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system
+
+
+# --------------------------
+# ONE SESSION
+# --------------------------
+def _widgets(at):
+    return [w for kind in ("selectbox", "select_slider", "slider", "radio")
+            for w in getattr(at, kind) if getattr(w, "options", None) or kind == "slider"]
+
+
+def _random_value(w, rng):
+    if w.type == "slider":
+        lo, hi, step = w.min, w.max, w.step or 1
+        return lo + step * rng.randint(0, int(round((hi - lo) / step)))
+    options = [o for o in w.options if o != ""]
+    return rng.choice(options) if options else None
+
+
+def session(page, db_dir, n_actions, seed, ready, out):
+    """
+    One session (runs in its own process): warm-up runs, wait at `ready`
+    until every session is warm, then n_actions reruns each changing one
+    widget. Puts a result dict on `out`.
+    """
+    import logging
+    import warnings
+    warnings.simplefilter("ignore")
+    logging.disable(logging.WARNING)
+    sys.path.insert(0, ROOT)
+    os.chdir(db_dir)  # pages open usa_data.db relative to the working directory
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    latencies, errors = [], []
+    rss0 = cpu0 = None
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=TIMEOUT)
+        at.run()
+        for tg in at.toggle:
+            if any(k in tg.label.lower() for k in OFFLINE_TOGGLES):
+                tg.set_value(False)
+        at.run()
+        ready.wait()
+        rss0, cpu0 = rss_mb(), cpu_seconds()
+        for _ in range(n_actions):
+            widgets = [w for w in _widgets(at) if _random_value(w, rng) is not None]
+            if widgets:
+                w = rng.choice(widgets)
+                w.set_value(_random_value(w, rng))
+            t0 = time.perf_counter()
+            at.run()
+            latencies.append(time.perf_counter() - t0)
+            if at.exception:
+                errors.append(at.exception[0].value)
+    except Exception as e:
+        errors.append(repr(e))
+        ready.abort()
+    out.put({"latencies": latencies, "errors": errors,
+             "cpu_s": cpu_seconds() - cpu0 if cpu0 is not None else 0.0,
+             "rss_mb": rss_mb(), "rss_growth_mb": rss_mb() - rss0 if rss0 is not None else 0.0})
+
+
+def run_level(page, db_dir, n_sessions, n_actions, seed=0):
+    ctx = mp.get_context("spawn")
+    ready, out = ctx.Barrier(n_sessions + 1), ctx.Queue()
+    procs = [ctx.Process(target=session, args=(page, db_dir, n_actions, seed + i, ready, out))
+             for i in range(n_sessions)]
+    for p in procs:
+        p.start()
+    try:
+        ready.wait()
+    except Exception:  # BrokenBarrierError: a session failed to load, its error is reported
+        pass
+    t0 = time.perf_counter()
+    results = [out.get(timeout=TIMEOUT * (n_actions + 2)) for _ in procs]
+    wall = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+
+    latencies = [x for r in results for x in r["latencies"]]
+    errors = [e for r in results for e in r["errors"]]
+    lat = np.array(latencies) if latencies else np.array([np.nan])
+    return {
+        "sessions": n_sessions,
+        "reruns": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_s": wall,
+        "reruns_per_s": len(latencies) / wall,
+        **{f"p{p}_s": float(np.percentile(lat, p)) for p in PERCENTILES},
+        "max_s": float(np.max(lat)),
+        "cpu_cores": sum(r["cpu_s"] for r in results) / wall,
+        "rss_mb": float(np.mean([r["rss_mb"] for r in results])),
+        "rss_growth_mb": float(np.mean([r["rss_growth_mb"] for r in results])),
+    }
+
+
+def report(rows):
+    print(f"{'sessions':>8} {'reruns':>6} {'err':>4} {'rr/s':>6} {'p50':>6} {'p90':>6} {'p95':>6} "
+          f"{'p99':>6} {'max':>6} {'cpu':>5} {'MB/ses':>7} {'+MB':>6}")
+    for r in rows:
+        print(f"{r['sessions']:>8} {r['reruns']:>6} {r['errors']:>4} {r['reruns_per_s']:>6.2f} "
+              f"{r['p50_s']:>6.2f} {r['p90_s']:>6.2f} {r['p95_s']:>6.2f} {r['p99_s']:>6.2f} "
+              f"{r['max_s']:>6.2f} {r['cpu_cores']:>5.2f} {r['rss_mb']:>7.0f} {r['rss_growth_mb']:>+6.0f}")
+        if r["first_error"]:
+            print(f"[WARN] {r['sessions']} sessions: {r['first_error']}")
+
+
+def _arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    page = _arg(argv, "--page", PAGE)
+    levels = [int(x) for x in _arg(argv, "--sessions", ",".join(map(str, SESSIONS))).split(",")]
+    n_actions = int(_arg(argv, "--actions", ACTIONS))
+    max_p95 = float(_arg(argv, "--max-p95", "inf"))
+    db_dir = _arg(argv, "--db", None)
+    json_path = os.path.abspath(_arg(argv, "--json", "")) if "--json" in argv else None
+
+    sys.path.insert(0, ROOT)
+    if db_dir is None:
+        db_dir = tempfile.mkdtemp(prefix="loadtest_")
+    if not os.path.exists(os.path.join(db_dir, "usa_data.db")):
+        t0 = time.perf_counter()
+        make_db(db_dir, int(_arg(argv, "--tickers", TICKERS)), int(_arg(argv, "--days", DAYS)))
+        print(f"[INFO] synthetic DB in {db_dir} ({time.perf_counter() - t0:.1f}s)")
+    db_dir = os.path.abspath(db_dir)
+
+    print(f"⏳ {page}: {n_actions} reruns per session at {levels} concurrent sessions")
+    rows = []
+    for i, n in enumerate(levels):
+        rows.append(run_level(page, db_dir, n, n_actions, seed=1000 * i))
+        print(f"[OK] {n} sessions: p95 {rows[-1]['p95_s']:.2f}s")
+    print()
+    report(rows)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"page": page, "actions": n_actions, "levels": rows}, f, indent=2)
+    slow = [r["sessions"] for r in rows if r["p95_s"] > max_p95 or r["errors"]]
+    if slow:
+        print(f"[ERR] over p95 budget {max_p95}s or failing at {slow} sessions")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
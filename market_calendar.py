@@ -0,0 +1,143 @@
+# market_calendar.py
+"""
+Local NYSE calendar: weekends + full-day exchange holidays, regular
+16:00 America/New_York close. Early closes (1 pm half days) are treated
+as regular days, which only matters for scheduling a few minutes late.
+"""
+
+import datetime as dt
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+NY = ZoneInfo("America/New_York")
+OPEN_TIME = dt.time(9, 30)
+CLOSE_TIME = dt.time(16, 0)
+
+
+def _easter(year):
+    # anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return dt.date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    d = dt.date(year, month, 1)
+    d += dt.timedelta(days=(weekday - d.weekday()) % 7)
+    return d + dt.timedelta(weeks=n - 1)
+
+
+def _last_weekday(year, month, weekday):
+    d = dt.date(year, month + 1, 1) - dt.timedelta(days=1)
+    return d - dt.timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    if d.weekday() == 5:
+        return d - dt.timedelta(days=1)
+    if d.weekday() == 6:
+        return d + dt.timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=64)
+def holidays(year):
+    days = {
+        _nth_weekday(year, 1, 0, 3),            # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),            # Washington's Birthday
+        _easter(year) - dt.timedelta(days=2),   # Good Friday
+        _last_weekday(year, 5, 0),              # Memorial Day
+        _observed(dt.date(year, 7, 4)),         # Independence Day
+        _nth_weekday(year, 9, 0, 1),            # Labor Day
+        _nth_weekday(year, 11, 3, 4),           # Thanksgiving
+        _observed(dt.date(year, 12, 25)),       # Christmas
+    }
+    # New Year's Day falling on Saturday is not observed on Dec 31
+    new_year = dt.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(dt.date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+def is_trading_day(d):
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def trading_days(start, end):
+    """All sessions in [start, end] as a datetime64[D] array."""
+    import numpy as np  # only here, so schedule checks stay import-light
+
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    if not len(days):
+        return days
+    off = {np.datetime64(h, "D") for y in range(start.year, end.year + 1) for h in holidays(y)}
+    keep = np.is_busday(days) & ~np.isin(days, np.array(sorted(off), dtype="datetime64[D]"))
+    return days[keep]
+
+
+def session_close(d):
+    return dt.datetime.combine(d, CLOSE_TIME, tzinfo=NY)
+
+
+def session_open(d):
+    return dt.datetime.combine(d, OPEN_TIME, tzinfo=NY)
+
+
+def now_ny():
+    return dt.datetime.now(NY)
+
+
+def previous_session(d):
+    d -= dt.timedelta(days=1)
+    while not is_trading_day(d):
+        d -= dt.timedelta(days=1)
+    return d
+
+
+def next_session(d):
+    d += dt.timedelta(days=1)
+    while not is_trading_day(d):
+        d += dt.timedelta(days=1)
+    return d
+
+
+def last_settled_close(now=None, settle=dt.timedelta(0)):
+    """Close time of the latest session whose close + settle is not after now."""
+    now = (now or now_ny()).astimezone(NY)
+    d = now.date()
+    if not is_trading_day(d) or now < session_close(d) + settle:
+        d = previous_session(d)
+    return session_close(d)
+
+
+def next_settled_close(now=None, settle=dt.timedelta(0)):
+    now = (now or now_ny()).astimezone(NY)
+    d = now.date()
+    if not is_trading_day(d) or now >= session_close(d) + settle:
+        d = next_session(d)
+    return session_close(d)
+
+
+def next_open(now=None):
+    """Open time of the next regular session that has not started yet."""
+    now = (now or now_ny()).astimezone(NY)
+    d = now.date()
+    if not is_trading_day(d) or now >= session_open(d):
+        d = next_session(d)
+    return session_open(d)
+
+
+def is_market_open(now=None):
+    now = (now or now_ny()).astimezone(NY)
+    d = now.date()
+    return is_trading_day(d) and session_open(d) <= now < session_close(d)
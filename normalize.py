@@ -0,0 +1,87 @@
+# normalize.py
+"""
+CPU stage of the refresh pipeline.
+
+Runs on the I/O threads right after each download (about 0.2ms of numpy
+per ticker), or in worker processes when refresh_db.PROCESSES > 1, so it
+only imports numpy: no yfinance, no pandas. The I/O threads split the frame
+into plain arrays (see to_arrays), which pickle as raw buffers, and get back
+(dates, ohlcv, actions) ready for executemany.
+
+Yahoo's Open/High/Low/Close/Volume (auto_adjust=False) are still adjusted
+for every split after the bar; when the payload carries a "Stock Splits"
+column that adjustment is undone here, so stock_data holds raw prices and
+the splits/dividends go to corporate_actions (see corporate_actions.py).
+"""
+
+import numpy as np
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+ACTIONS = {"stock splits": "split", "dividends": "dividend"}
+
+
+# --------------------------
+# DATAFRAME -> ARRAYS (I/O thread side)
+# --------------------------
+def to_arrays(df):
+    """Split a yfinance frame into (index, columns, values) without copying rows through Python."""
+    columns = [str(c[0] if isinstance(c, tuple) else c) for c in df.columns]
+    index = np.asarray(df.index.values)
+    values = df.to_numpy(dtype="float64", na_value=np.nan)
+    return index, columns, values
+
+
+# --------------------------
+# NORMALIZE ONE TICKER (worker process side)
+# --------------------------
+def normalize_arrays(ticker, index, columns, values):
+    """
+    Return (ticker, dates, ohlcv, actions) where dates is a 'YYYY-MM-DD'
+    string array, ohlcv a float64 (n, 5) array of raw prices in OHLCV order
+    and actions a list of (date, kind, value). Raises ValueError when the
+    payload cannot be mapped onto OHLCV.
+    """
+    lower = [c.lower() for c in columns]
+    try:
+        pick = [lower.index(name) for name in OHLCV]
+    except ValueError:
+        raise ValueError(f"missing OHLCV columns, got {columns}")
+
+    values = np.asarray(values, dtype="float64")
+    if values.ndim != 2 or values.shape[0] != len(index):
+        raise ValueError(f"shape mismatch: {values.shape} vs {len(index)} dates")
+
+    ohlcv = values[:, pick]
+    days = np.asarray(index).astype("datetime64[D]")
+    extra = {kind: np.nan_to_num(values[:, lower.index(col)])
+             for col, kind in ACTIONS.items() if col in lower}
+
+    keep = ~np.isnan(ohlcv).any(axis=1) & ~np.isnat(days)
+    ohlcv, days = ohlcv[keep], days[keep]
+    extra = {kind: v[keep] for kind, v in extra.items()}
+
+    # sort by date, last duplicate wins
+    order = np.argsort(days, kind="stable")
+    ohlcv, days = ohlcv[order], days[order]
+    if len(days):
+        last = np.append(days[1:] != days[:-1], True)
+        ohlcv, days = ohlcv[last], days[last]
+        extra = {kind: v[order][last] for kind, v in extra.items()}
+
+    dates = np.datetime_as_string(days, unit="D").astype("U10")
+    actions = []
+    for kind, v in extra.items():
+        hit = np.flatnonzero(v > 0)
+        actions += [(dates[j].item(), kind, float(v[j])) for j in hit]
+
+    splits = extra.get("split")
+    if splits is not None and (splits > 0).any():
+        ratio = np.where(splits > 0, splits, 1.0)
+        # bar k was divided by every split after it: multiply those back in
+        after = np.ones(len(ratio))
+        after[:-1] = np.cumprod(ratio[::-1])[::-1][1:]
+        ohlcv = ohlcv.copy()
+        ohlcv[:, :4] *= after[:, None]
+        ohlcv[:, 4] /= after
+
+    return ticker, dates, np.ascontiguousarray(ohlcv), actions
@@ -0,0 +1,80 @@
+# Breadth.py — market breadth dashboard (% above SMA50/200, bull zone, A/D, new highs/lows)
+# Computed in one cross-sectional pass over the shared panel (breadth.py) and
+# cached per data version, so every session and rerun reuses the same frame.
+# The sector table is read from sector_stats, precomputed during refresh.
+
+import time
+T_START = time.perf_counter()
+
+import streamlit as st
+
+from panel import shared_panel, data_version
+
+st.set_page_config(layout="wide", page_title="USA Market Breadth", page_icon="📶")
+DB_PATH = "usa_data.db"
+LOOKBACK = {"3mo": 63, "6mo": 126, "1y": 252, "All": None}
+
+
+@st.cache_data(max_entries=4, show_spinner="Computing breadth…")
+def load_breadth(version: str):
+    from breadth import compute_breadth
+
+    return compute_breadth(shared_panel(DB_PATH))
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_sector_stats(version: str):
+    # precomputed during refresh (sectors.py); just the latest date here
+    from sectors import latest_stats
+
+    return latest_stats(DB_PATH)
+
+
+# ---------------- Sidebar ----------------
+st.sidebar.header("📶 Breadth")
+lookback = st.sidebar.radio("Lookback", list(LOOKBACK), index=2, horizontal=True)
+
+t0 = time.perf_counter()
+breadth = load_breadth(data_version(DB_PATH))
+compute_s = time.perf_counter() - t0
+if breadth.empty:
+    st.error("No data in usa_data.db. Run: python usadb.py build"); st.stop()
+if LOOKBACK[lookback]:
+    breadth = breadth.iloc[-LOOKBACK[lookback]:]
+
+# ---------------- Latest day ----------------
+last, prev = breadth.iloc[-1], breadth.iloc[-2] if len(breadth) > 1 else breadth.iloc[-1]
+st.markdown(f"## 📶 Market breadth — {breadth.index[-1]:%Y-%m-%d} ({int(last['tickers'])} tickers)")
+cols = st.columns(5)
+cols[0].metric("Above SMA50", f"{last['pct_above_sma50']:.1f}%",
+               f"{last['pct_above_sma50'] - prev['pct_above_sma50']:+.1f}")
+cols[1].metric("Above SMA200", f"{last['pct_above_sma200']:.1f}%",
+               f"{last['pct_above_sma200'] - prev['pct_above_sma200']:+.1f}")
+cols[2].metric("Bull zone", f"{int(last['bull_zone'])}", f"{int(last['bull_zone'] - prev['bull_zone']):+d}")
+cols[3].metric("Adv / Dec", f"{int(last['advances'])} / {int(last['declines'])}")
+cols[4].metric("New highs / lows", f"{int(last['new_highs'])} / {int(last['new_lows'])}")
+
+# ---------------- Charts ----------------
+left, right = st.columns(2)
+with left:
+    st.markdown("#### % above moving average")
+    st.line_chart(breadth[["pct_above_sma50", "pct_above_sma200"]], height=260)
+    st.markdown("#### Advance / decline line")
+    st.line_chart(breadth["ad_line"], height=220)
+with right:
+    st.markdown("#### Bull volume zone (% of universe)")
+    st.area_chart(breadth["bull_zone_pct"], height=260)
+    st.markdown("#### New 52-week highs vs lows")
+    st.bar_chart(breadth[["new_highs", "new_lows"]], height=220)
+
+sector_stats = load_sector_stats(data_version(DB_PATH))
+if not sector_stats.empty:
+    st.markdown(f"#### Sectors ({sector_stats['date'].iloc[0]})")
+    st.dataframe(sector_stats.drop(columns="date").round(2).sort_values("pct_above_sma50", ascending=False),
+                 width="stretch")
+
+with st.expander("Daily table"):
+    st.dataframe(breadth.iloc[::-1].round(1), width="stretch")
+
+st.sidebar.caption(f"⏱ breadth {compute_s:.2f}s · page {time.perf_counter() - T_START:.2f}s · "
+                   f"{len(breadth)} days")
@@ -0,0 +1,64 @@
+# Similar.py — tickers whose recent volume / price pattern looks most like a chosen one
+# The z-normalized window matrix (similarity.py) is built once per data version
+# and window length and shared by every session; a query is one matrix-vector
+# product, so changing ticker, window or k reruns in milliseconds.
+
+import time
+T_START = time.perf_counter()
+
+import pandas as pd
+import streamlit as st
+
+import sectors
+from panel import data_version
+from similarity import shared_index
+
+st.set_page_config(layout="wide", page_title="USA Similar Patterns", page_icon="🧬")
+DB_PATH = "usa_data.db"
+WINDOWS = [10, 20, 40, 60]
+FIELD_SETS = {"Volume + price": ("volume", "close"), "Volume only": ("volume",), "Price only": ("close",)}
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def sector_lookup(version: str):
+    return {t: s for s in sectors.list_sectors(DB_PATH) for t in sectors.tickers_in(s, DB_PATH)}
+
+
+# ---------------- Sidebar ----------------
+st.sidebar.header("🧬 Similar patterns")
+window = st.sidebar.select_slider("Window (bars)", WINDOWS, value=20)
+fields = FIELD_SETS[st.sidebar.radio("Compare", list(FIELD_SETS))]
+history = st.sidebar.toggle("Search past windows too", value=False,
+                            help="Also match against every ticker's earlier windows (last ~year)")
+k = st.sidebar.slider("Matches", 5, 50, 15)
+
+t0 = time.perf_counter()
+with st.spinner("Building similarity index…"):
+    index = shared_index(window, fields, DB_PATH)
+build_s = time.perf_counter() - t0
+if not len(index):
+    st.error("No data in usa_data.db. Run: python usadb.py build"); st.stop()
+
+choices = sorted(index.tickers[index.latest_ok])
+ticker = st.sidebar.selectbox("Ticker", choices, index=choices.index("NVDA") if "NVDA" in choices else 0)
+
+t0 = time.perf_counter()
+hits = index.query(ticker, k=k, history=history)
+query_s = time.perf_counter() - t0
+
+# ---------------- Results ----------------
+st.markdown(f"## 🧬 Most like {ticker} — last {window} bars to {pd.Timestamp(index.latest_end):%Y-%m-%d}")
+table = hits.copy()
+table["sector"] = table.index.map(sector_lookup(data_version(DB_PATH)))
+st.dataframe(table.round(3), width="stretch")
+
+top = list(hits.index[:5])
+if top:
+    for f in fields:
+        st.markdown(f"#### {'Log volume' if f == 'volume' else 'Close'} (z-score in window)")
+        lines = {ticker: index.pattern(ticker)[f]}
+        lines.update({t: index.pattern(t, hits.at[t, "window_end"])[f] for t in top})
+        st.line_chart(pd.DataFrame(lines), height=240)
+
+st.sidebar.caption(f"⏱ index {build_s:.2f}s ({len(index)} tickers, {index.nbytes / 1e6:.1f} MB) · "
+                   f"query {query_s * 1000:.1f}ms · page {time.perf_counter() - T_START:.2f}s")
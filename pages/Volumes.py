@@ -1,33 +1,40 @@
 # Volumes.py — Full working SMA-only screener with scrollable mplfinance chart (PNG-scroll)
 # App icon set to "✅"
-# Requirements: pandas, numpy, yfinance, streamlit, mplfinance, matplotlib, ta
+# Requirements: pandas, numpy, streamlit, mplfinance, matplotlib, ta
+# Data is refreshed by scheduler.py; this page never downloads on the request path.
+# matplotlib / mplfinance / ta are imported inside the sections that draw or compute
+# with them, so the sidebar and lists come up before those libraries load
+# (python profile_pages.py shows the import profile).
+
+import time
+T_START = time.perf_counter()  # time-to-first-chart / time-to-interactive are measured from here
 
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+import os
 import sqlite3
 import datetime as dt
 from datetime import timedelta
 from typing import Optional
 import io
 
-import numpy as np
 import pandas as pd
-import yfinance as yf
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import mplfinance as mpf
-import ta
 
-from matplotlib.lines import Line2D
-from mplfinance import make_marketcolors, make_mpf_style
+import market_calendar
+import scheduler
+import sectors
+import zones
+from panel import shared_panel, data_version
+from screener import Screen, RuleError
 
 # ---------------- Streamlit config (icon = checkmark) ----------------
 st.set_page_config(layout="wide", page_title="USA Volume Screener", page_icon="✅")
 DB_PATH = "usa_data.db"
 
-# ---------------- DB init ----------------
+# ---------------- DB init (once per process, not per rerun) ----------------
+@st.cache_resource(show_spinner=False)
 def init_db():
     conn = sqlite3.connect(DB_PATH)
     conn.execute("""
@@ -44,311 +51,90 @@ def init_db():
     """)
     conn.commit()
     conn.close()
+    return True
 
 init_db()
 
 # ---------------- Load tickers from usastocks.txt ----------------
+@st.cache_data(show_spinner=False)
+def read_ticker_file(path: str, mtime: float):
+    # mtime is only part of the cache key: re-read when universe.py rewrites the file
+    with open(path, "r") as f:
+        tickers = [line.strip().upper() for line in f.readlines()]
+    return list(dict.fromkeys(t for t in tickers if t))
+
 def load_ticker_list(path="usastocks.txt"):
     try:
-        with open(path, "r") as f:
-            tickers = [line.strip().upper() for line in f.readlines()]
-        tickers = [t for t in tickers if t]
-        return list(dict.fromkeys(tickers))
+        return read_ticker_file(path, os.path.getmtime(path))
     except Exception:
         st.error("❌ usastocks.txt not found or unreadable. Please add the file in project folder.")
         return []
 
 tickers = load_ticker_list()
 st.sidebar.info(f"Loaded {len(tickers)} tickers")
+timings_box = st.sidebar.empty()
 
 # ---------------- DB Helpers ----------------
-def clean_for_yahoo(ticker: str) -> str:
-    return ticker.replace(".", "-")
-
-def upsert_rows(ticker: str, df: pd.DataFrame):
-    if df.empty:
-        return
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    for _, r in df.iterrows():
-        cur.execute("""
-            INSERT OR REPLACE INTO stock_data
-            (ticker, date, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (ticker, str(r["date"]), float(r["open"]), float(r["high"]),
-              float(r["low"]), float(r["close"]), float(r["volume"])))
-    conn.commit()
-    conn.close()
-
-def max_date_in_db(ticker: str) -> Optional[str]:
-    conn = sqlite3.connect(DB_PATH)
-    row = conn.execute("SELECT MAX(date) FROM stock_data WHERE ticker=?", (ticker,)).fetchone()
-    conn.close()
-    return row[0] if row and row[0] else None
-
-def fetch_latest_1d_from_yf(ticker: str, start_date: Optional[str]):
-    try:
-        yf_ticker = clean_for_yahoo(ticker)
-        if start_date:
-            start = (pd.to_datetime(start_date) - pd.Timedelta(days=3)).strftime("%Y-%m-%d")
-            raw = yf.download(yf_ticker, start=start, interval="1d", progress=False, auto_adjust=False)
-        else:
-            raw = yf.download(yf_ticker, period="1y", interval="1d", progress=False, auto_adjust=False)
-
-        if raw is None or raw.empty:
-            return pd.DataFrame()
-
-        df = raw.reset_index()
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        df.columns = [str(c).lower() for c in df.columns]
-        needed = ["date","open","high","low","close","volume"]
-        if not all(n in df.columns for n in needed):
-            return pd.DataFrame()
-        df = df[["date","open","high","low","close","volume"]].copy()
-        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
-        return df
-    except Exception:
-        return pd.DataFrame()
-
-def ensure_today_updated(ticker: str):
-    last = max_date_in_db(ticker)
-    df_new = fetch_latest_1d_from_yf(ticker, last)
-    if df_new.empty:
-        return
-    if last:
-        df_new = df_new[df_new["date"] > last]
-    if not df_new.empty:
-        upsert_rows(ticker, df_new)
-
-def load_from_db(ticker: str, days: int = 365) -> pd.DataFrame:
-    conn = sqlite3.connect(DB_PATH)
-    since = (dt.date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
-    df = pd.read_sql_query("""
-        SELECT date, open, high, low, close, volume
-        FROM stock_data
-        WHERE ticker=? AND date>=?
-        ORDER BY date
-    """, conn, params=(ticker, since))
-    conn.close()
-    if df.empty:
+HOT_LOOKBACK = 365  # longest daily window served from the shared (hot-tier) panel
+MAX_CANDLES = 400
+MIN_INDICATOR_BARS = 30  # ta's ATR / ADX need more bars than their 14-bar window
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def history_bars(ticker: str, freq: str, version: str) -> pd.DataFrame:
+    # whole stored history (hot + archive tier) resampled locally; version is only part of the cache key
+    from resample import daily_history, resample_bars
+    return resample_bars(daily_history(ticker, DB_PATH), freq)
+
+def load_from_db(ticker: str, days: Optional[int] = 365, freq: str = "D",
+                 as_of: Optional[str] = None) -> pd.DataFrame:
+    # up to 1y of daily bars: zero-copy view into the process-wide panel, whose
+    # stored history doubles as SMA warm-up; longer windows and weekly /
+    # monthly bars come from history_bars(). as_of ends the window on a past
+    # session (bars after it are dropped before resampling). Only the lookback window is returned
+    if freq == "D" and days and days <= HOT_LOOKBACK and not as_of:
+        bars = shared_panel(DB_PATH).view(ticker)
+        if bars["close"].isna().any():
+            bars = bars.dropna(how="all")
+    elif as_of:
+        from resample import resample_bars
+        bars = resample_bars(history_bars(ticker, "D", data_version(DB_PATH)).loc[:as_of], freq)
+    else:
+        bars = history_bars(ticker, freq, data_version(DB_PATH))
+    if bars.empty:
         return pd.DataFrame()
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.set_index("date").sort_index()
-
-    # price SMAs
-    df["sma20"] = df["close"].rolling(20).mean()
-    df["sma50"] = df["close"].rolling(50).mean()
-    df["sma200"] = df["close"].rolling(200).mean()
-    # volume SMAs
-    df["vol20"] = df["volume"].rolling(20).mean()
-    df["vol50"] = df["volume"].rolling(50).mean()
-    df["vol200"] = df["volume"].rolling(200).mean()
-    df["inst_level"] = 1.8 * df["vol50"]
-    df["bull_zone"] = df["vol50"] > df["vol20"]
-
-    # dropna because SMA200 needs 200 rows to exist
-    return df.dropna()
-
-# ---------------- Sidebar / scanning ----------------
-period = st.sidebar.selectbox("Chart Lookback", ["3mo","6mo","1y"], index=2)
-days_lookup = {"3mo":90, "6mo":180, "1y":365}
-days_lookback = days_lookup[period]
-
-want_rescan = st.sidebar.button("🔁 Update today's bar for ALL stocks")
-
-status = st.info(f"Scanning {len(tickers)} tickers...")
-progress = st.progress(0)
-
-bulls, bears = [], []
-for i, t in enumerate(tickers, start=1):
-    try:
-        if want_rescan:
-            ensure_today_updated(t)
-        d = load_from_db(t, days_lookback)
-        if not d.empty:
-            (bulls if d["bull_zone"].iloc[-1] else bears).append(t)
-    except Exception:
-        pass
-    progress.progress(i / len(tickers))
-
-progress.empty(); status.empty()
-
-st.sidebar.markdown(f"### 🟢 Bull Zone ({len(bulls)})")
-bull_sel = st.sidebar.selectbox("Select Bull Stock", [""] + bulls)
-st.sidebar.markdown(f"### 🔴 Bear Zone ({len(bears)})")
-bear_sel = st.sidebar.selectbox("Select Bear Stock", [""] + bears)
-
-search_sel = st.selectbox("🔍 Search or Type Ticker", [""] + tickers)
-choice = bull_sel or bear_sel or search_sel
-if not choice:
-    st.info("Select a stock to view details."); st.stop()
-
-# Ensure DB up-to-date for selected ticker
-ensure_today_updated(choice)
-df = load_from_db(choice, days=days_lookback)
-if df.empty:
-    st.error(f"No data found for {choice}"); st.stop()
-
-st.markdown(f"## {choice} — {'🟢 BULL ZONE' if df['bull_zone'].iloc[-1] else '🔴 BEAR ZONE'}")
-
-# ---------------- Chart controls above the chart ----------------
-#st.markdown("### 🔍 Chart Controls (candle width, minor height)")
-col1, col2 = st.columns([1,1])
-with col1:
-    candle_width = st.slider("Candle width", 0.4, 1.2, 0.8, step=0.05)
-with col2:
-    chart_height_mult = st.slider("Chart height multiplier (visual)", 0.8, 4.0, 1.0, step=0.1)
-
-# ---------------- Prepare data for plotting ----------------
-df_mpf = df[["open","high","low","close","volume"]].copy()
-df_mpf.index.name = "Date"
-
-# Manual volume bar colors (green if close>=open)
-vol_bar_colors = ["green" if df["close"].iloc[i] >= df["open"].iloc[i] else "red" for i in range(len(df))]
-
-# ----- Corrected fill_between configuration (use .values) -----
-fill_cfg = [
-    dict(
-        panel=0,
-        y1=df["sma20"].values,
-        y2=df["sma50"].values,
-        where=(df["sma20"].values >= df["sma50"].values),
-        color="green",
-        alpha=0.12,
-    ),
-    dict(
-        panel=0,
-        y1=df["sma20"].values,
-        y2=df["sma50"].values,
-        where=(df["sma20"].values < df["sma50"].values),
-        color="red",
-        alpha=0.12,
-    ),
-    dict(
-        panel=1,
-        y1=df["vol20"].values,
-        y2=df["vol50"].values,
-        where=(df["vol20"].values >= df["vol50"].values),
-        color="green",
-        alpha=0.15,
-    ),
-    dict(
-        panel=1,
-        y1=df["vol20"].values,
-        y2=df["vol50"].values,
-        where=(df["vol20"].values < df["vol50"].values),
-        color="red",
-        alpha=0.15,
-    ),
-]
-
-# price SMAs and volume SMAs & inst line as addplots
-apds = [
-    mpf.make_addplot(df["sma20"], panel=0, color="blue", width=1.2),
-    mpf.make_addplot(df["sma50"], panel=0, color="red", width=1.2),
-    mpf.make_addplot(df["sma200"], panel=0, color="green", width=1.4),
-
-    mpf.make_addplot(df["vol20"], panel=1, color="blue", width=1.0),
-    mpf.make_addplot(df["vol50"], panel=1, color="red", width=1.0),
-    mpf.make_addplot(df["vol200"], panel=1, color="green", width=1.0),
-    mpf.make_addplot(df["inst_level"], panel=1, color="lime", linestyle="--", width=1.0),
-]
-
-# Manual colored volume bars as an addplot (type='bar')
-vol_bar_ap = mpf.make_addplot(df["volume"], type="bar", panel=1, color=vol_bar_colors, alpha=0.6)
-
-apds_final = [vol_bar_ap] + apds
-
-# style and market colors
-mc = make_marketcolors(up="green", down="red", inherit=True)
-style = make_mpf_style(marketcolors=mc, base_mpl_style="classic")
-
-# ---------------- Scrollable wide chart config ----------------
-fig_width_inches = 14
-fig_height_inches = 6 * chart_height_mult
-
-fig, axes = mpf.plot(
-    df_mpf,
-    type="candle",
-    style=style,
-    addplot=apds_final,
-    fill_between=fill_cfg,
-    volume=False,
-    panel_ratios=(4,4),           # kept as your value
-    figsize=(fig_width_inches, fig_height_inches),
-    returnfig=True,
-    tight_layout=True,
-    update_width_config=dict(candle_linewidth=0.8, candle_width=candle_width)
-)
-
-# Export to PNG (use 200 DPI as requested) and show via st.image inside scroll container
-png_buf = io.BytesIO()
-fig.savefig(png_buf, format="png", dpi=350, bbox_inches="tight")
-png_buf.seek(0)
-
-# Legend handles
-legend_handles = [
-    Line2D([0], [0], color="blue", lw=2),
-    Line2D([0], [0], color="red", lw=2),
-    Line2D([0], [0], color="green", lw=2),
-    Line2D([0], [0], color="lime", lw=2, linestyle="--"),
-]
-legend_labels = ["SMA20", "SMA50", "SMA200", "1.8× Institutional"]
-
-# ---------------- Scrollable container CSS & render (PNG) ----------------
-st.markdown("""
-<style>
-.scroll-x {
-    overflow-x: auto;
-    overflow-y: hidden;
-    white-space: nowrap;
-    padding-bottom: 8px;
-}
-.scroll-x img {
-    max-width: none !important;
-    height: auto;
-}
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown('<div class="scroll-x">', unsafe_allow_html=True)
-st.image(png_buf, width="content", caption=f"{choice} — Price + Volume")
-st.markdown('</div>', unsafe_allow_html=True)
-
-# show legend below PNG separately (matplotlib legend not needed because image includes it visually)
-st.markdown('<div style="text-align:center; margin-top:6px;">', unsafe_allow_html=True)
-for h, lab in zip(legend_handles, legend_labels):
-    # small inline legend
-    st.markdown(f"<span style='display:inline-block; margin:0 12px;'><svg width='18' height='8'><rect width='18' height='8' style='fill:{'blue' if lab=='SMA20' else 'red' if lab=='SMA50' else 'green' if lab=='SMA200' else 'lime'};'/></svg> {lab}</span>", unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-
-# ---------------- Standalone Volume Chart (matplotlib) ----------------
-st.markdown("### 📊 Standalone Volume Chart")
-fig2, ax2 = plt.subplots(figsize=(16, 5))
-
-bar_colors = ["green" if df["close"].iloc[i] >= df["open"].iloc[i] else "red" for i in range(len(df))]
-ax2.bar(df.index, df["volume"], color=bar_colors, alpha=0.6)
-ax2.plot(df.index, df["vol20"], color="blue", linewidth=2)
-ax2.plot(df.index, df["vol50"], color="red", linewidth=2)
-ax2.plot(df.index, df["vol200"], color="green", linewidth=2)
-ax2.plot(df.index, df["inst_level"], color="lime", linestyle="--", linewidth=1.4)
-
-green_zone = df["vol20"] > df["vol50"]
-ax2.fill_between(df.index, df["vol20"], df["vol50"], where=green_zone, color="green", alpha=0.15)
-ax2.fill_between(df.index, df["vol20"], df["vol50"], where=~green_zone, color="red", alpha=0.15)
-
-ax2.grid(alpha=0.3)
-ax2.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
-plt.setp(ax2.get_xticklabels(), rotation=25)
-ax2.legend(["Volume", "SMA20 Vol", "SMA50 Vol", "SMA200 Vol", "1.8× Institutional"], loc="upper center", bbox_to_anchor=(0.5, -0.15), ncol=5, frameon=False)
-
-st.pyplot(fig2, use_container_width=True)
-
-# ---------------- Indicators (last 5 days) ----------------
-st.markdown("### 🧮 Indicators (Last 5 Days)")
+    end = pd.Timestamp(as_of).date() if as_of else dt.date.today()
+    cutoff = pd.Timestamp(end - timedelta(days=days)) if days else bars.index[0]
+
+    close, volume = bars["close"], bars["volume"]
+    vol20, vol50 = volume.rolling(20).mean(), volume.rolling(50).mean()
+    df = pd.DataFrame({
+        # price SMAs
+        "sma20": close.rolling(20).mean(),
+        "sma50": close.rolling(50).mean(),
+        "sma200": close.rolling(200).mean(),
+        # volume SMAs
+        "vol20": vol20,
+        "vol50": vol50,
+        "vol200": volume.rolling(200).mean(),
+        "inst_level": 1.8 * vol50,
+        "bull_zone": vol50 > vol20,
+    })
+    keep = df.index >= cutoff
+    if freq == "D" and days:
+        # SMA200 needs 200 rows to exist; weekly / monthly / max show what there is
+        keep &= df.notna().all(axis=1).to_numpy()
+    return pd.concat([bars[keep], df[keep]], axis=1)
+
+def chart_points(df: pd.DataFrame) -> pd.DataFrame:
+    if len(df) <= MAX_CANDLES:
+        return df
+    from resample import reduce_points
+    bars = reduce_points(df[["open", "high", "low", "close", "volume"]], MAX_CANDLES, volume="mean")
+    return pd.concat([bars, df.loc[bars.index, df.columns[5:]]], axis=1)
 
 def compute_indicators(df):
+    import ta
+
     df = df.copy()
     df["RSI (14)"] = ta.momentum.RSIIndicator(df["close"], 14).rsi()
 
@@ -376,16 +162,374 @@ def compute_indicators(df):
 
     return df.tail(5).reset_index()
 
-st.dataframe(compute_indicators(df).round(2), use_container_width=True)
-
-# ---------------- Recent Volume Summary ----------------
-st.markdown("### 🔎 Recent Volume Summary (Last 5 Days)")
-summary = df[["volume","vol20","vol50","vol200","inst_level"]].tail(5)
-summary = summary.rename(columns={
-    "volume":"Volume",
-    "vol20":"SMA20 Volume",
-    "vol50":"SMA50 Volume",
-    "vol200":"SMA200 Volume",
-    "inst_level":"1.8× Institutional"
-})
-st.dataframe(summary.applymap(lambda x: f"{x/1e6:.2f}M"), use_container_width=True)
+
+# ---------------- Sidebar: lookback + refresh status (cheap) ----------------
+period = st.sidebar.selectbox("Chart Lookback", ["3mo","6mo","1y","2y","5y","max"], index=2)
+days_lookup = {"3mo":90, "6mo":180, "1y":365, "2y":730, "5y":1826, "max":None}
+days_lookback = days_lookup[period]
+bar_size = st.sidebar.radio("Bars", ["Daily", "Weekly", "Monthly"], horizontal=True)
+freq = bar_size[0]
+
+# ---------------- As of: replay chart, lists and screens on a past session ----------------
+# Screens are column slices of signal matrices memoized on the shared panel
+# (Screen.signals), so dragging this re-evaluates nothing per ticker.
+session_dates = [str(d) for d in shared_panel(DB_PATH).dates]
+as_of = None
+if len(session_dates) > 1:
+    as_of = st.sidebar.select_slider("📅 As of", session_dates, value=session_dates[-1])
+    as_of = None if as_of == session_dates[-1] else as_of
+
+refresh_status = scheduler.read_status()
+if refresh_status:
+    st.sidebar.caption(
+        f"Data refresh: **{refresh_status.get('state', '?')}** · "
+        f"last ok {refresh_status.get('last_success') or '—'} · "
+        f"next {refresh_status.get('next_run') or '—'}"
+    )
+    if refresh_status.get("state") == "error":
+        st.sidebar.warning(f"Last refresh failed: {refresh_status.get('last_error')}")
+else:
+    st.sidebar.caption("Data refresh: scheduler not running (python scheduler.py)")
+
+if st.sidebar.button("🔁 Request data refresh now"):
+    scheduler.request_refresh()
+    st.sidebar.success("Refresh requested; the scheduler picks it up within a minute.")
+
+live_on = st.sidebar.toggle("📡 Live intraday bar (market hours)", value=True)
+
+# ---------------- Selection state ----------------
+# Whichever box was touched last wins; the bull/bear boxes live in a fragment
+# rendered after the chart, so their callbacks also ask for a full rerun.
+if "choice" not in st.session_state:
+    st.session_state.choice = ""
+
+def pick(key: str, full_rerun: bool = False):
+    st.session_state.choice = st.session_state[key]
+    if full_rerun:
+        st.session_state.pending_rerun = True
+
+# ---------------- Live forming bar (market hours only) ----------------
+LIVE_SECONDS = 15
+
+@st.cache_resource(show_spinner=False)
+def live_poller():
+    # one asyncio poller per server process; tickers watched by several sessions are fetched once
+    from live import LivePoller
+    return LivePoller(poll_seconds=LIVE_SECONDS)
+
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "bare"
+
+@st.fragment(run_every=LIVE_SECONDS)
+def live_bar(choice: str, daily: pd.DataFrame):
+    now = market_calendar.now_ny()
+    if not market_calendar.is_market_open(now):
+        st.caption(f"📡 Market closed · live bar resumes {market_calendar.next_open(now):%a %Y-%m-%d %H:%M} ET")
+        return
+
+    poller = live_poller()
+    poller.watch(choice, session_id())
+    bars = poller.frame(choice)
+    bars = bars[bars.index.date == now.date()]
+    if bars.empty:
+        err = poller.stats()["errors"].get(choice)
+        st.caption(f"📡 Waiting for intraday bars for {choice}…" + (f" ({err})" if err else ""))
+        return
+
+    open_, close_ = market_calendar.session_open(now.date()), market_calendar.session_close(now.date())
+    elapsed = min(1.0, max(1 / 390, (now - open_) / (close_ - open_)))
+    day_vol = float(bars["volume"].sum())
+    projected = day_vol / elapsed
+    last, prev = float(bars["close"].iloc[-1]), float(daily["close"].iloc[-1])
+
+    # zone if today's projected volume were the next daily bar
+    vols = daily["volume"].to_numpy()
+    v20 = (vols[-19:].sum() + projected) / 20
+    v50 = (vols[-49:].sum() + projected) / 50
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Last", f"{last:.2f}", f"{(last / prev - 1) * 100:+.2f}%")
+    c2.metric("Volume so far", f"{day_vol / 1e6:.2f}M", f"{day_vol / (daily['vol50'].iloc[-1] * elapsed) - 1:+.0%} vs vol50 pace")
+    c3.metric("Projected day volume", f"{projected / 1e6:.2f}M")
+    c4.metric("Forming-bar zone", "🟢 BULL" if v50 > v20 else "🔴 BEAR")
+    st.line_chart(bars["volume"].cumsum().rename("cumulative volume"), height=140)
+    st.caption(f"📡 {len(bars)} one-minute bars · last {bars.index[-1]:%H:%M} ET · refreshes every {LIVE_SECONDS}s")
+
+
+# ---------------- Selected ticker: chart + indicators ----------------
+def render_ticker(choice: str):
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    import mplfinance as mpf
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
+    from mplfinance import make_marketcolors, make_mpf_style
+
+    df = load_from_db(choice, days=days_lookback, freq=freq, as_of=as_of)
+    if df.empty:
+        st.error(f"No data found for {choice}{f' as of {as_of}' if as_of else ''}"); return
+
+    st.markdown(f"## {choice} — {'🟢 BULL ZONE' if df['bull_zone'].iloc[-1] else '🔴 BEAR ZONE'}"
+                f"{f' (as of {as_of})' if as_of else ''}")
+    if live_on and freq == "D" and not as_of:
+        live_bar(choice, df)
+
+    # ---------------- Chart controls above the chart ----------------
+    #st.markdown("### 🔍 Chart Controls (candle width, minor height)")
+    col1, col2 = st.columns([1,1])
+    with col1:
+        candle_width = st.slider("Candle width", 0.4, 1.2, 0.8, step=0.05)
+    with col2:
+        chart_height_mult = st.slider("Chart height multiplier (visual)", 0.8, 4.0, 1.0, step=0.1)
+
+    # ---------------- Prepare data for plotting ----------------
+    # long lookbacks: runs of bars are merged so matplotlib draws at most MAX_CANDLES
+    plot = chart_points(df)
+    df_mpf = plot[["open","high","low","close","volume"]].copy()
+    df_mpf.index.name = "Date"
+
+    # Manual volume bar colors (green if close>=open)
+    vol_bar_colors = ["green" if plot["close"].iloc[i] >= plot["open"].iloc[i] else "red" for i in range(len(plot))]
+
+    # ----- Corrected fill_between configuration (use .values) -----
+    fill_cfg = [
+        dict(
+            panel=0,
+            y1=plot["sma20"].values,
+            y2=plot["sma50"].values,
+            where=(plot["sma20"].values >= plot["sma50"].values),
+            color="green",
+            alpha=0.12,
+        ),
+        dict(
+            panel=0,
+            y1=plot["sma20"].values,
+            y2=plot["sma50"].values,
+            where=(plot["sma20"].values < plot["sma50"].values),
+            color="red",
+            alpha=0.12,
+        ),
+        dict(
+            panel=1,
+            y1=plot["vol20"].values,
+            y2=plot["vol50"].values,
+            where=(plot["vol20"].values >= plot["vol50"].values),
+            color="green",
+            alpha=0.15,
+        ),
+        dict(
+            panel=1,
+            y1=plot["vol20"].values,
+            y2=plot["vol50"].values,
+            where=(plot["vol20"].values < plot["vol50"].values),
+            color="red",
+            alpha=0.15,
+        ),
+    ]
+
+    # price SMAs and volume SMAs & inst line as addplots
+    # (column, kwargs); weekly / monthly bars may not fill a 200-bar window yet, and
+    # mplfinance rejects an all-NaN addplot, so those lines are left out
+    lines = [
+        ("sma20", dict(panel=0, color="blue", width=1.2)),
+        ("sma50", dict(panel=0, color="red", width=1.2)),
+        ("sma200", dict(panel=0, color="green", width=1.4)),
+
+        ("vol20", dict(panel=1, color="blue", width=1.0)),
+        ("vol50", dict(panel=1, color="red", width=1.0)),
+        ("vol200", dict(panel=1, color="green", width=1.0)),
+        ("inst_level", dict(panel=1, color="lime", linestyle="--", width=1.0)),
+    ]
+    apds = [mpf.make_addplot(plot[col], **kw) for col, kw in lines if plot[col].notna().any()]
+
+    # Manual colored volume bars as an addplot (type='bar')
+    vol_bar_ap = mpf.make_addplot(plot["volume"], type="bar", panel=1, color=vol_bar_colors, alpha=0.6)
+
+    apds_final = [vol_bar_ap] + apds
+
+    # style and market colors
+    mc = make_marketcolors(up="green", down="red", inherit=True)
+    style = make_mpf_style(marketcolors=mc, base_mpl_style="classic")
+
+    # ---------------- Scrollable wide chart config ----------------
+    fig_width_inches = 14
+    fig_height_inches = 6 * chart_height_mult
+
+    fig, axes = mpf.plot(
+        df_mpf,
+        type="candle",
+        style=style,
+        addplot=apds_final,
+        fill_between=fill_cfg,
+        volume=False,
+        panel_ratios=(4,4),           # kept as your value
+        figsize=(fig_width_inches, fig_height_inches),
+        returnfig=True,
+        tight_layout=True,
+        update_width_config=dict(candle_linewidth=0.8, candle_width=candle_width)
+    )
+
+    # Export to PNG (use 200 DPI as requested) and show via st.image inside scroll container
+    png_buf = io.BytesIO()
+    fig.savefig(png_buf, format="png", dpi=350, bbox_inches="tight")
+    png_buf.seek(0)
+    plt.close(fig)  # mplfinance registers the figure with pyplot; don't leak one per rerun
+
+    # Legend handles
+    legend_handles = [
+        Line2D([0], [0], color="blue", lw=2),
+        Line2D([0], [0], color="red", lw=2),
+        Line2D([0], [0], color="green", lw=2),
+        Line2D([0], [0], color="lime", lw=2, linestyle="--"),
+    ]
+    legend_labels = ["SMA20", "SMA50", "SMA200", "1.8× Institutional"]
+
+    # ---------------- Scrollable container CSS & render (PNG) ----------------
+    st.markdown("""
+    <style>
+    .scroll-x {
+        overflow-x: auto;
+        overflow-y: hidden;
+        white-space: nowrap;
+        padding-bottom: 8px;
+    }
+    .scroll-x img {
+        max-width: none !important;
+        height: auto;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    st.markdown('<div class="scroll-x">', unsafe_allow_html=True)
+    st.image(png_buf, width="content", caption=f"{choice} — Price + Volume · {len(df)} {bar_size.lower()} bars"
+             + (f" drawn as {len(plot)} candles (volume per bar)" if len(plot) < len(df) else ""))
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.session_state.ttfc = time.perf_counter() - T_START
+
+    # show legend below PNG separately (matplotlib legend not needed because image includes it visually)
+    st.markdown('<div style="text-align:center; margin-top:6px;">', unsafe_allow_html=True)
+    for h, lab in zip(legend_handles, legend_labels):
+        # small inline legend
+        st.markdown(f"<span style='display:inline-block; margin:0 12px;'><svg width='18' height='8'><rect width='18' height='8' style='fill:{'blue' if lab=='SMA20' else 'red' if lab=='SMA50' else 'green' if lab=='SMA200' else 'lime'};'/></svg> {lab}</span>", unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # ---------------- Standalone Volume Chart (matplotlib) ----------------
+    st.markdown("### 📊 Standalone Volume Chart")
+    fig2 = Figure(figsize=(16, 5))
+    ax2 = fig2.subplots()
+
+    bar_colors = ["green" if plot["close"].iloc[i] >= plot["open"].iloc[i] else "red" for i in range(len(plot))]
+    ax2.bar(plot.index, plot["volume"], color=bar_colors, alpha=0.6)
+    ax2.plot(plot.index, plot["vol20"], color="blue", linewidth=2)
+    ax2.plot(plot.index, plot["vol50"], color="red", linewidth=2)
+    ax2.plot(plot.index, plot["vol200"], color="green", linewidth=2)
+    ax2.plot(plot.index, plot["inst_level"], color="lime", linestyle="--", linewidth=1.4)
+
+    green_zone = plot["vol20"] > plot["vol50"]
+    ax2.fill_between(plot.index, plot["vol20"], plot["vol50"], where=green_zone, color="green", alpha=0.15)
+    ax2.fill_between(plot.index, plot["vol20"], plot["vol50"], where=~green_zone, color="red", alpha=0.15)
+
+    ax2.grid(alpha=0.3)
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    ax2.tick_params(axis="x", labelrotation=25)
+    ax2.legend(["Volume", "SMA20 Vol", "SMA50 Vol", "SMA200 Vol", "1.8× Institutional"], loc="upper center", bbox_to_anchor=(0.5, -0.15), ncol=5, frameon=False)
+
+    st.pyplot(fig2, use_container_width=True)
+    st.markdown(f"### 🧮 Indicators (Last 5 {'Days' if freq == 'D' else bar_size[:-2] + 's'})")
+
+    if len(df) >= MIN_INDICATOR_BARS:
+        st.dataframe(compute_indicators(df).round(2), use_container_width=True)
+    else:
+        st.caption(f"Needs at least {MIN_INDICATOR_BARS} bars; pick a longer lookback.")
+
+    # ---------------- Recent Volume Summary ----------------
+    st.markdown("### 🔎 Recent Volume Summary (Last 5 Days)")
+    summary = df[["volume","vol20","vol50","vol200","inst_level"]].tail(5)
+    summary = summary.rename(columns={
+        "volume":"Volume",
+        "vol20":"SMA20 Volume",
+        "vol50":"SMA50 Volume",
+        "vol200":"SMA200 Volume",
+        "inst_level":"1.8× Institutional"
+    })
+    st.dataframe(summary.applymap(lambda x: f"{x/1e6:.2f}M"), use_container_width=True)
+
+
+# ---------------- Main: search box, then the chart ----------------
+st.selectbox("🔍 Search or Type Ticker", [""] + tickers, key="search_sel",
+             on_change=pick, args=("search_sel",))
+
+if st.session_state.choice:
+    render_ticker(st.session_state.choice)
+else:
+    st.info("Select a stock to view details.")
+
+# ---------------- Sidebar lists: filled after the chart is on screen ----------------
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_screen(rule: str, rank: Optional[str], version: str, sector: Optional[str] = None,
+               as_of: Optional[str] = None) -> pd.DataFrame:
+    # version is only part of the cache key: results follow the shared panel
+    members = sectors.tickers_in(sector, DB_PATH) if sector else None
+    return Screen(rule, rank=rank).run(shared_panel(DB_PATH), day=as_of or -1, tickers=members)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def screen_counts(rule: str, version: str) -> pd.DataFrame:
+    return Screen(rule).counts(shared_panel(DB_PATH))
+
+@st.fragment
+def zone_lists():
+    # one vectorized pass over the whole universe instead of a per-ticker loop
+    version = data_version(DB_PATH)
+    scan = run_screen("vol50 > vol20", None, version, None, as_of)
+    universe = set(tickers)
+    bulls = [t for t in scan.index[scan["match"]] if t in universe]
+    bears = [t for t in scan.index[~scan["match"]] if t in universe]
+
+    if as_of:
+        st.caption(f"📅 Lists and screens as of {as_of}")
+    st.markdown(f"### 🟢 Bull Zone ({len(bulls)})")
+    st.selectbox("Select Bull Stock", [""] + bulls, key="bull_sel",
+                 on_change=pick, args=("bull_sel", True))
+    st.markdown(f"### 🔴 Bear Zone ({len(bears)})")
+    st.selectbox("Select Bear Stock", [""] + bears, key="bear_sel",
+                 on_change=pick, args=("bear_sel", True))
+
+    flips = zones.latest_flips(DB_PATH, as_of)
+    if flips:
+        with st.expander(f"🔀 Zone flips on {flips[0][1]} ({len(flips)})"):
+            for t, _, frm, to in flips:
+                st.markdown(f"{'🟢' if to == 'bull' else '🔴'} **{t}** {frm} → {to}")
+
+    with st.expander("📈 Bull zone count by day"):
+        st.line_chart(screen_counts("vol50 > vol20", version)["matches"].loc[:as_of], height=160)
+
+    with st.expander("🧪 Custom screen"):
+        rule = st.text_input("Rule", "close > sma200 AND rsi14 < 30 AND volume > 1.8*vol50")
+        rank = st.text_input("Rank by (optional)", "volume / vol50")
+        sector = st.selectbox("Sector", ["All"] + sectors.list_sectors(DB_PATH))
+        try:
+            hits = run_screen(rule, rank or None, version, None if sector == "All" else sector, as_of)
+            hits = hits[hits["match"]].drop(columns="match")
+            st.caption(f"{len(hits)} matches")
+            st.dataframe(hits.round(2), use_container_width=True)
+        except RuleError as e:
+            st.error(f"Rule error: {e}")
+
+    if st.session_state.pop("pending_rerun", False):
+        st.rerun()
+
+with st.sidebar:
+    zone_lists()
+
+# ---------------- Timings (this run) ----------------
+tti = time.perf_counter() - T_START
+ttfc = st.session_state.pop("ttfc", None)
+timings_box.caption(
+    f"⏱ first chart {ttfc:.2f}s · interactive {tti:.2f}s" if ttfc is not None
+    else f"⏱ interactive {tti:.2f}s"
+)
+_panel = shared_panel(DB_PATH)
+st.sidebar.caption(f"Shared panel: {len(_panel)} tickers × {_panel.shape[1]} days, "
+                   f"{_panel.nbytes / 1e6:.0f} MB per process")
@@ -0,0 +1,88 @@
+# Watchlist.py — small-multiples grid of mini volume-cross charts (20–50 tickers at once)
+# Tiles are rendered with object-oriented Agg figures on a worker pool and cached
+# per (ticker, last bar date, data version), so a warm grid is just cached PNG bytes.
+
+import time
+T_START = time.perf_counter()
+
+import streamlit as st
+
+import sectors
+from panel import shared_panel, data_version
+from screener import Screen, RuleError
+from tiles import TileCache, render_grid
+
+st.set_page_config(layout="wide", page_title="USA Watchlist Grid", page_icon="🧩")
+DB_PATH = "usa_data.db"
+MAX_TILES_SHOWN = 50
+
+
+@st.cache_resource
+def tile_cache():
+    # shared by every session; keys carry the last bar date and data version, so no TTL needed
+    return TileCache()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def screen_tickers(rule: str, rank: str, version: str, sector: str = None):
+    members = sectors.tickers_in(sector, DB_PATH) if sector else None
+    hits = Screen(rule, rank=rank or None).matches(shared_panel(DB_PATH), tickers=members)
+    return list(hits.index)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def sector_names(version: str):
+    return sectors.list_sectors(DB_PATH)
+
+
+# ---------------- Sidebar: what to show ----------------
+st.sidebar.header("🧩 Watchlist")
+source = st.sidebar.radio("Tickers", ["Bull zone", "Screen rule", "Custom list"])
+if source == "Bull zone":
+    rule, rank = "vol50 > vol20", "vol50 / vol20"
+elif source == "Screen rule":
+    rule = st.sidebar.text_input("Rule", "volume > 1.8*vol50")
+    rank = st.sidebar.text_input("Rank by", "volume / vol50")
+else:
+    rule = rank = None
+    custom = st.sidebar.text_area("Tickers (space or newline separated)", "AAPL MSFT NVDA AMZN META GOOGL")
+sector = None
+if rule and sector_names(data_version(DB_PATH)):
+    sector = st.sidebar.selectbox("Sector", ["All"] + sector_names(data_version(DB_PATH)))
+    sector = None if sector == "All" else sector
+
+limit = st.sidebar.slider("Max tiles", 4, MAX_TILES_SHOWN, 30, step=2)
+n_cols = st.sidebar.slider("Columns", 2, 8, 5)
+
+try:
+    wanted = screen_tickers(rule, rank, data_version(DB_PATH), sector) if rule else [t.strip().upper() for t in custom.split() if t.strip()]
+except RuleError as e:
+    st.error(f"Rule error: {e}"); st.stop()
+wanted = list(dict.fromkeys(wanted))[:limit]
+
+panel = shared_panel(DB_PATH)
+frames = [(t, panel.view(t) if t in panel.ticker_index else None) for t in wanted]
+missing = [t for t, df in frames if df is None]
+
+# ---------------- Render grid ----------------
+cache = tile_cache()
+hits_before = cache.hits
+t0 = time.perf_counter()
+pngs = render_grid(frames, cache, version=panel.version)
+render_s = time.perf_counter() - t0
+
+st.markdown(f"## 🧩 {source}{f' · {sector}' if sector else ''} — {len(pngs)} tickers")
+tickers_shown = [t for t in wanted if pngs.get(t)]
+for row_start in range(0, len(tickers_shown), n_cols):
+    cols = st.columns(n_cols)
+    for col, t in zip(cols, tickers_shown[row_start:row_start + n_cols]):
+        col.image(pngs[t], width="stretch")
+
+if missing:
+    st.caption(f"No data for: {', '.join(missing)}")
+
+st.sidebar.caption(
+    f"⏱ tiles {render_s:.2f}s ({cache.hits - hits_before}/{len(pngs)} cached) · "
+    f"page {time.perf_counter() - T_START:.2f}s · cache {len(cache)} tiles, "
+    f"{cache.nbytes / 1e6:.1f} MB"
+)
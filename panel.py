@@ -0,0 +1,209 @@
+# panel.py
+"""
+Dense market panel loaded from usa_data.db in one query.
+
+values has shape (tickers, dates, fields) with NaN where a ticker has no
+bar; field("close") etc. give (tickers, dates) views for vectorized work
+(screener, backtests, breadth) instead of one load_from_db() per ticker.
+
+shared_panel() keeps one read-only Panel per process and data version, so
+every Streamlit session (and rerun) reads the same arrays; view(ticker)
+hands out per-ticker DataFrames backed by those arrays without copying.
+
+stock_data holds raw prices; adjust="split" / "total" applies the factors
+in corporate_actions at read time (see corporate_actions.py). The shared
+adjusted panel is derived from the shared raw one and cached alongside it.
+
+Bars older than the hot window live in usa_archive.db (retention.py);
+load_panel() reads across both tiers when the window asks for them, while
+shared_panel() stays on the hot table. Both open the DB read-only and raise
+StoreMissing when it has not been built, instead of creating an empty file.
+"""
+
+import os
+import threading
+import datetime as dt
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import corporate_actions
+import retention
+
+DB_PATH = "usa_data.db"
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class StoreMissing(LookupError):
+    """usa_data.db (or its stock_data table) does not exist yet: run usadb.py build."""
+
+
+class Panel:
+    def __init__(self, tickers, dates, values):
+        self.tickers = list(tickers)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.values = values
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        self.cache = {}  # derived (tickers, dates) arrays, see screener.field()
+        self.version = None
+        self.adjust = None
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def field(self, name):
+        return self.values[:, :, FIELDS.index(name)]
+
+    def frame(self, ticker):
+        """One ticker as a date-indexed OHLCV DataFrame (rows without a bar dropped)."""
+        i = self.ticker_index[ticker]
+        df = pd.DataFrame(self.values[i], index=pd.DatetimeIndex(self.dates, name="date"),
+                          columns=FIELDS)
+        return df.dropna(how="all")
+
+    def view(self, ticker, start=None):
+        """
+        Zero-copy DataFrame over one ticker's rows, from its first to its last
+        bar (or from `start`). Read-only when the panel is shared; interior gaps
+        stay as NaN rows.
+        """
+        i = self.ticker_index.get(ticker)
+        if i is None:
+            return pd.DataFrame(columns=FIELDS)
+        have = np.flatnonzero(~np.isnan(self.values[i, :, FIELDS.index("close")]))
+        if not len(have):
+            return pd.DataFrame(columns=FIELDS)
+        a, b = int(have[0]), int(have[-1]) + 1
+        if start is not None:
+            a = max(a, int(np.searchsorted(self.dates, np.datetime64(start, "D"))))
+        return pd.DataFrame(self.values[i, a:b], columns=FIELDS, copy=False,
+                            index=pd.DatetimeIndex(self.dates[a:b], name="date"))
+
+    def freeze(self):
+        self.values.flags.writeable = False
+        self.dates.flags.writeable = False
+        return self
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes
+
+    def adjusted(self, actions, mode="split"):
+        """New Panel with corporate-action factors applied (self is unchanged)."""
+        values = corporate_actions.adjust_values(self.tickers, self.dates, self.values,
+                                                 actions, mode)
+        out = Panel(self.tickers, self.dates, values)
+        out.adjust = mode
+        return out
+
+
+def load_panel(db_path=DB_PATH, days=None, tickers=None, adjust=None, archive=None):
+    """
+    Load stock_data (optionally the last `days` calendar days / a ticker
+    subset) into a Panel; adjust is None (raw), "split" or "total".
+    archive=None reads the archive tier too when the window starts before
+    the hot table (or days is None and an archive exists); True / False
+    force it on / off.
+    """
+    since = (dt.date.today() - timedelta(days=days)).strftime("%Y-%m-%d") if days else None
+    archive_path = os.path.join(os.path.dirname(db_path), retention.ARCHIVE_PATH)
+    if archive is None:
+        archive = retention.needs_archive(db_path, since, archive_path)
+
+    table = "all_bars" if archive else "stock_data"
+    sql = f"SELECT ticker, date, open, high, low, close, volume FROM {table}"
+    where, params = [], []
+    if since:
+        where.append("date >= ?")
+        params.append(since)
+    if tickers:
+        where.append(f"ticker IN ({','.join('?' * len(tickers))})")
+        params.extend(tickers)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    # read-only: a reader must not create an empty store
+    conn = retention.connect(db_path, archive=archive, archive_path=archive_path, read_only=True)
+    if conn is None:
+        raise StoreMissing(f"{db_path} does not exist")
+    try:
+        if not retention.has_table(conn, "stock_data"):
+            raise StoreMissing(f"{db_path} has no stock_data table")
+        df = pd.read_sql_query(sql, conn, params=params)
+        actions = corporate_actions.load_actions(conn, tickers) if adjust else []
+    finally:
+        conn.close()
+
+    if df.empty:
+        return Panel([], np.array([], dtype="datetime64[D]"), np.empty((0, 0, len(FIELDS))))
+
+    t_codes, t_uniques = pd.factorize(df["ticker"], sort=True)
+    days_ = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+    d_codes, d_uniques = pd.factorize(days_, sort=True)
+
+    values = np.full((len(t_uniques), len(d_uniques), len(FIELDS)), np.nan)
+    values[t_codes, d_codes] = df[FIELDS].to_numpy(dtype="float64")
+    panel = Panel(t_uniques, d_uniques, values)
+    return panel.adjusted(actions, adjust) if adjust else panel
+
+
+# --------------------------
+# PROCESS-WIDE SHARED PANEL
+# --------------------------
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def data_version(db_path=DB_PATH):
+    """Cheap fingerprint that changes whenever the DB (or its WAL) is written."""
+    parts = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return "/".join(parts)
+
+
+def shared_panel(db_path=DB_PATH, adjust="split"):
+    """
+    The whole hot stock_data table as one read-only Panel, loaded once per data
+    version and shared by every caller in the process. The previous version
+    is dropped as soon as a new one is loaded. Adjusted panels are built
+    lazily from the raw one, the first time a mode is asked for.
+    """
+    version = data_version(db_path)
+    key = (db_path, adjust)
+    entry = _shared.get(key)
+    if entry and entry[0] == version:
+        return entry[1]
+    with _shared_lock:
+        entry = _shared.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+        raw = _shared.get((db_path, None))
+        if not raw or raw[0] != version:
+            panel = load_panel(db_path, archive=False).freeze()
+            panel.version = version
+            raw = _shared[(db_path, None)] = (version, panel)
+            for k in [k for k in _shared if k[0] == db_path and k[1] is not None]:
+                del _shared[k]  # adjusted panels of the old version
+        if adjust is None:
+            return raw[1]
+        conn = retention.open_read_only(db_path)
+        if conn is None:
+            raise StoreMissing(f"{db_path} does not exist")
+        try:
+            actions = corporate_actions.load_actions(conn)
+        finally:
+            conn.close()
+        panel = raw[1].adjusted(actions, adjust).freeze()
+        panel.version = version
+        _shared[key] = (version, panel)
+        return panel
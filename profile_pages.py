@@ -0,0 +1,77 @@
+# profile_pages.py
+"""
+Import-time profile of the Streamlit pages.
+
+Each page runs once in a fresh interpreter under `python -X importtime`
+(Streamlit bare mode: st.* calls are no-ops, so only module-level work
+counts) from the directory that holds usa_data.db. Reports the page's
+wall time, the cumulative import time and the heaviest top-level imports,
+best of --runs runs (timings on a busy machine are noisy).
+
+Usage: python profile_pages.py [page.py ...] [--runs N] [--top N] [--cwd DIR]
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+# usa_streamlit_viewer.py is a separate app that downloads at load; pass it explicitly
+PAGES = ["Home.py", "pages/Volumes.py", "pages/Watchlist.py", "pages/Breadth.py", "pages/Similar.py"]
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+RUNNER = (
+    "import sys, time, runpy, warnings, logging; warnings.simplefilter('ignore'); "
+    "logging.disable(logging.WARNING); sys.path.insert(0, {root!r}); t = time.perf_counter(); "
+    "runpy.run_path({page!r}, run_name='__main__'); "
+    "print('__WALL__', time.perf_counter() - t, file=sys.stderr)"
+)
+
+
+def profile(page, cwd=None):
+    root = os.path.dirname(os.path.abspath(__file__))
+    page = os.path.join(root, page)
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", RUNNER.format(root=root, page=page)],
+                          cwd=cwd or root, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+
+    top, script = [], None
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m and len(m.group(3)) == 1:  # top-level imports only
+            top.append((int(m.group(2)) / 1e6, m.group(4)))
+        elif line.startswith("__WALL__"):
+            script = float(line.split()[1])
+    return {
+        "page": os.path.relpath(page, root),
+        "ok": proc.returncode == 0,
+        "process_s": wall,
+        "script_s": script,
+        "imports_s": sum(s for s, _ in top),
+        "top": sorted(top, reverse=True),
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    pages = [a for a in argv if a.endswith(".py")] or PAGES
+    n_top = int(argv[argv.index("--top") + 1]) if "--top" in argv else 6
+    runs = int(argv[argv.index("--runs") + 1]) if "--runs" in argv else 3
+    cwd = argv[argv.index("--cwd") + 1] if "--cwd" in argv else None
+
+    for page in pages:
+        r = min((profile(page, cwd) for _ in range(runs)), key=lambda r: r["process_s"])
+        if not r["ok"]:
+            print(f"[ERR] {r['page']}: {r['error']}")
+            continue
+        print(f"📄 {r['page']}: process {r['process_s']:.2f}s · page script "
+              f"{r['script_s']:.2f}s · imports {r['imports_s']:.2f}s")
+        for secs, name in r["top"][:n_top]:
+            print(f"     {secs:6.3f}s  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# rawcache.py
+"""
+Raw provider response cache
+---------------------------
+✔ Every successful download is kept as the provider returned it, before
+  normalization: Yahoo chart JSON (async engine) or the yfinance frame
+  (thread engine, pickled)
+✔ Content-addressed: bodies are zlib-compressed under objects/<sha256>, so
+  an unchanged response is stored once however often it is fetched
+✔ index.db maps (ticker, range, interval) -> latest body, with fetched_at;
+  entries older than CACHE_TTL are ignored and removed by prune()
+✔ replay() re-runs normalization from the cache and yields the pipeline's
+  (ticker, dates, ohlcv, actions, err) tuples, so a fixed normalizer can be
+  re-ingested with no network (refresh_db.ENGINE = "cache",
+  python usadb.py reingest)
+Live refreshes only write here; nothing on the download path reads it.
+Usage: python rawcache.py [--prune]
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+CACHE_DIR = Path(".raw_cache")
+CACHE_TTL = 14 * 24 * 3600   # seconds a raw response stays replayable
+LEVEL = 6                    # zlib level
+INTERVAL = "1d"
+
+
+# --------------------------
+# KEYS
+# --------------------------
+def span_key(start=None, end=None, period="1y"):
+    """The range part of a cache key: the period ("1y") or "start..end" (end may be open)."""
+    return f"{start}..{end or ''}" if start else period
+
+
+def _object_path(sha, cache_dir):
+    return Path(cache_dir) / "objects" / sha[:2] / sha
+
+
+def _connect(cache_dir):
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(Path(cache_dir) / "index.db", timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")  # I/O threads write while a replay reads
+    conn.execute("PRAGMA synchronous=NORMAL")  # a lost last entry only costs a re-download
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS raw_responses (
+            ticker TEXT,
+            range TEXT,
+            interval TEXT,
+            kind TEXT,
+            sha256 TEXT,
+            size INTEGER,
+            fetched_at REAL,
+            PRIMARY KEY (ticker, range, interval)
+        )
+    """)
+    return conn
+
+
+# --------------------------
+# WRITE / READ
+# --------------------------
+def put(ticker, range_, body, kind, interval=INTERVAL, cache_dir=CACHE_DIR):
+    """Store one raw response (bytes); returns its sha256. The body file is written once per content."""
+    sha = hashlib.sha256(body).hexdigest()
+    path = _object_path(sha, cache_dir)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{sha}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(zlib.compress(body, LEVEL))
+        os.replace(tmp, path)
+    conn = _connect(cache_dir)
+    try:
+        with conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO raw_responses (ticker, range, interval, kind, sha256, size, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (ticker, range_, interval, kind, sha, len(body), time.time()))
+    finally:
+        conn.close()
+    return sha
+
+
+def put_frame(ticker, range_, df, interval=INTERVAL, cache_dir=CACHE_DIR):
+    """Thread engine: the yfinance DataFrame exactly as downloaded."""
+    return put(ticker, range_, pickle.dumps(df, protocol=4), "yf-frame", interval, cache_dir)
+
+
+def load(sha, cache_dir=CACHE_DIR):
+    return zlib.decompress(_object_path(sha, cache_dir).read_bytes())
+
+
+def get(ticker, range_, interval=INTERVAL, ttl=CACHE_TTL, cache_dir=CACHE_DIR):
+    """(body, kind) of the cached response, or None when missing / older than ttl (None = any age)."""
+    conn = _connect(cache_dir)
+    try:
+        row = conn.execute("""
+            SELECT sha256, kind FROM raw_responses
+            WHERE ticker = ? AND range = ? AND interval = ? AND fetched_at >= ?
+        """, (ticker, range_, interval, time.time() - ttl if ttl else 0)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    try:
+        return load(row[0], cache_dir), row[1]
+    except (OSError, zlib.error):
+        return None
+
+
+def entries(tickers=None, interval=INTERVAL, ttl=CACHE_TTL, cache_dir=CACHE_DIR):
+    """[(ticker, range, kind, sha256, fetched_at), ...] within ttl, oldest fetch first."""
+    conn = _connect(cache_dir)
+    try:
+        rows = conn.execute("""
+            SELECT ticker, range, kind, sha256, fetched_at FROM raw_responses
+            WHERE interval = ? AND fetched_at >= ? ORDER BY ticker, fetched_at
+        """, (interval, time.time() - ttl if ttl else 0)).fetchall()
+    finally:
+        conn.close()
+    if tickers is not None:
+        wanted = set(tickers)
+        rows = [r for r in rows if r[0] in wanted]
+    return rows
+
+
+# --------------------------
+# REPLAY (re-normalize from cache)
+# --------------------------
+def normalize_body(ticker, body, kind):
+    """Raw body -> normalize.normalize_arrays() output, or None for an empty chart."""
+    if kind == "chart-json":
+        import json
+        from async_fetch import parse_daily
+        return parse_daily(ticker, json.loads(body))
+    if kind == "yf-frame":
+        import normalize
+        df = pickle.loads(body)
+        return normalize.normalize_arrays(ticker, *normalize.to_arrays(df)) if not df.empty else None
+    raise ValueError(f"unknown raw kind {kind!r}")
+
+
+def _merge(parts):
+    """Merge normalized (dates, ohlcv, actions) parts, oldest fetch first: later fetches win per date."""
+    import numpy as np
+
+    dates = np.concatenate([p[0] for p in parts])
+    ohlcv = np.concatenate([p[1] for p in parts])
+    order = np.argsort(dates, kind="stable")
+    dates, ohlcv = dates[order], ohlcv[order]
+    last = np.append(dates[1:] != dates[:-1], True)
+    actions = {(d, k): v for p in parts for d, k, v in p[2]}
+    return dates[last], np.ascontiguousarray(ohlcv[last]), [(d, k, v) for (d, k), v in sorted(actions.items())]
+
+
+def replay(tickers, interval=INTERVAL, ttl=CACHE_TTL, cache_dir=CACHE_DIR):
+    """
+    Yields refresh_db.run_pipeline's (ticker, dates, ohlcv, actions, err)
+    for each ticker from every cached response within ttl (full history
+    plus incremental ranges, merged). err starts with "CACHE" when nothing
+    is cached and "NORMALIZE" when a body still fails to normalize.
+    """
+    by_ticker = {}
+    for ticker, _, kind, sha, _ in entries(tickers, interval, ttl, cache_dir):
+        by_ticker.setdefault(ticker, []).append((kind, sha))
+
+    for ticker in tickers:
+        cached = by_ticker.get(ticker)
+        if not cached:
+            yield ticker, None, None, None, "CACHE: no raw response"
+            continue
+        parts = []
+        try:
+            for kind, sha in cached:
+                out = normalize_body(ticker, load(sha, cache_dir), kind)
+                if out is not None:
+                    parts.append(out[1:])
+        except (OSError, zlib.error) as e:
+            yield ticker, None, None, None, f"CACHE: {e!r}"
+            continue
+        except Exception as e:
+            yield ticker, None, None, None, f"NORMALIZE: {e!r}"
+            continue
+        if not parts:
+            yield ticker, None, None, None, "CACHE: only empty responses"
+            continue
+        yield (ticker,) + _merge(parts) + (None,)
+
+
+# --------------------------
+# MAINTENANCE
+# --------------------------
+def prune(ttl=CACHE_TTL, cache_dir=CACHE_DIR):
+    """Drop index rows older than ttl and every body no row references. Returns (rows, files) removed."""
+    if not (Path(cache_dir) / "index.db").exists():
+        return 0, 0
+    conn = _connect(cache_dir)
+    try:
+        with conn:
+            rows = conn.execute("DELETE FROM raw_responses WHERE fetched_at < ?",
+                                (time.time() - ttl,)).rowcount
+        live = {r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM raw_responses")}
+    finally:
+        conn.close()
+    files = 0
+    for path in (Path(cache_dir) / "objects").glob("*/*"):
+        if path.name not in live and not path.name.endswith(".tmp"):
+            path.unlink(missing_ok=True)
+            files += 1
+    return rows, files
+
+
+def stats(cache_dir=CACHE_DIR):
+    if not (Path(cache_dir) / "index.db").exists():
+        return {"dir": str(cache_dir), "entries": 0}
+    conn = _connect(cache_dir)
+    try:
+        n, tickers, raw, oldest, newest = conn.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT ticker), COALESCE(SUM(size), 0), MIN(fetched_at), MAX(fetched_at)
+            FROM raw_responses""").fetchone()
+        kinds = dict(conn.execute("SELECT kind, COUNT(*) FROM raw_responses GROUP BY kind"))
+    finally:
+        conn.close()
+    on_disk = sum(p.stat().st_size for p in (Path(cache_dir) / "objects").glob("*/*"))
+    fmt = lambda t: time.strftime("%Y-%m-%d %H:%M", time.localtime(t)) if t else None
+    return {"dir": str(cache_dir), "entries": n, "tickers": tickers, "kinds": kinds,
+            "raw_mb": round(raw / 1e6, 1), "disk_mb": round(on_disk / 1e6, 1),
+            "oldest": fmt(oldest), "newest": fmt(newest)}
+
+
+def report(info):
+    if not info["entries"]:
+        print(f"[INFO] {info['dir']}: empty")
+        return
+    print(f"🗃️ {info['dir']}: {info['entries']} responses · {info['tickers']} tickers · "
+          f"{info['raw_mb']} MB raw → {info['disk_mb']} MB on disk · {info['oldest']} → {info['newest']}")
+    print("   " + " · ".join(f"{k} {v}" for k, v in sorted(info["kinds"].items())))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--prune" in sys.argv[1:]:
+        rows, files = prune()
+        print(f"[OK] pruned {rows} entries, {files} bodies")
+    report(stats())
@@ -6,29 +6,54 @@ FINAL FIXED VERSION
 ✔ Fix MultiIndex columns
 ✔ Fix unexpected columns
 ✔ Fix BRK.B → BRK-B
-✔ 1-year data
+✔ Full history (YF_PERIOD) on build / backfill / new tickers; bars past
+  retention.HOT_DAYS move to usa_archive.db right after
 ✔ Safe normalization
 ✔ Retry logic
 ✔ Full DB rebuild
+✔ Normalization inline on the I/O threads (~0.2ms of numpy per ticker);
+  a process pool only when PROCESSES > 1 (bench_normalize.py)
+✔ Incremental refresh (only bars after each ticker's last date)
+✔ Zone flips recorded for tickers that received new bars
+✔ Raw prices + corporate_actions rows (a split is one new row, not a re-download)
+✔ Sector aggregates (sectors.py) recomputed after every run that added bars
+✔ ENGINE = "async" swaps the download stage for async_fetch.py (aiohttp,
+  hundreds of requests in flight over one keep-alive pool)
+✔ Raw responses kept in rawcache.py before normalization; ENGINE = "cache"
+  (reingest) re-normalizes from there without downloading
 """
 
 import sqlite3
-import yfinance as yf
-import pandas as pd
 import os
 import time
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import repeat
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                FIRST_COMPLETED, as_completed, wait)
+
+import corporate_actions
+import normalize
+import rawcache
+import sectors
+import zones
 
 DB_PATH = "usa_data.db"
 TICKER_FILE = "usastocks.txt"
 LAST_REFRESH_FILE = "last_refresh.txt"
+FAILED_FILE = "failed_tickers.txt"
 
-YF_PERIOD = "1y"
+YF_PERIOD = "max"  # full-history downloads: the UI offers 2y / 5y / max lookbacks
 YF_INTERVAL = "1d"
 THREADS = 12
+ENGINE = "threads"  # or "async" (async_fetch.py, needs aiohttp), "cache" (rawcache.replay)
+RAW_CACHE = True    # keep every downloaded frame in rawcache.py
+# normalize pool size; 0 / 1 normalize inline on the I/O threads, which beat a
+# 1-process pool by ~30% (bench_normalize.py): pickling a payload costs as much
+# as normalizing it, so only set this above 1 after the bench shows a gain
+PROCESSES = 0
 RETRY_COUNT = 3
 MIN_ROWS = 200
+OVERLAP_DAYS = 3  # incremental refresh re-fetches a few days to replace partial bars
 
 
 # --------------------------
@@ -66,6 +91,8 @@ def create_table():
             PRIMARY KEY (ticker, date)
         )
     """)
+    corporate_actions.create_actions_table(conn)
+    sectors.create_sector_tables(conn)
     conn.commit()
     conn.close()
 
@@ -73,23 +100,31 @@ def create_table():
 # --------------------------
 # DOWNLOAD ONE TICKER
 # --------------------------
-def download_ticker(original_ticker):
+def download_ticker(original_ticker, start=None, end=None):
+    import yfinance as yf  # ~1s to import: only paid when something is downloaded
+
     yf_ticker = clean_for_yahoo(original_ticker)
     last_error = None
+    span = dict(start=start) if start else dict(period=YF_PERIOD)
+    if start and end:
+        span["end"] = end  # exclusive, as in yfinance
 
     for attempt in range(1, RETRY_COUNT + 1):
         try:
             df = yf.download(
                 yf_ticker,
-                period=YF_PERIOD,
                 interval=YF_INTERVAL,
                 progress=False,
-                auto_adjust=False
+                auto_adjust=False,
+                actions=True,
+                **span
             )
             if df is None or df.empty:
                 last_error = f"Empty after attempt {attempt}"
                 time.sleep(0.2)
                 continue
+            if RAW_CACHE:
+                keep_raw(original_ticker, start, end, df)
             return original_ticker, df, None
         except Exception as e:
             last_error = repr(e)
@@ -98,135 +133,330 @@ def download_ticker(original_ticker):
     return original_ticker, None, last_error
 
 
-# --------------------------
-# MAIN REFRESH FUNCTION
-# --------------------------
-def refresh_all_data():
-    tickers = load_tickers()
-    create_table()
-
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Start fresh
-    cur.execute("DELETE FROM stock_data")
-    conn.commit()
-    print("[INFO] Cleared stock_data table.")
-
-    failed = []
-    success_count = 0
+def download_arrays(ticker, start=None, end=None):
+    """I/O thread job: download, then split the frame into arrays (pandas stays off the consumer thread)."""
+    _, df, err = download_ticker(ticker, start, end)
+    if err or df is None or df.empty:
+        return None, f"DOWNLOAD: {err}"
+    try:
+        return normalize.to_arrays(df), None
+    except Exception as e:
+        return None, f"NORMALIZE: {e!r}"
 
-    with ThreadPoolExecutor(max_workers=THREADS) as pool:
-        futures = {pool.submit(download_ticker, t): t for t in tickers}
 
-        for i, fut in enumerate(as_completed(futures), start=1):
-            original_ticker = futures[fut]
-            t, df, err = fut.result()
+def download_normalized(ticker, start=None, end=None):
+    """I/O thread job when normalizing inline: the pipeline's (ticker, dates, ohlcv, actions, err)."""
+    payload, err = download_arrays(ticker, start, end)
+    if err:
+        return ticker, None, None, None, err
+    try:
+        _, dates, ohlcv, actions = normalize.normalize_arrays(ticker, *payload)
+    except Exception as e:
+        return ticker, None, None, None, f"NORMALIZE: {e!r}"
+    return ticker, dates, ohlcv, actions, None
 
-            if err or df is None or df.empty:
-                failed.append(original_ticker)
-                print(f"[WARN] {original_ticker} FAILED: {err}")
-                continue
 
-            # -----------------------------------
-            # NORMALIZATION FIX (FINAL — WORKS)
-            # -----------------------------------
-            try:
-                # Flatten MultiIndex
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
+def keep_raw(ticker, start, end, df):
+    # before normalization, so a normalize bug never costs the download
+    try:
+        rawcache.put_frame(ticker, rawcache.span_key(start, end if start else None, YF_PERIOD), df)
+    except Exception as e:
+        print(f"[WARN] {ticker}: raw cache write failed: {e!r}")
 
-                # Keep only OHLCV
-                df = df.reset_index()
-                cols = [c for c in df.columns if c.lower() in
-                        ["date", "open", "high", "low", "close", "volume"]]
 
-                # Sometimes Date column is under different name
-                if "Date" in df.columns:
-                    df.rename(columns={"Date": "date"}, inplace=True)
+# --------------------------
+# DOWNLOAD + NORMALIZE PIPELINE
+# --------------------------
+def run_pipeline(tickers, processes=PROCESSES, starts=None, ends=None, engine=None):
+    """
+    Download and normalize on THREADS I/O threads; with processes > 1 the
+    numpy normalize runs on a process pool instead.
+    starts maps ticker -> first date to fetch (full YF_PERIOD when missing),
+    ends ticker -> exclusive end date (open-ended when missing).
+
+    Yields (ticker, dates, ohlcv, actions, err) in completion order; err is
+    None on success, otherwise the arrays are None and err starts with the
+    stage that failed ("DOWNLOAD" or "NORMALIZE").
+
+    engine defaults to the module-level ENGINE ("threads", the path above).
+    engine="async" fetches with async_fetch.fetch_all instead (needs
+    aiohttp); it parses the chart JSON itself, so no process pool is used.
+    engine="cache" downloads nothing: rawcache.replay re-normalizes the
+    cached raw responses.
+    """
+    if (engine or ENGINE) == "cache":
+        yield from rawcache.replay(tickers)
+        return
+    if (engine or ENGINE) == "async":
+        import async_fetch
+        yield from async_fetch.fetch_all(tickers, starts, ends, period=YF_PERIOD)
+        return
+
+    starts, ends = starts or {}, ends or {}
+    if processes <= 1:
+        with ThreadPoolExecutor(max_workers=THREADS) as io_pool:
+            jobs = [io_pool.submit(download_normalized, t, starts.get(t), ends.get(t)) for t in tickers]
+            for fut in as_completed(jobs):
+                yield fut.result()
+        return
+
+    with ThreadPoolExecutor(max_workers=THREADS) as io_pool, \
+            ProcessPoolExecutor(max_workers=processes) as cpu_pool:
+        pending = {io_pool.submit(download_arrays, t, starts.get(t), ends.get(t)): ("io", t)
+                   for t in tickers}
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, ticker = pending.pop(fut)
+
+                if stage == "io":
+                    payload, err = fut.result()
+                    if err:
+                        yield ticker, None, None, None, err
+                        continue
+                    job = cpu_pool.submit(normalize.normalize_arrays, ticker, *payload)
+                    pending[job] = ("cpu", ticker)
+                    continue
+
+                try:
+                    _, dates, ohlcv, actions = fut.result()
+                except Exception as e:
+                    yield ticker, None, None, None, f"NORMALIZE: {e!r}"
+                    continue
+                yield ticker, dates, ohlcv, actions, None
 
-                # rebuild clean df
-                df = df[cols]
 
-                # Final enforcement
-                df = df.rename(columns=str.lower)
-                df = df[["date", "open", "high", "low", "close", "volume"]]
+# --------------------------
+# STORE PIPELINE OUTPUT
+# --------------------------
+def ingest(tickers, conn, since=None, engine=None):
+    """
+    Run the pipeline for tickers and upsert results.
+
+    since maps ticker -> last stored date; those tickers are fetched from
+    OVERLAP_DAYS before it and skip the MIN_ROWS check. Returns (updated,
+    failed) where updated lists tickers that now have bars past `since`.
+    """
+    since = since or {}
+    starts = {t: (datetime.fromisoformat(d) - timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+              for t, d in since.items() if d}
+    cur = conn.cursor()
+    failed, updated = [], []
 
-                df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    for original_ticker, dates, ohlcv, actions, err in run_pipeline(tickers, starts=starts, engine=engine):
+        if err:
+            failed.append(original_ticker)
+            print(f"[WARN] {original_ticker} FAILED: {err}")
+            continue
 
-            except Exception as e:
-                print(f"[WARN] NORMALIZATION FAILED for {original_ticker}: {e}")
-                failed.append(original_ticker)
-                continue
+        # Must have enough bars (full downloads only)
+        if original_ticker not in starts and len(dates) < MIN_ROWS:
+            print(f"[WARN] {original_ticker}: only {len(dates)} rows (min {MIN_ROWS})")
+            failed.append(original_ticker)
+            continue
 
-            # Must have enough bars
-            if len(df) < MIN_ROWS:
-                print(f"[WARN] {original_ticker}: only {len(df)} rows (min {MIN_ROWS})")
-                failed.append(original_ticker)
-                continue
+        # Insert into DB straight from the column arrays
+        rows = zip(repeat(original_ticker), dates.tolist(), *ohlcv.T.tolist())
 
-            # Insert into DB
-            rows = [
-                (
-                    original_ticker,
-                    row["date"],
-                    float(row["open"]),
-                    float(row["high"]),
-                    float(row["low"]),
-                    float(row["close"]),
-                    float(row["volume"])
-                )
-                for _, row in df.iterrows()
-            ]
-
-            try:
+        # bars and actions commit together: raw bars without their splits would read as a price cliff
+        try:
+            with conn:
                 cur.executemany("""
                     INSERT OR REPLACE INTO stock_data
                     (ticker, date, open, high, low, close, volume)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 """, rows)
-                success_count += 1
-            except Exception as e:
-                print(f"[ERR] DB ERROR {original_ticker}: {e}")
-                failed.append(original_ticker)
+                corporate_actions.record_actions(conn, original_ticker, actions)
+        except Exception as e:
+            print(f"[ERR] DB ERROR {original_ticker}: {e}")
+            failed.append(original_ticker)
+            continue
 
-            conn.commit()
+        last = since.get(original_ticker)
+        if len(dates) and (last is None or dates[-1] > last):
+            updated.append(original_ticker)
 
-            print(f"[OK] {original_ticker} saved ({len(df)} rows) [{success_count}/{len(tickers)}]")
+        note = f", {len(actions)} actions" if actions else ""
+        print(f"[OK] {original_ticker} saved ({len(dates)} rows{note}) [{len(updated)}/{len(tickers)}]")
+
+    return updated, failed
+
+
+def record_zones(conn, tickers):
+    if not tickers:
+        return []
+    flips = zones.update_zones(conn, tickers)
+    print(f"[INFO] Zones re-evaluated for {len(tickers)} tickers, {len(flips)} flips "
+          f"({zones.BULL_FILE} rewritten)")
+    return flips
+
+
+def record_sectors(conn, tickers):
+    if not tickers:
+        return 0
+    t0 = time.perf_counter()
+    rows = sectors.update_sector_stats(conn, DB_PATH)
+    print(f"[INFO] Sector aggregates: {rows} rows in {time.perf_counter() - t0:.1f}s")
+    return rows
 
-    conn.close()
 
+def archive_old_bars():
+    """Full-history downloads land in the hot table; keep it at retention.HOT_DAYS."""
+    import retention
+    try:
+        retention.report(retention.compact(DB_PATH))
+    except sqlite3.Error as e:
+        print(f"[WARN] Retention compaction failed: {e}")
+
+
+def write_run_files(failed):
     # Save last refresh time
     with open(LAST_REFRESH_FILE, "w") as f:
         f.write(datetime.now().isoformat())
 
     # Save failed list
-    with open("failed_tickers.txt", "w") as f:
+    write_failed(failed)
+
+
+def write_failed(failed):
+    with open(FAILED_FILE, "w") as f:
         for item in failed:
             f.write(item + "\n")
 
+
+# --------------------------
+# MAIN REFRESH FUNCTION
+# --------------------------
+def refresh_all_data():
+    tickers = load_tickers()
+    create_table()
+
+    conn = sqlite3.connect(DB_PATH)
+
+    # Start fresh
+    conn.execute("DELETE FROM stock_data")
+    conn.commit()
+    print("[INFO] Cleared stock_data table.")
+
+    updated, failed = ingest(tickers, conn)
+    record_zones(conn, updated)
+    record_sectors(conn, updated)
+    conn.close()
+    archive_old_bars()
+    write_run_files(failed)
+
     print("====================================")
     print("REFRESH COMPLETE")
-    print(f"Success: {success_count}")
-    print(f"Failed: {len(failed)} (see failed_tickers.txt)")
+    print(f"Success: {len(updated)}")
+    print(f"Failed: {len(failed)} (see {FAILED_FILE})")
     print("====================================")
 
     return True
 
 
 # --------------------------
-# DAILY CHECK
+# INCREMENTAL REFRESH
 # --------------------------
-def needs_refresh():
-    if not os.path.exists(LAST_REFRESH_FILE):
-        return True
-    try:
-        with open(LAST_REFRESH_FILE, "r") as f:
-            last = datetime.fromisoformat(f.read().strip())
-        return (datetime.now() - last) >= timedelta(days=1)
-    except:
-        return True
+def refresh_incremental(tickers=None):
+    """Fetch only bars after each ticker's last stored date; new tickers get full history."""
+    tickers = tickers or load_tickers()
+    create_table()
+
+    conn = sqlite3.connect(DB_PATH)
+    since = dict(conn.execute("SELECT ticker, MAX(date) FROM stock_data GROUP BY ticker"))
+    since = {t: since.get(t) for t in tickers}
+
+    updated, failed = ingest(tickers, conn, since)
+    record_zones(conn, updated)
+    record_sectors(conn, updated)
+    conn.close()
+    write_run_files(failed)
+
+    print("====================================")
+    print("INCREMENTAL REFRESH COMPLETE")
+    print(f"Tickers with new bars: {len(updated)}")
+    print(f"Failed: {len(failed)} (see {FAILED_FILE})")
+    print("====================================")
+
+    return True
+
+
+# --------------------------
+# BACKFILL NEW SYMBOLS ONLY
+# --------------------------
+def backfill_tickers(tickers):
+    """Download full history for the given tickers without touching the rest of the table."""
+    create_table()
+    conn = sqlite3.connect(DB_PATH)
+    updated, failed = ingest(tickers, conn)
+    record_zones(conn, updated)
+    record_sectors(conn, updated)
+    conn.close()
+    if updated:
+        archive_old_bars()
+
+    print(f"[INFO] Backfill: {len(updated)} ok, {len(failed)} failed {failed if failed else ''}")
+    return failed
+
+
+# --------------------------
+# RETRY LAST RUN'S FAILURES
+# --------------------------
+def retry_failed():
+    """Re-run the tickers in failed_tickers.txt (incrementally when they have bars)."""
+    if not os.path.exists(FAILED_FILE):
+        print(f"[INFO] No {FAILED_FILE}; nothing to retry.")
+        return []
+    with open(FAILED_FILE, "r") as f:
+        tickers = list(dict.fromkeys(x.strip() for x in f if x.strip()))
+    if not tickers:
+        print("[INFO] No failed tickers to retry.")
+        return []
+
+    create_table()
+    conn = sqlite3.connect(DB_PATH)
+    since = dict(conn.execute(f"""
+        SELECT ticker, MAX(date) FROM stock_data
+        WHERE ticker IN ({','.join('?' * len(tickers))}) GROUP BY ticker""", tickers))
+    updated, failed = ingest(tickers, conn, {t: since.get(t) for t in tickers})
+    record_zones(conn, updated)
+    record_sectors(conn, updated)
+    conn.close()
+    write_failed(failed)  # last_refresh.txt is left alone: this was not a full run
+
+    print(f"[INFO] Retry: {len(tickers) - len(failed)} ok, {len(failed)} still failing")
+    return failed
+
+
+# --------------------------
+# RE-INGEST FROM RAW CACHE
+# --------------------------
+def reingest(tickers=None):
+    """
+    Re-normalize cached raw responses and upsert them (no downloads), e.g.
+    after a normalize fix. Defaults to every ticker in the cache. Returns
+    the tickers that still fail.
+    """
+    tickers = tickers or sorted({e[0] for e in rawcache.entries()})
+    if not tickers:
+        print(f"[INFO] {rawcache.CACHE_DIR} is empty; nothing to re-ingest.")
+        return []
+    create_table()
+    conn = sqlite3.connect(DB_PATH)
+    since = dict(conn.execute("SELECT ticker, MAX(date) FROM stock_data GROUP BY ticker"))
+    updated, failed = ingest(tickers, conn, {t: since.get(t) for t in tickers}, engine="cache")
+    record_zones(conn, updated)
+    record_sectors(conn, [t for t in tickers if t not in failed])
+    conn.close()
+
+    print(f"[INFO] Re-ingest: {len(tickers) - len(failed)} ok from cache, {len(failed)} failed")
+    return failed
 
 
 if __name__ == "__main__":
-    refresh_all_data()
+    import sys  # kept for old scripts; see usadb.py for the full CLI
+    if "--incremental" in sys.argv[1:]:
+        refresh_incremental()
+    else:
+        refresh_all_data()
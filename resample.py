@@ -0,0 +1,94 @@
+# resample.py
+"""
+Long-horizon bars from the stored daily data.
+
+    bars = daily_history("AAPL")                 # every stored bar, hot + archive tier
+    weekly = resample_bars(bars, "W")            # Monday-start weeks, labelled by last session
+    shown = reduce_points(weekly, 400)           # at most 400 candles for the chart
+
+Weekly / monthly bars are aggregated with numpy reduceat over period
+boundaries (open first, high max, low min, close last, volume sum), so a
+ticker's whole history resamples in well under a millisecond; callers
+cache the result per ticker and data version. reduce_points() merges runs
+of consecutive bars the same way, which keeps each candle's OHLC envelope
+while capping what matplotlib has to draw.
+"""
+
+import numpy as np
+import pandas as pd
+
+from panel import DB_PATH, FIELDS, load_panel
+
+FREQS = {"D": "Daily", "W": "Weekly", "M": "Monthly"}
+MAX_POINTS = 400
+
+
+def daily_history(ticker, db_path=DB_PATH, adjust="split"):
+    """Every stored daily bar for one ticker (both tiers), index "date"."""
+    panel = load_panel(db_path, tickers=[ticker], adjust=adjust)
+    if ticker not in panel.ticker_index:
+        return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name="date"))
+    return panel.view(ticker).dropna(subset=["close"]).copy()
+
+
+def _aggregate(bars, starts):
+    """OHLCV of the bar groups beginning at `starts` (row positions, ascending, starts[0] == 0)."""
+    o, h, l, c, v = (bars[f].to_numpy(dtype="float64") for f in FIELDS)
+    ends = np.append(starts[1:], len(bars)) - 1
+    out = pd.DataFrame({
+        "open": o[starts],
+        "high": np.fmax.reduceat(h, starts),
+        "low": np.fmin.reduceat(l, starts),
+        "close": c[ends],
+        "volume": np.add.reduceat(np.nan_to_num(v), starts),
+    }, index=bars.index[ends])
+    out.index.name = bars.index.name
+    return out
+
+
+def resample_bars(bars, freq):
+    """Daily bars -> "W" (weeks starting Monday) or "M" bars, labelled with each period's last session."""
+    if freq == "D" or bars.empty:
+        return bars
+    days = bars.index.values.astype("datetime64[D]")
+    if freq == "W":
+        key = (days.astype("int64") + 3) // 7       # 1970-01-01 was a Thursday
+    elif freq == "M":
+        key = days.astype("datetime64[M]").astype("int64")
+    else:
+        raise ValueError(f"freq must be one of {', '.join(FREQS)}")
+    starts = np.flatnonzero(np.diff(key, prepend=key[0] - 1))
+    return _aggregate(bars, starts)
+
+
+def reduce_points(bars, max_points=MAX_POINTS, volume="sum"):
+    """
+    Merge consecutive bars so at most max_points remain (the last bucket
+    ends on the latest bar). volume="mean" gives volume per bar, which stays
+    comparable with per-bar volume averages drawn on the same axis.
+    """
+    n = len(bars)
+    if n <= max_points:
+        return bars
+    step = -(-n // max_points)
+    starts = np.insert(np.arange(n % step or step, n, step), 0, 0)
+    out = _aggregate(bars, starts)
+    if volume == "mean":
+        out["volume"] /= np.diff(np.append(starts, n))
+    return out
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    ticker = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
+    t0 = time.perf_counter()
+    daily = daily_history(ticker)
+    t1 = time.perf_counter()
+    for f in ("W", "M"):
+        t = time.perf_counter()
+        out = resample_bars(daily, f)
+        print(f"{FREQS[f]:>8}: {len(out)} bars in {(time.perf_counter() - t) * 1000:.2f}ms")
+    print(f"[OK] {ticker}: {len(daily)} daily bars loaded in {(t1 - t0) * 1000:.0f}ms; "
+          f"reduced to {len(reduce_points(daily))} points for display")
@@ -0,0 +1,210 @@
+# retention.py
+"""
+Hot / archive tiers for stock_data
+-----------------------------------
+✔ Hot table (usa_data.db) keeps the last HOT_DAYS calendar days: the UI's
+  1y lookback plus the ~200 bars of SMA warm-up, with margin
+✔ Older bars move to usa_archive.db (ATTACHed, same schema), copied first
+  and deleted second, so a crash can only leave duplicates, never a hole
+✔ ANALYZE after every compaction; VACUUM (main and archive) when the free
+  page share passes VACUUM_FREE_RATIO or VACUUM_EVERY has elapsed, and only
+  outside market hours
+✔ connect(..., archive=True) exposes a TEMP VIEW all_bars over both tiers
+  (hot rows win), which panel.load_panel uses when a window reaches past
+  the hot table
+Usage: python retention.py [--vacuum] [--hot-days N]
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import market_calendar
+
+DB_PATH = "usa_data.db"
+ARCHIVE_PATH = "usa_archive.db"
+HOT_DAYS = 730                  # 365-day lookback + 200-bar warm-up (~290 days) + margin
+VACUUM_FREE_RATIO = 0.20
+VACUUM_EVERY = timedelta(days=7)
+ANALYZE_EVERY = timedelta(days=1)
+
+STOCK_DATA_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {schema}.stock_data (
+        ticker TEXT,
+        date TEXT,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        PRIMARY KEY (ticker, date)
+    )
+"""
+
+
+# --------------------------
+# CONNECTIONS
+# --------------------------
+def _ro_uri(path):
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def open_read_only(db_path=DB_PATH):
+    """Read-only connection, None when the DB file is missing: readers never create the store."""
+    if not os.path.exists(db_path):
+        return None
+    return sqlite3.connect(_ro_uri(db_path), uri=True)
+
+
+def has_table(conn, name, schema="main"):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+                        (name,)).fetchone() is not None
+
+
+def attach_archive(conn, archive_path=ARCHIVE_PATH, read_only=False):
+    if read_only:
+        conn.execute("ATTACH DATABASE ? AS archive", (_ro_uri(archive_path),))
+    else:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        conn.execute(STOCK_DATA_SCHEMA.format(schema="archive"))
+    conn.execute("""
+        CREATE TEMP VIEW IF NOT EXISTS all_bars AS
+        SELECT ticker, date, open, high, low, close, volume FROM main.stock_data
+        UNION ALL
+        SELECT a.ticker, a.date, a.open, a.high, a.low, a.close, a.volume
+        FROM archive.stock_data a
+        WHERE NOT EXISTS (SELECT 1 FROM main.stock_data h
+                          WHERE h.ticker = a.ticker AND h.date = a.date)
+    """)
+    return conn
+
+
+def connect(db_path=DB_PATH, archive=False, archive_path=ARCHIVE_PATH, read_only=False):
+    """
+    Connection to the hot DB; with archive=True the archive is attached and
+    all_bars exists. read_only=True opens both tiers with mode=ro and
+    returns None when the hot DB does not exist.
+    """
+    if read_only:
+        conn = open_read_only(db_path)
+        if conn is None:
+            return None
+    else:
+        conn = sqlite3.connect(db_path)
+    if archive:
+        attach_archive(conn, archive_path, read_only)
+    return conn
+
+
+def hot_start(conn):
+    """Oldest date in the hot table (None when empty)."""
+    return conn.execute("SELECT MIN(date) FROM main.stock_data").fetchone()[0]
+
+
+def needs_archive(db_path=DB_PATH, since=None, archive_path=ARCHIVE_PATH):
+    """True when a read starting at `since` (None = everything) must include the archive."""
+    if not os.path.exists(archive_path):
+        return False
+    if since is None:
+        return True
+    conn = open_read_only(db_path)
+    if conn is None:
+        return False
+    try:
+        start = hot_start(conn) if has_table(conn, "stock_data") else None
+    finally:
+        conn.close()
+    return start is None or since < start
+
+
+# --------------------------
+# MAINTENANCE BOOKKEEPING
+# --------------------------
+def _meta(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS db_meta (key TEXT PRIMARY KEY, value TEXT)")
+    return dict(conn.execute("SELECT key, value FROM db_meta"))
+
+
+def _set_meta(conn, **values):
+    conn.executemany("INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)",
+                     [(k, str(v)) for k, v in values.items()])
+    conn.commit()
+
+
+def _older_than(meta, key, age):
+    try:
+        return datetime.now() - datetime.fromisoformat(meta[key]) >= age
+    except (KeyError, ValueError):
+        return True
+
+
+def free_ratio(conn, schema="main"):
+    pages = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+    free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+    return free / pages if pages else 0.0
+
+
+# --------------------------
+# COMPACTION
+# --------------------------
+def compact(db_path=DB_PATH, archive_path=ARCHIVE_PATH, hot_days=HOT_DAYS, vacuum=None):
+    """
+    Move bars older than hot_days into the archive, then ANALYZE / VACUUM as
+    scheduled. vacuum=True forces a VACUUM, False skips it, None decides.
+    Returns a summary dict.
+    """
+    cutoff = (date.today() - timedelta(days=hot_days)).strftime("%Y-%m-%d")
+    conn = connect(db_path, archive=True, archive_path=archive_path)
+    out = {"cutoff": cutoff}
+    try:
+        t0 = time.perf_counter()
+        with conn:  # one transaction over both files
+            conn.execute("""
+                INSERT OR REPLACE INTO archive.stock_data
+                SELECT * FROM main.stock_data WHERE date < ?
+            """, (cutoff,))
+            moved = conn.execute("DELETE FROM main.stock_data WHERE date < ?", (cutoff,)).rowcount
+        out["moved"] = moved
+        out["move_s"] = round(time.perf_counter() - t0, 2)
+
+        meta = _meta(conn)
+        if moved or _older_than(meta, "last_analyze", ANALYZE_EVERY):
+            conn.execute("ANALYZE main")
+            conn.execute("ANALYZE archive")
+            _set_meta(conn, last_analyze=datetime.now().isoformat(timespec="seconds"))
+            out["analyzed"] = True
+
+        ratio = free_ratio(conn)
+        out["free_ratio"] = round(ratio, 3)
+        if vacuum is None:
+            vacuum = ((ratio >= VACUUM_FREE_RATIO or _older_than(meta, "last_vacuum", VACUUM_EVERY))
+                      and not market_calendar.is_market_open())
+        if vacuum:
+            t0 = time.perf_counter()
+            conn.execute("VACUUM main")
+            conn.execute("VACUUM archive")
+            _set_meta(conn, last_vacuum=datetime.now().isoformat(timespec="seconds"))
+            out["vacuum_s"] = round(time.perf_counter() - t0, 2)
+
+        out["hot_rows"] = conn.execute("SELECT COUNT(*) FROM main.stock_data").fetchone()[0]
+        out["archive_rows"] = conn.execute("SELECT COUNT(*) FROM archive.stock_data").fetchone()[0]
+    finally:
+        conn.close()
+    return out
+
+
+def report(summary):
+    print(f"[OK] Retention: {summary['moved']:,} bars before {summary['cutoff']} archived "
+          f"in {summary['move_s']}s · hot {summary['hot_rows']:,} · archive {summary['archive_rows']:,}"
+          + (" · analyzed" if summary.get("analyzed") else "")
+          + (f" · vacuumed in {summary['vacuum_s']}s" if "vacuum_s" in summary
+             else f" · free pages {summary['free_ratio']:.0%}"))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    days = int(args[args.index("--hot-days") + 1]) if "--hot-days" in args else HOT_DAYS
+    report(compact(hot_days=days, vacuum=True if "--vacuum" in args else None))
@@ -0,0 +1,229 @@
+# scheduler.py
+"""
+Background refresh daemon.
+
+✔ Runs refresh_db.refresh_incremental() once per session, SETTLE after the
+  NYSE close on trading days (needs_refresh decides)
+✔ Single instance: refresh.lock (O_EXCL), taken over only when its
+  heartbeat is older than LOCK_STALE
+✔ refresh_status.json (atomic) for the UI: state, timings, last error,
+  next run; the UI never downloads on the request path
+✔ The UI can ask for an out-of-schedule run by touching refresh.request
+✔ After a successful run, retention.compact() moves bars past the hot
+  window to the archive and runs ANALYZE / VACUUM when they are due, and
+  raw responses past their TTL are pruned (rawcache.py)
+Usage: python scheduler.py            # daemon
+       python scheduler.py --once     # run if due, then exit (cron / Task Scheduler)
+       python scheduler.py --status
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import market_calendar
+
+LAST_REFRESH_FILE = "last_refresh.txt"  # written by refresh_db after every run
+LOCK_FILE = "refresh.lock"
+STATUS_FILE = "refresh_status.json"
+REQUEST_FILE = "refresh.request"
+SETTLE = timedelta(minutes=30)    # let Yahoo publish the final daily bar
+POLL_SECONDS = 60
+LOCK_STALE = 10 * 60              # seconds without heartbeat before a lock is taken over
+RETRY_AFTER = timedelta(minutes=15)
+
+
+# --------------------------
+# STATUS RECORD
+# --------------------------
+def read_status(path=STATUS_FILE):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_status(path=STATUS_FILE, **fields):
+    status = read_status(path)
+    status.update(fields, heartbeat=datetime.now().isoformat(timespec="seconds"))
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp, path)
+    return status
+
+
+def needs_refresh(settle=timedelta(0), path=LAST_REFRESH_FILE):
+    """True when the last refresh predates the latest NYSE session close (+ settle)."""
+    try:
+        with open(path, "r") as f:
+            last = datetime.fromisoformat(f.read().strip())
+        last = last.astimezone()  # naive timestamps were written in local time
+        return last < market_calendar.last_settled_close(settle=settle) + settle
+    except (OSError, ValueError):
+        return True
+
+
+def request_refresh(path=REQUEST_FILE):
+    """Called from the UI: ask the daemon for a run on its next poll."""
+    with open(path, "w") as f:
+        f.write(datetime.now().isoformat())
+
+
+# --------------------------
+# SINGLE-INSTANCE LOCK
+# --------------------------
+def acquire_lock(path=LOCK_FILE):
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except OSError:
+                continue
+            if age < LOCK_STALE:
+                return False
+            print(f"[WARN] Taking over stale lock ({age:.0f}s old).")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def keep_lock_alive(stop, path=LOCK_FILE):
+    """Heartbeat thread: refresh the lock mtime while a long run is in progress."""
+    while not stop.wait(POLL_SECONDS):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+
+def release_lock(path=LOCK_FILE):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# --------------------------
+# ONE RUN
+# --------------------------
+def next_run_time():
+    return (market_calendar.next_settled_close(settle=SETTLE) + SETTLE).astimezone()
+
+
+def run_refresh(reason):
+    import refresh_db  # heavy imports only when a run actually happens
+
+    started = datetime.now()
+    write_status(state="running", reason=reason, pid=os.getpid(),
+                 started_at=started.isoformat(timespec="seconds"))
+    print(f"[INFO] Refresh started ({reason}).")
+    try:
+        refresh_db.refresh_incremental()
+    except Exception as e:
+        traceback.print_exc()
+        write_status(state="error", last_error=repr(e),
+                     finished_at=datetime.now().isoformat(timespec="seconds"),
+                     next_run=(datetime.now().astimezone() + RETRY_AFTER).isoformat(timespec="seconds"))
+        return False
+
+    finished = datetime.now()
+    write_status(state="idle", last_error=None,
+                 finished_at=finished.isoformat(timespec="seconds"),
+                 last_success=finished.isoformat(timespec="seconds"),
+                 duration_s=round((finished - started).total_seconds(), 1),
+                 next_run=next_run_time().isoformat(timespec="seconds"))
+    print(f"[OK] Refresh finished in {(finished - started).total_seconds():.0f}s.")
+    compact()
+    prune_raw()
+    return True
+
+
+def compact():
+    import retention
+
+    try:
+        summary = retention.compact()
+    except Exception as e:  # the refresh itself succeeded; retry compaction next run
+        print(f"[WARN] Retention job failed: {e!r}")
+        write_status(last_compact_error=repr(e))
+        return
+    retention.report(summary)
+    write_status(last_compact=datetime.now().isoformat(timespec="seconds"), last_compact_error=None,
+                 hot_rows=summary["hot_rows"], archive_rows=summary["archive_rows"])
+
+
+def prune_raw():
+    import rawcache
+
+    try:
+        rows, files = rawcache.prune()
+    except Exception as e:
+        print(f"[WARN] Raw cache prune failed: {e!r}")
+        return
+    if rows:
+        print(f"[INFO] Raw cache: {rows} expired responses, {files} bodies removed")
+
+
+def due():
+    """Reason string if a run is due now, else None."""
+    if os.path.exists(REQUEST_FILE):
+        os.remove(REQUEST_FILE)
+        return "requested"
+    if needs_refresh(settle=SETTLE):
+        status = read_status()
+        if status.get("state") == "error" and status.get("next_run"):
+            if datetime.now().astimezone() < datetime.fromisoformat(status["next_run"]):
+                return None
+        return "schedule"
+    return None
+
+
+# --------------------------
+# DAEMON
+# --------------------------
+def serve(once=False):
+    if not acquire_lock():
+        print(f"[ERR] Another scheduler holds {LOCK_FILE}; exiting.")
+        return 1
+    stop = threading.Event()
+    threading.Thread(target=keep_lock_alive, args=(stop,), daemon=True).start()
+    try:
+        write_status(state="idle", pid=os.getpid(),
+                     next_run=next_run_time().isoformat(timespec="seconds"))
+        while True:
+            reason = due()
+            if reason:
+                run_refresh(reason)
+            else:
+                write_status()
+            if once:
+                return 0
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduler stopped.")
+        return 0
+    finally:
+        stop.set()
+        write_status(state="stopped")
+        release_lock()
+
+
+if __name__ == "__main__":
+    if "--status" in sys.argv[1:]:
+        print(json.dumps(read_status(), indent=2))
+        sys.exit(0)
+    sys.exit(serve(once="--once" in sys.argv[1:]))
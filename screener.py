@@ -0,0 +1,353 @@
+# screener.py
+"""
+Declarative screener evaluated over the whole universe at once.
+
+    s = Screen("close > sma200 AND rsi14 < 30 AND volume > 1.8*vol50", rank="volume / vol50")
+    hits = s.run(panel)                  # last day, one row per evaluable ticker
+    hits = s.run(panel, "2025-03-14")    # as of a past date (last session on or before it)
+    mask = s.evaluate(panel)             # (tickers, days) bool, every day
+
+Rules are parsed once (compile_rule is cached) into a small expression
+tree; each node evaluates to a (tickers, days) array, so a screen costs a
+handful of numpy ops instead of a loop over tickers. The match / valid /
+rank matrices of the most recent MAX_SIGNALS screens are memoized on the
+panel (signals()), so running a screen as of any other day is a column
+slice rather than a re-evaluation.
+
+Grammar (keywords are case-insensitive):
+    expr    := and_ (OR and_)*
+    and_    := not_ (AND not_)*
+    not_    := NOT not_ | cmp
+    cmp     := sum ((> | >= | < | <= | == | !=) sum)?
+    sum     := term ((+ | -) term)*
+    term    := unary ((* | /) unary)*
+    unary   := - unary | NUMBER | FIELD | ( expr )
+
+Fields: open high low close volume, close_prev, inst_level, bull_zone and the windowed
+families in FIELD_PATTERNS (sma200, ema21, vol50, rsi14, chg5, hhv20, llv20).
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z_0-9]*)|(>=|<=|==|!=|[-+*/()<>]))")
+KEYWORDS = {"AND", "OR", "NOT"}
+COMPARE = {
+    ">": np.greater, ">=": np.greater_equal,
+    "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal,
+}
+ARITH = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide}
+MAX_SIGNALS = 16        # screens whose (tickers, days) matrices stay memoized per panel
+MAX_FIELDS = 64         # derived fields memoized per panel; later ones are computed per call
+_signals_lock = threading.Lock()
+
+
+class RuleError(ValueError):
+    pass
+
+
+# --------------------------
+# FIELDS
+# --------------------------
+BASE_FIELDS = {"open", "high", "low", "close", "volume"}
+
+FIELD_PATTERNS = {
+    r"sma(\d+)": lambda p, n: indicators.rolling_mean(field(p, "close"), n),
+    r"ema(\d+)": lambda p, n: indicators.ema(field(p, "close"), n),
+    r"vol(\d+)": lambda p, n: indicators.rolling_mean(field(p, "volume"), n),
+    r"rsi(\d+)": lambda p, n: indicators.rsi(field(p, "close"), n),
+    r"chg(\d+)": lambda p, n: indicators.pct_change(field(p, "close"), n),
+    r"hhv(\d+)": lambda p, n: indicators.rolling_max(field(p, "high"), n),
+    r"llv(\d+)": lambda p, n: indicators.rolling_min(field(p, "low"), n),
+}
+
+DERIVED_FIELDS = {
+    "close_prev": lambda p: indicators.shift(field(p, "close"), 1),
+    "inst_level": lambda p: 1.8 * field(p, "vol50"),
+    "bull_zone": lambda p: np.where(np.isnan(field(p, "vol50") + field(p, "vol20")), np.nan,
+                                    field(p, "vol50") > field(p, "vol20")),
+}
+
+
+def _windowed(name):
+    """(build, window) for a windowed field name, None if no pattern matches; window must be >= 1."""
+    for pat, build in FIELD_PATTERNS.items():
+        m = re.fullmatch(pat, name)
+        if m:
+            n = int(m.group(1))
+            if n < 1:
+                raise RuleError(f"'{name}': window must be at least 1")
+            return build, n
+    return None
+
+
+def is_field(name):
+    return name in BASE_FIELDS or name in DERIVED_FIELDS or _windowed(name) is not None
+
+
+def field(panel, name):
+    """
+    (tickers, days) array for a field name, memoized on the panel (at most
+    MAX_FIELDS derived fields, so arbitrary windows cannot grow a shared panel).
+    """
+    if name in panel.cache:
+        return panel.cache[name]
+    if name in BASE_FIELDS:
+        return panel.field(name)
+    if name in DERIVED_FIELDS:
+        out = DERIVED_FIELDS[name](panel)
+    else:
+        found = _windowed(name)
+        if found is None:
+            raise RuleError(f"unknown field '{name}'")
+        out = found[0](panel, found[1])
+    if sum(isinstance(k, str) for k in panel.cache) < MAX_FIELDS:
+        panel.cache[name] = out
+    return out
+
+
+# --------------------------
+# PARSER
+# --------------------------
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise RuleError(f"unexpected input at {pos}: {text[pos:pos + 10]!r}")
+        num, name, op = m.groups()
+        if num is not None:
+            tokens.append(("num", float(num)))
+        elif name is not None:
+            upper = name.upper()
+            tokens.append(("kw", upper) if upper in KEYWORDS else ("name", name.lower()))
+        else:
+            tokens.append(("op", op))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def take(self, kind, values):
+        tok = self.peek()
+        if tok[0] == kind and tok[1] in values:
+            self.i += 1
+            return tok[1]
+        return None
+
+    def parse(self):
+        node = self.expr()
+        if self.i != len(self.tokens):
+            raise RuleError(f"unexpected token {self.peek()[1]!r}")
+        return node
+
+    def expr(self):
+        node = self.and_()
+        while self.take("kw", {"OR"}):
+            node = ("or", node, self.and_())
+        return node
+
+    def and_(self):
+        node = self.not_()
+        while self.take("kw", {"AND"}):
+            node = ("and", node, self.not_())
+        return node
+
+    def not_(self):
+        if self.take("kw", {"NOT"}):
+            return ("not", self.not_())
+        return self.cmp()
+
+    def cmp(self):
+        node = self.sum()
+        op = self.take("op", COMPARE)
+        if op:
+            node = ("cmp", op, node, self.sum())
+        return node
+
+    def sum(self):
+        node = self.term()
+        while True:
+            op = self.take("op", {"+", "-"})
+            if not op:
+                return node
+            node = ("arith", op, node, self.term())
+
+    def term(self):
+        node = self.unary()
+        while True:
+            op = self.take("op", {"*", "/"})
+            if not op:
+                return node
+            node = ("arith", op, node, self.unary())
+
+    def unary(self):
+        if self.take("op", {"-"}):
+            return ("neg", self.unary())
+        kind, value = self.peek()
+        if kind == "num":
+            self.i += 1
+            return ("num", value)
+        if kind == "name":
+            if not is_field(value):
+                raise RuleError(f"unknown field '{value}'")
+            self.i += 1
+            return ("field", value)
+        if self.take("op", {"("}):
+            node = self.expr()
+            if not self.take("op", {")"}):
+                raise RuleError("missing ')'")
+            return node
+        raise RuleError(f"unexpected token {value!r}" if kind else "unexpected end of rule")
+
+
+@lru_cache(maxsize=256)
+def compile_rule(text):
+    """Parse a rule once; returns the expression tree (a nested tuple)."""
+    return _Parser(text).parse()
+
+
+def fields_in(node):
+    if node[0] == "field":
+        return {node[1]}
+    return set().union(*(fields_in(n) for n in node[1:] if isinstance(n, tuple)))
+
+
+# --------------------------
+# EVALUATION
+# --------------------------
+def evaluate_node(node, panel):
+    kind = node[0]
+    if kind == "num":
+        return node[1]
+    if kind == "field":
+        return field(panel, node[1])
+    if kind == "neg":
+        return -evaluate_node(node[1], panel)
+    if kind == "arith":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return ARITH[node[1]](evaluate_node(node[2], panel), evaluate_node(node[3], panel))
+    if kind == "cmp":
+        with np.errstate(invalid="ignore"):
+            return COMPARE[node[1]](evaluate_node(node[2], panel), evaluate_node(node[3], panel))
+    if kind == "not":
+        return ~_as_bool(evaluate_node(node[1], panel))
+    if kind == "and":
+        return _as_bool(evaluate_node(node[1], panel)) & _as_bool(evaluate_node(node[2], panel))
+    if kind == "or":
+        return _as_bool(evaluate_node(node[1], panel)) | _as_bool(evaluate_node(node[2], panel))
+    raise RuleError(f"bad node {kind}")
+
+
+def _as_bool(x):
+    x = np.asarray(x)
+    if x.dtype == bool:
+        return x
+    with np.errstate(invalid="ignore"):
+        return np.nan_to_num(x, nan=0.0) != 0
+
+
+class Screen:
+    def __init__(self, rule, rank=None):
+        self.rule = rule
+        self.rank = rank
+        self.tree = compile_rule(rule)
+        self.rank_tree = compile_rule(rank) if rank else None
+        self.fields = sorted(fields_in(self.tree) | (fields_in(self.rank_tree) if rank else set()))
+
+    def evaluate(self, panel):
+        """Boolean (tickers, days) match matrix."""
+        out = np.broadcast_to(_as_bool(evaluate_node(self.tree, panel)), panel.shape[:2])
+        return out & self.valid(panel)
+
+    def valid(self, panel):
+        """True where every field the rule needs is defined."""
+        ok = np.ones(panel.shape[:2], dtype=bool)
+        for name in self.fields:
+            ok &= ~np.isnan(np.asarray(field(panel, name), dtype="float64"))
+        return ok
+
+    def signals(self, panel):
+        """
+        (match, valid, rank) (tickers, days) arrays, memoized on the panel
+        for the last MAX_SIGNALS screens; rank is None without a rank rule.
+        """
+        key = (self.rule, self.rank)
+        with _signals_lock:
+            memo = panel.cache.setdefault(("screens",), OrderedDict())
+            if key in memo:
+                memo.move_to_end(key)
+                return memo[key]
+        rank = None
+        if self.rank_tree is not None:
+            rank = np.broadcast_to(evaluate_node(self.rank_tree, panel), panel.shape[:2])
+        out = (self.evaluate(panel), self.valid(panel), rank)
+        with _signals_lock:
+            memo[key] = out
+            while len(memo) > MAX_SIGNALS:
+                memo.popitem(last=False)
+        return out
+
+    def day_index(self, panel, day):
+        """Panel column of `day` (index or date: last session on or before it), None if before the data."""
+        if isinstance(day, (int, np.integer)):
+            return day
+        day = int(np.searchsorted(panel.dates, np.datetime64(day, "D"), side="right")) - 1
+        return day if day >= 0 else None
+
+    def run(self, panel, day=-1, tickers=None):
+        """
+        One row per ticker evaluable on `day` (index or date), with the
+        match flag, the rank key and each referenced field, best rank first.
+        tickers limits the rows to a subset (e.g. sectors.tickers_in()).
+        """
+        day = self.day_index(panel, day) if len(panel) else None
+        if day is None:
+            out = pd.DataFrame(columns=["match", "rank"] + self.fields, index=pd.Index([], name="ticker"))
+            return out.astype({"match": bool, **{c: "float64" for c in out.columns[1:]}})
+
+        match, valid, rank = self.signals(panel)
+        valid = valid[:, day]
+        if tickers is not None:
+            rows = np.zeros(len(panel), dtype=bool)
+            rows[[panel.ticker_index[t] for t in tickers if t in panel.ticker_index]] = True
+            valid = valid & rows
+        out = pd.DataFrame({"match": match[:, day]},
+                           index=pd.Index(panel.tickers, name="ticker"))
+        out["rank"] = rank[:, day] if rank is not None else np.nan
+        for name in self.fields:
+            out[name] = np.asarray(field(panel, name), dtype="float64")[:, day]
+
+        out = out[valid]
+        if self.rank_tree is not None:
+            return out.sort_values(["match", "rank"], ascending=[False, False])
+        return out.sort_values("match", ascending=False, kind="stable")
+
+    def counts(self, panel, tickers=None):
+        """Matches and evaluable tickers per day, as a date-indexed DataFrame."""
+        match, valid, _ = self.signals(panel)
+        if tickers is not None:
+            rows = [panel.ticker_index[t] for t in tickers if t in panel.ticker_index]
+            match, valid = match[rows], valid[rows]
+        return pd.DataFrame({"matches": match.sum(axis=0), "evaluable": valid.sum(axis=0)},
+                            index=pd.DatetimeIndex(panel.dates, name="date"))
+
+    def matches(self, panel, day=-1, tickers=None):
+        hits = self.run(panel, day, tickers)
+        return hits[hits["match"]]
@@ -0,0 +1,205 @@
+# sectors.py
+"""
+Symbol metadata and precomputed sector aggregates.
+
+symbol_meta holds name / GICS sector / sub-industry per ticker, filled by
+universe.py from the Wikipedia tables it already downloads, with an index
+on sector so a screener sector filter is one indexed lookup (tickers_in).
+
+sector_stats holds one row per (sector, date) for the last STATS_DAYS
+trading days, recomputed during refresh (update_sector_stats) from one
+panel pass: a (sectors, tickers) membership matrix times the (tickers,
+days) indicator masks gives every sector's counts at once.
+
+    tickers      members with a bar that day
+    rel_volume   mean volume / vol50 over members
+    bull_zone_pct, pct_above_sma50, pct_above_sma200
+    chg20        mean 20-bar % change (equal-weight sector trend)
+"""
+
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+DB_PATH = "usa_data.db"
+STATS_DAYS = 260        # trading days of sector_stats kept / rewritten per refresh
+WARMUP_DAYS = 320       # extra calendar days loaded so SMA200 is defined from the first stats day
+STAT_COLUMNS = ["tickers", "rel_volume", "bull_zone_pct", "pct_above_sma50", "pct_above_sma200", "chg20"]
+
+
+# --------------------------
+# TABLES
+# --------------------------
+def create_sector_tables(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS symbol_meta (
+            ticker TEXT PRIMARY KEY,
+            name TEXT,
+            sector TEXT,
+            sub_industry TEXT,
+            source TEXT,
+            updated_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_symbol_meta_sector ON symbol_meta (sector, ticker);
+        CREATE TABLE IF NOT EXISTS sector_stats (
+            sector TEXT,
+            date TEXT,
+            tickers INTEGER,
+            rel_volume REAL,
+            bull_zone_pct REAL,
+            pct_above_sma50 REAL,
+            pct_above_sma200 REAL,
+            chg20 REAL,
+            PRIMARY KEY (sector, date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_sector_stats_date ON sector_stats (date);
+    """)
+
+
+def save_meta(records, source, db_path=DB_PATH):
+    """records: [ticker, name, sector, sub_industry]; existing rows are overwritten."""
+    conn = sqlite3.connect(db_path)
+    try:
+        create_sector_tables(conn)
+        now = datetime.now().isoformat(timespec="seconds")
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO symbol_meta (ticker, name, sector, sub_industry, source, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(t, n, s, sub, source, now) for t, n, s, sub in records])
+    finally:
+        conn.close()
+    return len(records)
+
+
+# --------------------------
+# LOOKUPS
+# --------------------------
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone()
+
+
+def list_sectors(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _has_table(conn, "symbol_meta"):
+            return []
+        return [r[0] for r in conn.execute(
+            "SELECT DISTINCT sector FROM symbol_meta WHERE sector IS NOT NULL ORDER BY sector")]
+    finally:
+        conn.close()
+
+
+def tickers_in(sector, db_path=DB_PATH):
+    """Tickers of one GICS sector (covered by idx_symbol_meta_sector)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _has_table(conn, "symbol_meta"):
+            return []
+        return [r[0] for r in conn.execute(
+            "SELECT ticker FROM symbol_meta WHERE sector=? ORDER BY ticker", (sector,))]
+    finally:
+        conn.close()
+
+
+def latest_stats(db_path=DB_PATH):
+    """sector_stats rows of the most recent date, as a DataFrame indexed by sector."""
+    import pandas as pd
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _has_table(conn, "sector_stats"):
+            return pd.DataFrame(columns=["date"] + STAT_COLUMNS)
+        return pd.read_sql_query("""
+            SELECT * FROM sector_stats WHERE date = (SELECT MAX(date) FROM sector_stats)
+            ORDER BY sector
+        """, conn).set_index("sector")
+    finally:
+        conn.close()
+
+
+# --------------------------
+# AGGREGATES
+# --------------------------
+def sector_matrix(conn, tickers):
+    """(sector names, (sectors, tickers) 0/1 membership matrix) for the panel's tickers."""
+    meta = dict(conn.execute("SELECT ticker, sector FROM symbol_meta WHERE sector IS NOT NULL"))
+    names = sorted(set(meta[t] for t in tickers if t in meta))
+    row = {s: i for i, s in enumerate(names)}
+    member = np.zeros((len(names), len(tickers)))
+    for j, t in enumerate(tickers):
+        if t in meta:
+            member[row[meta[t]], j] = 1.0
+    return names, member
+
+
+def compute_sector_stats(panel, names, member):
+    """{column: (sectors, days) array} from one pass over the panel."""
+    from screener import field
+
+    def share(hit, valid):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100.0 * (member @ (hit & valid)) / (member @ valid)
+
+    def mean(x):
+        ok = ~np.isnan(x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (member @ np.where(ok, x, 0.0)) / (member @ ok)
+
+    close = field(panel, "close")
+    has_bar = ~np.isnan(close)
+    bull = field(panel, "bull_zone")
+    out = {"tickers": member @ has_bar}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["rel_volume"] = mean(field(panel, "volume") / field(panel, "vol50"))
+        out["bull_zone_pct"] = share(bull == 1, ~np.isnan(bull))
+        for n in (50, 200):
+            sma = field(panel, f"sma{n}")
+            out[f"pct_above_sma{n}"] = share(close > sma, ~np.isnan(sma) & has_bar)
+        out["chg20"] = 100.0 * mean(field(panel, "chg20"))
+    return out
+
+
+def update_sector_stats(conn, db_path=DB_PATH, days=STATS_DAYS):
+    """Recompute sector_stats for the last `days` trading days. Returns rows written."""
+    from panel import load_panel
+
+    create_sector_tables(conn)
+    if not conn.execute("SELECT 1 FROM symbol_meta LIMIT 1").fetchone():
+        return 0
+    panel = load_panel(db_path, days=int(days * 7 / 5) + WARMUP_DAYS, adjust="split", archive=False)
+    if len(panel) == 0:
+        return 0
+    names, member = sector_matrix(conn, list(panel.tickers))
+    if not names:
+        return 0
+
+    stats = compute_sector_stats(panel, names, member)
+    first = max(panel.shape[1] - days, 0)
+    dates = np.datetime_as_string(panel.dates, unit="D")
+    rows = []
+    for i, sector in enumerate(names):
+        for d in range(first, panel.shape[1]):
+            if stats["tickers"][i, d] == 0:
+                continue
+            rows.append((sector, dates[d]) + tuple(
+                None if np.isnan(v) else float(v) for v in (stats[c][i, d] for c in STAT_COLUMNS)))
+    with conn:
+        conn.execute("DELETE FROM sector_stats WHERE date < ?", (dates[first],))
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO sector_stats (sector, date, {', '.join(STAT_COLUMNS)})
+            VALUES (?, ?, {', '.join('?' * len(STAT_COLUMNS))})
+        """, rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import time
+
+    conn = sqlite3.connect(DB_PATH)
+    t0 = time.perf_counter()
+    n = update_sector_stats(conn)
+    conn.close()
+    print(f"[OK] sector_stats: {n} rows in {time.perf_counter() - t0:.2f}s")
+    print(latest_stats().round(2).to_string())
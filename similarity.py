@@ -0,0 +1,173 @@
+# similarity.py
+"""
+Volume / price pattern similarity across the universe.
+
+    index = shared_index(window=20)                  # built once per data version
+    hits = index.query("NVDA", k=10)                 # most alike over the same N days
+    hits = index.query("NVDA", k=10, history=True)   # ... at any past offset too
+
+Each ticker's last `window` bars become one row of a matrix: log volume and
+close, each z-normalized inside the window (shape, not level), scaled so a
+row dot product is the mean of the two Pearson correlations. A query is one
+matrix-vector product over every ticker; history=True adds every
+HISTORY_STEP-th past window of every ticker (built with a strided view, so
+a 5,000-ticker universe is still one batched product per query).
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from panel import DB_PATH, shared_panel
+
+WINDOW = 20
+HISTORY_STEP = 5        # past windows start every HISTORY_STEP bars
+HISTORY_BARS = 252      # how far back history=True looks
+
+
+def _znorm(x):
+    """z-normalize along the last axis; flat or incomplete windows become NaN rows."""
+    mu = x.mean(axis=-1, keepdims=True)
+    sd = x.std(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (x - mu) / sd
+    out[~np.isfinite(out).all(axis=-1)] = np.nan
+    return out
+
+
+def window_features(panel, window, ends, fields=("volume", "close")):
+    """
+    (tickers, len(ends), len(fields) * window) z-normalized windows ending
+    on the panel day positions `ends`. Only the requested windows are
+    materialized; the strided view itself is free.
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    starts = np.asarray(ends) - window + 1
+    parts = []
+    for name in fields:
+        x = panel.field(name)
+        if name == "volume":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x = np.log1p(np.where(x > 0, x, np.nan))
+        parts.append(_znorm(sliding_window_view(x, window, axis=1)[:, starts].astype("float32")))
+    return np.concatenate(parts, axis=-1) / np.float32(np.sqrt(len(fields) * window))
+
+
+class SimilarityIndex:
+    def __init__(self, panel, window=WINDOW, fields=("volume", "close"),
+                 history_bars=HISTORY_BARS, step=HISTORY_STEP):
+        self.tickers = np.asarray(panel.tickers)
+        self.ticker_index = dict(panel.ticker_index)
+        self.window, self.fields, self.step = window, tuple(fields), step
+        self.version = panel.version
+
+        days = panel.shape[1]
+        # latest window first, then every `step` bars back over history_bars
+        ends = np.arange(days - 1, max(days - 1 - history_bars, window - 2), -step) if days >= window else []
+        if not len(ends):   # history shorter than one window: an empty index, not a crash
+            T = len(self.tickers)
+            self.latest, self.latest_ok, self.latest_end = np.zeros((T, 0), "float32"), np.zeros(T, bool), None
+            self.hist, self.hist_ok = np.zeros((0, 0), "float32"), np.zeros((T, 0), bool)
+            self.hist_ends = np.array([], "datetime64[D]")
+            self.nbytes = 0
+            return
+        feats = window_features(panel, window, ends, self.fields)    # (T, 1 + H, F)
+        end_dates = panel.dates[ends]
+        ok = ~np.isnan(feats).any(axis=2)
+        feats[~ok] = 0.0
+
+        self.latest = np.ascontiguousarray(feats[:, 0])
+        self.latest_ok = ok[:, 0]
+        self.latest_end = end_dates[0]
+        self.hist_ok = ok[:, 1:]
+        self.hist = np.ascontiguousarray(feats[:, 1:].reshape(-1, feats.shape[2]))
+        self.hist_ends = end_dates[1:]
+        self.nbytes = self.latest.nbytes + self.hist.nbytes
+
+    def __len__(self):
+        return int(self.latest_ok.sum())
+
+    def vector(self, ticker):
+        i = self.ticker_index.get(ticker)
+        if i is None or not self.latest_ok[i]:
+            raise KeyError(f"{ticker}: no complete {self.window}-bar window")
+        return self.latest[i]
+
+    def pattern(self, ticker, end=None):
+        """{field: z-scores} of one indexed window (the latest, or the past one ending on `end`)."""
+        i = self.ticker_index[ticker]
+        if end is None or np.datetime64(end, "D") == self.latest_end:
+            row = self.latest[i]
+        else:
+            h = int(np.flatnonzero(self.hist_ends == np.datetime64(end, "D"))[0])
+            row = self.hist[i * self.hist_ok.shape[1] + h]
+        row = row * np.sqrt(len(self.fields) * self.window)
+        return {f: row[k * self.window:(k + 1) * self.window] for k, f in enumerate(self.fields)}
+
+    def query(self, ticker, k=10, history=False):
+        """
+        DataFrame of the k most similar (ticker, window end) pairs, best
+        first: score is the mean Pearson correlation of the z-normalized
+        fields (1 = same shape). history=True also searches past windows and
+        keeps each ticker's best one.
+        """
+        q = self.vector(ticker)
+        scores = self.latest @ q
+        scores[~self.latest_ok] = -np.inf
+        ends = np.full(len(scores), self.latest_end)
+        if history and self.hist.size:
+            past = (self.hist @ q).reshape(self.hist_ok.shape)
+            past[~self.hist_ok] = -np.inf
+            best = past.argmax(axis=1)
+            better = past[np.arange(len(best)), best] > scores
+            scores = np.where(better, past[np.arange(len(best)), best], scores)
+            ends = np.where(better, self.hist_ends[best], ends)
+        scores[self.ticker_index[ticker]] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=int)
+        top = top[np.argsort(-scores[top])]
+        return pd.DataFrame({"score": scores[top], "window_end": pd.to_datetime(ends[top])},
+                            index=pd.Index(self.tickers[top], name="ticker"))
+
+
+# --------------------------
+# ONE INDEX PER DATA VERSION
+# --------------------------
+_indexes = {}
+_lock = threading.Lock()
+
+
+def shared_index(window=WINDOW, fields=("volume", "close"), db_path=DB_PATH):
+    """SimilarityIndex over shared_panel(), rebuilt when the panel's data version changes."""
+    panel = shared_panel(db_path)
+    key = (db_path, window, tuple(fields))
+    entry = _indexes.get(key)
+    if entry is None or entry.version != panel.version:
+        with _lock:
+            entry = _indexes.get(key)
+            if entry is None or entry.version != panel.version:
+                entry = _indexes[key] = SimilarityIndex(panel, window, fields)
+    return entry
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    ticker = sys.argv[1] if len(sys.argv) > 1 else "NVDA"
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else WINDOW
+    shared_panel()
+    t0 = time.perf_counter()
+    index = shared_index(window)
+    t1 = time.perf_counter()
+    hits = index.query(ticker, k=10)
+    t2 = time.perf_counter()
+    past = index.query(ticker, k=10, history=True)
+    t3 = time.perf_counter()
+    print(hits.round(3).to_string())
+    print(past.round(3).to_string())
+    print(f"[OK] index {len(index)} tickers, {index.nbytes / 1e6:.1f} MB in {t1 - t0:.2f}s · "
+          f"query {(t2 - t1) * 1000:.1f}ms · with history {(t3 - t2) * 1000:.1f}ms")
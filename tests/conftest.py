@@ -0,0 +1,23 @@
+# conftest.py — the modules live flat in the repo root
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_panel():
+    """Random-walk Panel(n_tickers, n_days) starting 2025-01-01 (calendar days, no gaps)."""
+    from panel import Panel
+
+    def make(n_tickers=12, n_days=80, seed=0):
+        rng = np.random.default_rng(seed)
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_tickers, n_days)), axis=1))
+        values = np.stack([close * 0.99, close * 1.01, close * 0.98, close,
+                           rng.lognormal(12, 0.5, (n_tickers, n_days))], axis=2)
+        dates = np.arange(np.datetime64("2025-01-01"), np.datetime64("2025-01-01") + n_days)
+        return Panel([f"T{i:03d}" for i in range(n_tickers)], dates, values)
+    return make
@@ -0,0 +1,89 @@
+# test_corporate_actions.py — read-time adjustment, split undo in normalize, atomic ingest
+import sqlite3
+
+import numpy as np
+import pytest
+
+import corporate_actions
+import normalize
+import refresh_db
+from corporate_actions import adjust_values, factor_matrix
+from retention import STOCK_DATA_SCHEMA
+
+
+def test_split_scales_bars_before_the_event(make_panel):
+    p = make_panel(n_tickers=3, n_days=40)
+    out = adjust_values(p.tickers, p.dates, p.values, [("T001", "2025-01-21", "split", 4.0)])
+    np.testing.assert_allclose(out[1, :20, :4], p.values[1, :20, :4] / 4)
+    np.testing.assert_allclose(out[1, :20, 4], p.values[1, :20, 4] * 4)
+    np.testing.assert_array_equal(out[1, 20:], p.values[1, 20:])
+    np.testing.assert_array_equal(out[[0, 2]], p.values[[0, 2]])
+
+
+def test_dividend_only_in_total_mode(make_panel):
+    p = make_panel(n_tickers=2, n_days=40)
+    actions = [("T000", "2025-01-11", "dividend", 0.5)]
+    close = p.values[:, :, 3]
+    price, volume = factor_matrix(p.tickers, p.dates, actions, close, mode="total")
+    np.testing.assert_allclose(price[0, :10], 1 - 0.5 / close[0, 9])
+    assert (price[0, 10:] == 1).all() and (price[1] == 1).all() and (volume == 1).all()
+    np.testing.assert_array_equal(adjust_values(p.tickers, p.dates, p.values, actions, mode="split"), p.values)
+
+
+@pytest.mark.parametrize("date", ["2024-06-30", "2025-01-01", "2025-03-01"])
+def test_events_outside_the_stored_bars_change_nothing(make_panel, date):
+    p = make_panel(n_tickers=2, n_days=40)   # 2025-01-01 .. 2025-02-09
+    actions = [("T000", date, "split", 2.0), ("T000", date, "dividend", 1.0)]
+    for mode in ("split", "total"):
+        np.testing.assert_array_equal(adjust_values(p.tickers, p.dates, p.values, actions, mode), p.values)
+
+
+def test_unknown_mode_is_rejected(make_panel):
+    p = make_panel(n_tickers=1, n_days=5)
+    with pytest.raises(ValueError):
+        adjust_values(p.tickers, p.dates, p.values, [], mode="dividend")
+
+
+def test_normalize_undoes_yahoo_split_adjustment():
+    # Yahoo reports a 2:1 split on day 5 with every earlier bar already halved
+    raw = np.r_[np.full(5, 100.0), np.full(5, 50.0)]
+    shares = np.r_[np.full(5, 1000.0), np.full(5, 2000.0)]
+    splits = np.r_[np.zeros(5), 2.0, np.zeros(4)]
+    yahoo = np.c_[np.full((10, 4), 50.0), np.full(10, 2000.0), splits]
+    index = np.arange(np.datetime64("2025-01-01"), np.datetime64("2025-01-11"))
+    columns = ["Open", "High", "Low", "Close", "Volume", "Stock Splits"]
+
+    _, dates, ohlcv, actions = normalize.normalize_arrays("X", index, columns, yahoo)
+    np.testing.assert_allclose(ohlcv[:, 3], raw)
+    np.testing.assert_allclose(ohlcv[:, 4], shares)
+    assert actions == [("2025-01-06", "split", 2.0)]
+
+    # and the read-time adjustment gives Yahoo's series back
+    back = adjust_values(["X"], dates.astype("datetime64[D]"), ohlcv[None], [("X",) + actions[0]])
+    np.testing.assert_allclose(back[0], yahoo[:, :5])
+
+
+def test_ingest_rolls_back_a_ticker_whose_actions_fail(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "usa_data.db")
+    conn.execute(STOCK_DATA_SCHEMA.format(schema="main"))
+    corporate_actions.create_actions_table(conn)
+    conn.commit()
+
+    dates = np.array(["2025-01-02", "2025-01-03"])
+    ohlcv = np.ones((2, 5))
+    out = [("BAD", dates, ohlcv, [("2025-01-03", "split", 2.0)], None),
+           ("OK", dates, ohlcv, [], None)]
+    monkeypatch.setattr(refresh_db, "run_pipeline", lambda *a, **k: iter(out))
+    monkeypatch.setattr(refresh_db, "MIN_ROWS", 1)
+    record = corporate_actions.record_actions
+
+    def record_or_fail(conn, ticker, actions):
+        if ticker == "BAD":
+            raise sqlite3.OperationalError("disk I/O error")
+        return record(conn, ticker, actions)
+    monkeypatch.setattr(corporate_actions, "record_actions", record_or_fail)
+
+    updated, failed = refresh_db.ingest(["BAD", "OK"], conn)
+    assert (updated, failed) == (["OK"], ["BAD"])
+    assert conn.execute("SELECT DISTINCT ticker FROM stock_data").fetchall() == [("OK",)]
+    conn.close()
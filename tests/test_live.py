@@ -0,0 +1,76 @@
+# test_live.py — ring buffer, coalesced polling, rate limit and watch expiry against StubFeed
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+import live
+from live import LivePoller, RingBuffer, StubFeed, TokenBucket
+
+
+@pytest.fixture
+def poller(monkeypatch):
+    monkeypatch.setattr(live, "TICK", 0.01)
+    made = []
+
+    def make(**kw):
+        p = LivePoller(StubFeed(), **kw)
+        made.append(p)
+        return p
+    yield make
+    for p in made:
+        p.stop()
+
+
+def bars(stamps, close=1.0):
+    return np.asarray(stamps, dtype="int64"), np.full((len(stamps), 5), close)
+
+
+def test_ring_buffer_keeps_capacity_and_skips_duplicates():
+    buf = RingBuffer(capacity=5)
+    assert buf.merge(*bars(range(0, 480, 60)))
+    stamps, _ = buf.arrays()
+    assert len(buf) == 5 and stamps.tolist() == list(range(180, 480, 60))
+
+    version = buf.version
+    assert not buf.merge(*bars([360, 420]))           # same stamps, same values
+    assert not buf.merge(*bars([60]))                 # older than the buffer
+    assert buf.version == version and len(buf) == 5
+
+    assert buf.merge(*bars([420, 480], close=2.0))    # forming bar updated in place, one new bar
+    stamps, ohlcv = buf.arrays()
+    assert stamps.tolist() == list(range(240, 540, 60)) and ohlcv[-2:, 3].tolist() == [2.0, 2.0]
+
+
+def test_sessions_on_one_ticker_share_each_poll(poller):
+    p = poller(poll_seconds=0.2)
+    t_end = time.monotonic() + 1.0
+    while time.monotonic() < t_end:
+        for sid in ("s1", "s2", "s3"):
+            p.watch("AAA", sid)
+        time.sleep(0.02)
+    p.stop()
+    calls = p.feed.calls_by_ticker["AAA"]
+    assert calls == p.fetches and 3 <= calls <= 6   # one per 0.2s window, not one per session (15)
+    assert len(p.snapshot("AAA")[0]) > 0
+
+
+def test_token_bucket_caps_the_rate():
+    async def burst(n):
+        bucket = TokenBucket(rate=20, burst=1)
+        t0 = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - t0
+    assert asyncio.run(burst(11)) >= 0.45   # 1 token up front, then 20 per second
+
+
+def test_watches_expire_after_the_ttl(poller):
+    p = poller(poll_seconds=0.05, watch_ttl=0.2)
+    p.watch("AAA", "s1")
+    time.sleep(0.35)
+    assert p.stats()["watched"] == 0
+    calls = p.feed.calls
+    time.sleep(0.2)
+    assert p.feed.calls == calls
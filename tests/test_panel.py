@@ -0,0 +1,45 @@
+# test_panel.py — read-only loading across the hot and archive tiers
+import os
+import sqlite3
+
+import pytest
+
+import api
+import panel
+from retention import STOCK_DATA_SCHEMA
+
+
+def _db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(STOCK_DATA_SCHEMA.format(schema="main"))
+    conn.executemany("INSERT INTO stock_data VALUES (?, ?, 1, 1, 1, ?, 100)", rows)
+    conn.commit()
+    conn.close()
+
+
+def test_missing_store_is_not_created(tmp_path, monkeypatch):
+    db = str(tmp_path / "usa_data.db")
+    with pytest.raises(panel.StoreMissing):
+        panel.shared_panel(db)
+    assert os.listdir(tmp_path) == []
+
+    monkeypatch.setattr(api, "DB_PATH", db)
+    with pytest.raises(api.ApiError) as e:
+        api.get_version({}, "json", "v0")
+    assert e.value.status == 503 and os.listdir(tmp_path) == []
+
+    sqlite3.connect(db).close()
+    with pytest.raises(panel.StoreMissing):
+        panel.load_panel(db)
+
+
+def test_load_panel_reads_both_tiers_read_only(tmp_path):
+    db, archive = str(tmp_path / "usa_data.db"), str(tmp_path / "usa_archive.db")
+    _db(db, [("AAA", "2025-01-03", 3.0), ("AAA", "2025-01-02", 2.5)])
+    _db(archive, [("AAA", "2025-01-01", 1.0), ("AAA", "2025-01-02", 2.0)])
+    before = {p: os.path.getmtime(p) for p in (db, archive)}
+
+    p = panel.load_panel(db)
+    assert [str(d) for d in p.dates] == ["2025-01-01", "2025-01-02", "2025-01-03"]
+    assert p.field("close")[0].tolist() == [1.0, 2.5, 3.0]   # hot rows win
+    assert {p: os.path.getmtime(p) for p in (db, archive)} == before
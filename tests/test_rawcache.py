@@ -0,0 +1,58 @@
+# test_rawcache.py — replay merging, error stages and pruning
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import rawcache
+
+
+def frame(start, closes):
+    close = np.asarray(closes, dtype="float64")
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(len(close), 1000.0)},
+                        index=pd.date_range(start, periods=len(close), freq="D", name="Date"))
+
+
+def test_replay_merges_later_fetches_over_earlier(tmp_path):
+    rawcache.put_frame("AAA", "1y", frame("2025-01-01", [1, 2, 3, 4]), cache_dir=tmp_path)
+    rawcache.put_frame("AAA", rawcache.span_key("2025-01-03"), frame("2025-01-03", [30, 40, 50]),
+                       cache_dir=tmp_path)
+    (ticker, dates, ohlcv, _, err), = rawcache.replay(["AAA"], cache_dir=tmp_path)
+    assert ticker == "AAA" and err is None
+    assert list(dates) == ["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04", "2025-01-05"]
+    assert ohlcv[:, 3].tolist() == [1, 2, 30, 40, 50]
+
+
+def test_merge_keeps_the_last_part_per_date():
+    d = np.array(["2025-01-01", "2025-01-02"])
+    a = (d, np.array([[1.0] * 5, [2.0] * 5]), [("2025-01-01", "split", 2.0)])
+    b = (d[1:], np.array([[9.0] * 5]), [("2025-01-01", "split", 4.0)])
+    dates, ohlcv, actions = rawcache._merge([a, b])
+    assert list(dates) == list(d)
+    assert ohlcv[:, 0].tolist() == [1.0, 9.0]
+    assert actions == [("2025-01-01", "split", 4.0)]
+
+
+def test_replay_reports_the_failing_stage(tmp_path):
+    rawcache.put_frame("BAD", "1y", frame("2025-01-01", [1, 2]).drop(columns="Volume"), cache_dir=tmp_path)
+    out = {t: err for t, *_, err in rawcache.replay(["BAD", "NONE"], cache_dir=tmp_path)}
+    assert out["NONE"] == "CACHE: no raw response"
+    assert out["BAD"].startswith("NORMALIZE") and "OHLCV" in out["BAD"]
+
+
+def test_prune_keeps_bodies_still_referenced(tmp_path):
+    body = frame("2025-01-01", [1, 2, 3])
+    sha = rawcache.put_frame("OLD", "1y", body, cache_dir=tmp_path)
+    assert rawcache.put_frame("NEW", "1y", body, cache_dir=tmp_path) == sha
+    gone = rawcache.put_frame("GONE", "1y", frame("2025-01-01", [7, 8]), cache_dir=tmp_path)
+
+    conn = sqlite3.connect(tmp_path / "index.db")
+    with conn:
+        conn.execute("UPDATE raw_responses SET fetched_at = 0 WHERE ticker IN ('OLD', 'GONE')")
+    conn.close()
+
+    assert rawcache.prune(cache_dir=tmp_path) == (2, 1)
+    assert rawcache._object_path(sha, tmp_path).exists()
+    assert not rawcache._object_path(gone, tmp_path).exists()
+    assert [e[0] for e in rawcache.entries(cache_dir=tmp_path)] == ["NEW"]
@@ -0,0 +1,47 @@
+# test_refresh_db.py — download/normalize pipeline and full builds across the hot and archive tiers
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import panel
+import refresh_db
+import retention
+
+
+def test_build_keeps_full_history_in_the_archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / refresh_db.TICKER_FILE).write_text("AAA\n")
+    days = np.busday_offset(np.datetime64(date.today() - timedelta(days=1), "D"),
+                            np.arange(-5 * 252 + 1, 1), roll="backward")
+    dates = np.datetime_as_string(days, unit="D").astype("U10")
+    ohlcv = np.c_[np.full((len(dates), 4), 10.0), np.full(len(dates), 1e6)]
+    monkeypatch.setattr(refresh_db, "run_pipeline",
+                        lambda tickers, **k: iter([("AAA", dates, ohlcv, [], None)]))
+
+    refresh_db.refresh_all_data()
+
+    cutoff = str(date.today() - timedelta(days=retention.HOT_DAYS))
+    p = panel.load_panel(refresh_db.DB_PATH)            # reads both tiers
+    assert p.shape[1] == len(dates)
+    hot = panel.load_panel(refresh_db.DB_PATH, archive=False)
+    assert str(hot.dates[0]) >= cutoff and hot.shape[1] < len(dates)
+
+
+def _download(ticker, start=None, end=None):
+    if ticker == "GONE":
+        return ticker, None, "Empty after attempt 3"
+    index = pd.date_range("2025-01-01", periods=5, freq="D", name="Date")
+    df = pd.DataFrame({c: np.arange(5.0) + 1 for c in ["Open", "High", "Low", "Close", "Volume"]}, index=index)
+    return ticker, (df.drop(columns="Volume") if ticker == "BAD" else df), None
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_pipeline_inline_and_pooled(monkeypatch, processes):
+    monkeypatch.setattr(refresh_db, "download_ticker", _download)
+    out = {t: (dates, err) for t, dates, _, _, err in
+           refresh_db.run_pipeline(["AAA", "GONE", "BAD"], processes=processes, engine="threads")}
+    assert out["AAA"][1] is None and list(out["AAA"][0]) == [f"2025-01-0{d}" for d in range(1, 6)]
+    assert out["GONE"][1].startswith("DOWNLOAD")
+    assert out["BAD"][1].startswith("NORMALIZE")
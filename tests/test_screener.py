@@ -0,0 +1,63 @@
+# test_screener.py — field validation, memoization and as-of runs
+import pandas as pd
+import pytest
+
+import screener
+from panel import Panel
+from screener import RuleError, Screen
+
+
+@pytest.mark.parametrize("rule", ["rsi0 < 30", "ema0 > close", "sma0 > 1", "vol0 > volume"])
+def test_zero_window_is_a_rule_error(make_panel, rule):
+    with pytest.raises(RuleError):
+        Screen(rule).run(make_panel())
+
+
+def test_field_memo_is_capped(make_panel, monkeypatch):
+    monkeypatch.setattr(screener, "MAX_FIELDS", 3)
+    panel = make_panel()
+    for n in range(2, 10):
+        screener.field(panel, f"sma{n}")
+    assert sum(isinstance(k, str) for k in panel.cache) == 3
+    assert screener.field(panel, "sma9").shape == panel.shape[:2]
+
+
+@pytest.mark.parametrize("rule, rank", [("vol50 > vol20", None), ("close > sma20 AND rsi14 < 60", "volume / vol20")])
+def test_run_as_of_matches_a_cut_panel(make_panel, rule, rank):
+    p = make_panel(n_days=120)
+    k = 90
+    cut = Panel(p.tickers, p.dates[:k + 1], p.values[:, :k + 1])
+    as_of = Screen(rule, rank=rank).run(p, str(p.dates[k]))
+    pd.testing.assert_frame_equal(as_of, Screen(rule, rank=rank).run(cut))
+    assert len(as_of)
+
+
+def test_run_before_the_data_is_empty(make_panel):
+    p = make_panel()
+    out = Screen("vol50 > vol20", rank="volume").run(p, "2024-06-30")
+    assert out.empty and out["match"].dtype == bool
+    assert list(out[out["match"]].columns) == list(out.columns)   # filtering keeps the columns
+
+
+def test_breadth_memo_goes_through_the_field_cap(make_panel, monkeypatch):
+    import breadth
+
+    monkeypatch.setattr(screener, "MAX_FIELDS", 2)
+    panel = make_panel(n_days=300)
+    b = breadth.compute_breadth(panel)
+    assert sum(isinstance(k, str) for k in panel.cache) == 2
+    close = panel.field("close")
+    change = close[:, 1:] - close[:, :-1]
+    assert b["advances"].iloc[1:].tolist() == (change > 0).sum(axis=0).tolist()
+    assert Screen("close > close_prev").run(panel)["match"].sum() == (change[:, -1] > 0).sum()
+
+
+def test_backtest_outcomes_respect_the_field_cap(make_panel, monkeypatch):
+    import backtest
+
+    monkeypatch.setattr(screener, "MAX_FIELDS", 2)
+    panel = make_panel()
+    for hold in (1, 2, 3, 4):
+        ret, _ = backtest.forward_outcomes(panel, hold)
+        assert ret.shape == panel.shape[:2]
+    assert sum(isinstance(k, str) for k in panel.cache) == 2
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from similarity import SimilarityIndex
+
+
+def test_scores_match_corrcoef(make_panel):
+    p = make_panel(n_tickers=8, n_days=60)
+    window = 20
+    index = SimilarityIndex(p, window)
+    hits = index.query("T000", k=7)
+
+    close, volume = p.field("close")[:, -window:], np.log1p(p.field("volume")[:, -window:])
+    for t, score in hits["score"].items():
+        i = p.ticker_index[t]
+        expect = (np.corrcoef(volume[0], volume[i])[0, 1] + np.corrcoef(close[0], close[i])[0, 1]) / 2
+        assert score == pytest.approx(expect, abs=1e-4)
+    assert list(hits["score"]) == sorted(hits["score"], reverse=True)
+
+
+@pytest.mark.parametrize("n_days", [0, 5, 19])
+def test_history_shorter_than_window_is_empty(make_panel, n_days):
+    index = SimilarityIndex(make_panel(n_tickers=4, n_days=n_days), window=20)
+    assert len(index) == 0
+    assert index.latest_end is None and index.nbytes == 0
+    with pytest.raises(KeyError):
+        index.query("T000")
@@ -0,0 +1,17 @@
+# test_tiles.py — tile cache keys
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from tiles import TileCache, render_grid
+
+
+def test_new_data_version_redraws_the_tile(make_panel):
+    p = make_panel(n_tickers=2, n_days=80)
+    frames = [(t, p.view(t)) for t in p.tickers]
+    cache = TileCache()
+    first = render_grid(frames, cache, version="v1")
+    assert render_grid(frames, cache, version="v1") == first and cache.hits == 2
+
+    render_grid(frames, cache, version="v2")   # same last bar, rewritten history
+    assert cache.misses == 4 and len(cache) == 4
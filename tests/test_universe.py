@@ -0,0 +1,130 @@
+# test_universe.py — cached_get / build_universe against a local http.server
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import universe
+
+LAST_MODIFIED = "Mon, 06 Jan 2025 00:00:00 GMT"
+
+
+def page(symbols, column="Symbol"):
+    rows = "".join(f"<tr><td>{s}</td><td>{s} Inc</td><td>Energy</td><td>Oil</td></tr>" for s in symbols)
+    return (f"<html><body><table><tr><th>{column}</th><th>Security</th><th>GICS Sector</th>"
+            f"<th>GICS Sub-Industry</th></tr>{rows}</table></body></html>")
+
+
+class Stub:
+    """Serves self.pages[path] with ETag / Last-Modified; a missing path is a 404."""
+
+    def __init__(self):
+        self.pages, self.hits = {}, []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = stub.pages.get(self.path)
+                if body is None:
+                    stub.hits.append((self.path, 404))
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    stub.hits.append((self.path, 304))
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stub.hits.append((self.path, 200))
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    s = Stub()
+    monkeypatch.setattr(universe, "SOURCES", {
+        "sp500": (s.url + "/sp500", ["Symbol", "Ticker"], "sp500.txt"),
+        "nasdaq100": (s.url + "/ndx", ["Ticker", "Symbol"], "nasdaq100.txt"),
+    })
+    yield s
+    s.close()
+
+
+def build(tmp_path, **kw):
+    return universe.build_universe(ticker_file=tmp_path / "usastocks.txt", diff_file=tmp_path / "diff.json",
+                                   save_dir=tmp_path / "universe", cache_dir=tmp_path / "cache",
+                                   db_path=str(tmp_path / "usa_data.db"), **kw)
+
+
+def test_cached_get_fetch_fresh_and_revalidate(stub, tmp_path):
+    stub.pages["/sp500"] = page(["AAA"])
+    session = universe.make_session(1)
+    url = stub.url + "/sp500"
+
+    body, meta, status = universe.cached_get(session, url, tmp_path)
+    assert status == "fetched" and "AAA" in body
+    assert meta["etag"] and meta["last_modified"] == LAST_MODIFIED
+
+    assert universe.cached_get(session, url, tmp_path)[2] == "fresh"
+    assert len(stub.hits) == 1  # served from disk, no request
+
+    body, _, status = universe.cached_get(session, url, tmp_path, ttl=0)
+    assert status == "revalidated" and "AAA" in body
+    assert stub.hits[-1] == ("/sp500", 304)
+
+    stub.pages["/sp500"] = page(["BBB"])
+    body, _, status = universe.cached_get(session, url, tmp_path, ttl=0)
+    assert status == "fetched" and "BBB" in body
+
+
+def test_build_universe_diff(stub, tmp_path):
+    stub.pages["/sp500"] = page(["AAA", "BBB"])
+    stub.pages["/ndx"] = page(["BBB", "CCC"], column="Ticker")
+    diff = build(tmp_path)
+    assert diff["errors"] == {}
+    assert diff["added"] == ["AAA", "BBB", "CCC"] and diff["removed"] == []
+    assert universe.read_symbols(tmp_path / "usastocks.txt") == ["AAA", "BBB", "CCC"]
+
+    stub.pages["/sp500"] = page(["AAA", "DDD"])
+    diff = build(tmp_path, force=True)
+    assert diff["added"] == ["DDD"]
+    assert diff["removed"] == []  # BBB is still listed by nasdaq100
+
+    stub.pages["/ndx"] = page(["CCC"], column="Ticker")
+    diff = build(tmp_path, force=True)
+    assert diff["removed"] == ["BBB"]
+    assert json.loads((tmp_path / "diff.json").read_text())["removed"] == ["BBB"]
+
+
+def test_failed_source_suppresses_removals(stub, tmp_path):
+    stub.pages["/sp500"] = page(["AAA", "BBB"])
+    stub.pages["/ndx"] = page(["CCC"], column="Ticker")
+    build(tmp_path)
+
+    del stub.pages["/ndx"]  # 404: its symbols cannot be told apart from delistings
+    stub.pages["/sp500"] = page(["AAA"])
+    diff = build(tmp_path, force=True)
+    assert "nasdaq100" in diff["errors"]
+    assert diff["removed"] == []
+    assert universe.read_symbols(tmp_path / "usastocks.txt") == ["AAA", "BBB", "CCC"]
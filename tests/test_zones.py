@@ -0,0 +1,28 @@
+import json
+import sqlite3
+
+import api
+import zones
+
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    finally:
+        conn.close()
+
+
+def test_read_path_creates_nothing(tmp_path, monkeypatch):
+    db = str(tmp_path / "usa_data.db")
+    assert zones.latest_flips(db) == []
+    assert not (tmp_path / "usa_data.db").exists()
+
+    sqlite3.connect(db).close()
+    assert zones.latest_flips(db) == []
+    assert _tables(db) == []
+
+    monkeypatch.setattr(api, "DB_PATH", db)
+    _, body = api.get_signals({}, "json", "v0")
+    assert json.loads(body) == {"version": "v0", "zones": [], "flips": []}
+    assert _tables(db) == []
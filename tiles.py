@@ -0,0 +1,116 @@
+# tiles.py
+"""
+Small-multiples volume-cross tiles rendered off the pyplot state machine.
+
+Each tile is its own matplotlib.figure.Figure on a FigureCanvasAgg, so a
+worker pool can render tiles concurrently and nothing is left registered
+with pyplot afterwards. PNGs are cached by (ticker, last bar date, data
+version, size), so a tile is redrawn when its ticker gets a new bar or the
+DB is rewritten (a recorded split, a re-ingest); matplotlib is only
+imported when a tile actually has to be drawn.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = 8
+MAX_TILES = 512
+TILE_BARS = 120
+
+
+class TileCache:
+    """Thread-safe LRU of rendered PNG bytes."""
+
+    def __init__(self, max_entries=MAX_TILES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            png = self._data.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._data[key] = png
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(len(v) for v in self._data.values())
+
+
+def render_tile(ticker, df, size=(3.2, 1.8), dpi=110):
+    """PNG bytes for one mini volume-cross chart (df: date-indexed, volume column)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    df = df.tail(TILE_BARS + 50)
+    vol20 = df["volume"].rolling(20).mean()
+    vol50 = df["volume"].rolling(50).mean()
+    keep = slice(-TILE_BARS, None)
+    idx, vol, v20, v50 = df.index[keep], df["volume"][keep], vol20[keep], vol50[keep]
+    bull = v50 > v20
+    bullish = bool(bull.iloc[-1]) if len(bull) else False
+
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0.01, 0.02, 0.98, 0.80])
+    ax.bar(idx, vol, color="#2962FF", alpha=0.45, width=1.0)
+    ax.plot(idx, v20, color="#FFB000", linewidth=1.0)
+    ax.plot(idx, v50, color="#FF0000", linewidth=1.0)
+    ax.fill_between(idx, v20, v50, where=bull, color="green", alpha=0.25)
+    ax.fill_between(idx, v20, v50, where=~bull, color="red", alpha=0.25)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    for side in ax.spines.values():
+        side.set_visible(False)
+    fig.text(0.02, 0.97, ticker, fontsize=9, fontweight="bold", va="top")
+    fig.text(0.98, 0.97, "BULL" if bullish else "BEAR", fontsize=8, fontweight="bold",
+             va="top", ha="right", color="white",
+             bbox=dict(facecolor="green" if bullish else "red", edgecolor="none",
+                       boxstyle="round,pad=0.2"))
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def render_grid(frames, cache, size=(3.2, 1.8), dpi=110, workers=WORKERS, version=None):
+    """
+    frames: list of (ticker, df). Returns {ticker: png} in input order,
+    rendering cache misses on a thread pool. version (the panel's data
+    version) is part of the key, so rewritten history is never served stale.
+    """
+    out, todo = {}, []
+    for ticker, df in frames:
+        if df is None or df.empty:
+            continue
+        key = (ticker, str(df.index[-1]), version, size, dpi)
+        png = cache.get(key)
+        if png is None:
+            todo.append((key, ticker, df))
+        out[ticker] = png
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            pngs = pool.map(lambda job: render_tile(job[1], job[2], size, dpi), todo)
+            for (key, ticker, _), png in zip(todo, pngs):
+                cache.put(key, png)
+                out[ticker] = png
+    return out
@@ -0,0 +1,280 @@
+# universe.py
+"""
+Universe builder (S&P 500 + NASDAQ-100 + Dow 30)
+-------------------------------------------------
+✔ Sources fetched concurrently over one pooled requests.Session
+✔ On-disk HTTP cache with TTL + ETag / Last-Modified revalidation
+✔ Parsed symbol lists cached per response body (no re-parsing on 304)
+✔ Merged, de-duplicated usastocks.txt written atomically
+✔ universe_diff.json with additions / removals for targeted backfill
+✔ Name / GICS sector / sub-industry from the same tables saved to the
+  symbol_meta table in usa_data.db (sectors.py)
+Usage: python universe.py [--backfill] [--force]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DB_PATH = "usa_data.db"
+TICKER_FILE = "usastocks.txt"
+DIFF_FILE = "universe_diff.json"
+SAVE_DIR = Path("universe")
+CACHE_DIR = Path(".http_cache")
+CACHE_TTL = 24 * 3600   # seconds before a cached page is revalidated
+TIMEOUT = 20
+
+UA = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    )
+}
+
+# name -> (url, preferred symbol columns, per-index output file)
+SOURCES = {
+    "sp500": ("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies",
+              ["Symbol", "Ticker"], "sp500.txt"),
+    "nasdaq100": ("https://en.wikipedia.org/wiki/NASDAQ-100",
+                  ["Ticker", "Symbol"], "nasdaq100.txt"),
+    "dow30": ("https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average",
+              ["Symbol", "Ticker"], "dow30.txt"),
+}
+
+
+# --------------------------
+# SMALL FILE HELPERS
+# --------------------------
+def write_atomic(path, text: str) -> None:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def read_symbols(path) -> list[str]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return [x.strip().upper() for x in path.read_text().splitlines() if x.strip()]
+
+
+# --------------------------
+# POOLED SESSION
+# --------------------------
+def make_session(pool_size: int = 8) -> requests.Session:
+    retry = Retry(total=3, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.headers.update(UA)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# --------------------------
+# ON-DISK HTTP CACHE
+# --------------------------
+def _cache_paths(url: str, cache_dir: Path):
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return cache_dir / f"{key}.body", cache_dir / f"{key}.json"
+
+
+def _load_meta(meta_path: Path) -> dict:
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def cached_get(session, url, cache_dir=CACHE_DIR, ttl=CACHE_TTL, force=False):
+    """
+    GET url through the on-disk cache.
+
+    Returns (body, meta, status) where status is "fresh" (served within TTL,
+    no request), "revalidated" (304 from the server) or "fetched".
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    body_path, meta_path = _cache_paths(url, cache_dir)
+    meta = _load_meta(meta_path) if body_path.exists() else {}
+
+    if meta and not force and time.time() - meta.get("checked_at", 0) < ttl:
+        return body_path.read_text(encoding="utf-8"), meta, "fresh"
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = session.get(url, headers=headers, timeout=TIMEOUT)
+    if resp.status_code == 304 and meta:
+        meta["checked_at"] = time.time()
+        write_atomic(meta_path, json.dumps(meta))
+        return body_path.read_text(encoding="utf-8"), meta, "revalidated"
+
+    resp.raise_for_status()
+    body = resp.text
+    meta = {
+        "url": url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "sha1": hashlib.sha1(body.encode("utf-8")).hexdigest(),
+        "checked_at": time.time(),
+    }
+    write_atomic(body_path, body)
+    write_atomic(meta_path, json.dumps(meta))
+    return body, meta, "fetched"
+
+
+def remember_parsed(url, meta, symbols, records, cache_dir=CACHE_DIR):
+    meta = dict(meta, parsed_sha1=meta.get("sha1"), symbols=symbols, records=records)
+    write_atomic(_cache_paths(url, Path(cache_dir))[1], json.dumps(meta))
+
+
+# --------------------------
+# TABLE PARSING
+# --------------------------
+def get_column_by_name(tables, prefer_cols: list[str]):
+    wanted = [c.lower() for c in prefer_cols]
+    for df in tables:
+        for col in df.columns:
+            if str(col).strip().lower() in wanted:
+                return df[col].dropna()
+    return None
+
+
+def parse_meta(tables, prefer_cols: list[str]) -> list[list]:
+    """[symbol, name, sector, sub_industry] rows from the first table with a GICS Sector column."""
+    wanted = [c.lower() for c in prefer_cols]
+    for df in tables:
+        cols = {str(c).strip().lower(): c for c in df.columns}
+        sym = next((cols[c] for c in wanted if c in cols), None)
+        if sym is None or "gics sector" not in cols:
+            continue
+        name = cols.get("security") or cols.get("company")
+        sub = cols.get("gics sub-industry")
+        df = df.dropna(subset=[sym])
+        return [[str(r[sym]).strip().upper(),
+                 str(r[name]).strip() if name is not None else None,
+                 str(r[cols["gics sector"]]).strip(),
+                 str(r[sub]).strip() if sub is not None else None]
+                for _, r in df.iterrows() if str(r[sym]).strip()]
+    return []
+
+
+def parse_symbols(html: str, prefer_cols: list[str]) -> tuple[list[str], list[list]]:
+    """(symbols, metadata rows) from one parse of the page."""
+    import pandas as pd  # read_html needs lxml installed
+
+    tables = pd.read_html(io.StringIO(html))
+    col = get_column_by_name(tables, prefer_cols)
+    if col is None:
+        raise RuntimeError(f"no {'/'.join(prefer_cols)} column found")
+    return [s.strip().upper() for s in col.astype(str) if s.strip()], parse_meta(tables, prefer_cols)
+
+
+def fetch_source(session, name, cache_dir=CACHE_DIR, ttl=CACHE_TTL, force=False):
+    """Return (name, symbols, records, status) for one index, re-parsing only when the page body changed."""
+    url, prefer_cols, _ = SOURCES[name]
+    body, meta, status = cached_get(session, url, cache_dir, ttl, force)
+
+    if meta.get("parsed_sha1") == meta.get("sha1") and meta.get("symbols") and "records" in meta:
+        return name, meta["symbols"], meta["records"], status
+
+    symbols, records = parse_symbols(body, prefer_cols)
+    remember_parsed(url, meta, symbols, records, cache_dir)
+    return name, symbols, records, status
+
+
+# --------------------------
+# BUILD
+# --------------------------
+def build_universe(ticker_file=TICKER_FILE, diff_file=DIFF_FILE, save_dir=SAVE_DIR,
+                   cache_dir=CACHE_DIR, ttl=CACHE_TTL, force=False, session=None, db_path=DB_PATH):
+    """
+    Fetch every source concurrently, write per-index lists, the merged
+    ticker file, the diff and symbol_meta. Returns the diff dict.
+
+    If any source fails its symbols cannot be told apart from delistings,
+    so removals are suppressed and the previous symbols are kept.
+    """
+    session = session or make_session(len(SOURCES))
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+
+    results, records, errors = {}, {}, {}
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as pool:
+        futures = {pool.submit(fetch_source, session, n, cache_dir, ttl, force): n
+                   for n in SOURCES}
+        for fut, name in futures.items():
+            try:
+                _, symbols, records[name], status = fut.result()
+            except Exception as e:
+                errors[name] = repr(e)
+                print(f"❌ {name} fetch failed: {e}")
+                continue
+            results[name] = symbols
+            write_atomic(save_dir / SOURCES[name][2], "\n".join(sorted(set(symbols))))
+            print(f"✅ {name}: {len(set(symbols))} symbols ({status})")
+
+    old = set(read_symbols(ticker_file))
+    merged = set().union(*results.values()) if results else set()
+    if errors:
+        merged |= old
+
+    diff = {
+        "generated_at": datetime.now().isoformat(),
+        "sources": {n: len(set(s)) for n, s in results.items()},
+        "errors": errors,
+        "total": len(merged),
+        "added": sorted(merged - old),
+        "removed": sorted(old - merged),
+    }
+    if merged:
+        write_atomic(ticker_file, "\n".join(sorted(merged)))
+    write_atomic(diff_file, json.dumps(diff, indent=2))
+
+    # earlier SOURCES win: the S&P table is the reference for GICS fields
+    meta = {}
+    for name in reversed(SOURCES):
+        meta.update((r[0], r) for r in records.get(name) or [])
+    if meta:
+        import sectors
+        diff["meta"] = sectors.save_meta(list(meta.values()), "wikipedia", db_path)
+        print(f"🏷️ symbol_meta: {diff['meta']} symbols with sector data")
+    return diff
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print("⏳ Building U.S. universe (S&P 500, NASDAQ-100, Dow 30)...\n")
+    diff = build_universe(force="--force" in argv)
+
+    print(f"\n🎯 {TICKER_FILE}: {diff['total']} symbols "
+          f"(+{len(diff['added'])} / -{len(diff['removed'])}), diff in {DIFF_FILE}")
+
+    if "--backfill" in argv and diff["added"]:
+        import refresh_db
+        refresh_db.backfill_tickers(diff["added"])
+    return 0 if diff["total"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
 import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import streamlit as st
 from pathlib import Path
 import warnings
 
+from barcache import BoundedCache, CompactBars
+from panel import data_version, shared_panel
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 # ======================================================
@@ -34,21 +37,60 @@ with st.sidebar:
     st.markdown("<h5 style='text-align:center;color:gray;'>📊 USA Volume Cross (50 > 20) – Smart Viewer</h5>", unsafe_allow_html=True)
     st.markdown("---")
     st.header("⚙️ Settings")
-    period = st.selectbox("Select Period", ["3mo","6mo","1y"], index=1)
-    interval = st.selectbox("Select Interval", ["1d","1h","5m"], index=0)
+    period = st.selectbox("Select Period", ["3mo","6mo","1y","2y","5y","max"], index=1)
+    interval = st.selectbox("Select Interval", ["1d","1wk","1mo","1h","5m"], index=0)
     st.markdown("---")
 
 # ======================================================
-#  FETCH FUNCTION (CACHED)
+#  FETCH FUNCTION (BOUNDED, COMPACT CACHE)
 # ======================================================
-@st.cache_data(show_spinner=False)
+CACHE_MAX_MB = 128          # hard cap on cached bars for the whole server
+CACHE_MAX_ENTRIES = 5000    # 503 tickers x 3 periods x 3 intervals fits
+CACHE_TTL = 15 * 60         # seconds; intraday bars go stale quickly
+DB_PATH = "usa_data.db"
+# daily / weekly / monthly come from usa_data.db (resampled locally); intraday is downloaded
+LOCAL_INTERVALS = {"1d": "D", "1wk": "W", "1mo": "M"}
+PERIOD_DAYS = {"3mo": 90, "6mo": 180, "1y": 365, "2y": 730, "5y": 1826, "max": None}
+
+@st.cache_resource
+def bar_cache():
+    # one process-wide cache shared by all sessions
+    return BoundedCache(CACHE_MAX_MB * 1024 * 1024, CACHE_MAX_ENTRIES, CACHE_TTL)
+
+def local_frame(ticker, period, interval):
+    from resample import daily_history, resample_bars
+
+    days = PERIOD_DAYS[period]
+    if interval == "1d" and days and days <= 365:
+        bars = shared_panel(DB_PATH).view(ticker)   # hot tier, zero-copy
+    else:
+        bars = resample_bars(daily_history(ticker, DB_PATH), LOCAL_INTERVALS[interval])
+    bars = bars.dropna(subset=["close"])
+    if days:
+        bars = bars[bars.index >= pd.Timestamp.today().normalize() - pd.Timedelta(days=days)]
+    return bars.rename(columns=str.title)
+
 def get_data(ticker, period, interval):
-    df = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=False)
-    if df.empty:
+    cache = bar_cache()
+    version = data_version(DB_PATH)
+    local = (interval in LOCAL_INTERVALS and Path(DB_PATH).exists()
+             and ticker in shared_panel(DB_PATH).ticker_index)
+    # local bars are keyed by data version, so a refresh is picked up without waiting for the TTL
+    key = (ticker, period, interval, version if local else None)
+    bars = cache.get(key)
+    if bars is None:
+        if local:
+            raw = local_frame(ticker, period, interval)
+        else:
+            raw = yf.download(ticker, period=period, interval=interval, progress=False, auto_adjust=False)
+        # empty results are cached too, so dead tickers aren't re-requested every rerun
+        bars = CompactBars.empty() if raw is None or raw.empty else CompactBars.from_frame(raw)
+        cache.put(key, bars)
+    if not len(bars):
         return pd.DataFrame()
-    df["vol"] = df["Volume"]
-    df["vol20"] = df["vol"].rolling(20).mean()
-    df["vol50"] = df["vol"].rolling(50).mean()
+    df = bars.to_frame()
+    df["vol20"] = df["Volume"].rolling(20).mean()
+    df["vol50"] = df["Volume"].rolling(50).mean()
     df["inst_level"] = 1.8 * df["vol50"]
     df["bull_zone"] = df["vol50"] > df["vol20"]
     return df
@@ -62,6 +104,15 @@ for t in tickers:
     if not d.empty:
         (bulls if d["bull_zone"].iloc[-1] else bears).append(t)
 
+cache_stats = bar_cache().stats()
+with st.sidebar:
+    st.caption(
+        f"🗄️ Bar cache: {cache_stats['entries']} entries, "
+        f"{cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB · "
+        f"hits {cache_stats['hits']} · misses {cache_stats['misses']} · "
+        f"evicted {cache_stats['evictions']} · expired {cache_stats['expirations']}"
+    )
+
 # ======================================================
 #  CALLBACKS TO REMEMBER LAST ACTION
 # ======================================================
@@ -130,8 +181,9 @@ else:
         zone_text = "🟩 **BULL ZONE**" if bullish else "🟥 **BEAR ZONE**"
         st.markdown(f"### {choice} – Volume Cross (50 > 20) | {zone_text}")
 
-        fig, ax = plt.subplots(figsize=(13,6))
-        ax.bar(df.index, df["vol"], color="#2962FF", alpha=0.5)
+        fig = Figure(figsize=(13,6))
+        ax = fig.subplots()
+        ax.bar(df.index, df["Volume"], color="#2962FF", alpha=0.5)
         ax.plot(df.index, df["vol20"], color="#FFFF00", linewidth=2, label="20 SMA Vol")
         ax.plot(df.index, df["vol50"], color="#FF0000", linewidth=2, label="50 SMA Vol")
         ax.plot(df.index, df["inst_level"], color="#00FF00", linestyle="--", linewidth=1.2, label="1.8× Institutional")
@@ -145,14 +197,14 @@ else:
                 bbox=dict(facecolor=zone_color, edgecolor="none", boxstyle="round,pad=0.4"))
 
         ax.legend(); ax.grid(alpha=0.3)
-        plt.tight_layout()
+        fig.tight_layout()
         st.pyplot(fig)
 
         st.markdown("#### 🔎 Recent Volume Summary")
         st.dataframe(
-            df[["vol","vol20","vol50","inst_level"]].tail(5).rename(
+            df[["Volume","vol20","vol50","inst_level"]].tail(5).rename(
                 columns={
-                    "vol":"Volume","vol20":"SMA20 Volume",
+                    "vol20":"SMA20 Volume",
                     "vol50":"SMA50 Volume","inst_level":"1.8× Institutional"
                 }),
             width="stretch"
@@ -0,0 +1,256 @@
+# usadb.py
+"""
+One entry point for everything that touches usa_data.db
+--------------------------------------------------------
+✔ build [TICKER ...]       full rebuild from usastocks.txt (or backfill just the given tickers);
+                           full history by default (--period 5y etc.), old bars archived after
+✔ refresh [--if-due]       incremental refresh; --if-due exits quietly when already fresh
+✔ retry                    re-run the tickers listed in failed_tickers.txt
+✔ verify [--repair] [T..]  data-quality audit (audit.py), optional targeted repair
+✔ compact [--vacuum]       move bars past the hot window to usa_archive.db, ANALYZE / VACUUM
+✔ stats [--json]           row / ticker / date-range / zone / refresh / archive summary
+✔ fresh                    health check: exit 0 when fresh, 1 when a refresh is due
+✔ bench [tickers] [bars]   normalize-stage benchmark (bench_normalize.py)
+✔ build / refresh --engine async   download with async_fetch.py instead of the thread pool
+✔ reingest [--failed] [T..]  re-normalize from the raw response cache (rawcache.py), no downloads
+✔ rawcache [--prune]       raw response cache summary; --prune drops entries past the TTL
+Heavy modules (yfinance, pandas, numpy) are imported inside the subcommand
+that needs them, so stats / fresh start in a few milliseconds and are cheap
+to call from cron or a health check.
+Replaces build_db.py and refresh_db_debug.py.
+Usage: python usadb.py <command> [options]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+DB_PATH = "usa_data.db"
+ARCHIVE_PATH = "usa_archive.db"
+
+
+# --------------------------
+# LIGHT COMMANDS (stdlib only)
+# --------------------------
+def db_stats(db_path=DB_PATH):
+    if not os.path.exists(db_path):
+        return {"db": db_path, "exists": False}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        out = {"db": db_path, "exists": True, "size_mb": round(os.path.getsize(db_path) / 1e6, 1)}
+        if "stock_data" in tables:
+            rows, tickers, first, last = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT ticker), MIN(date), MAX(date) FROM stock_data").fetchone()
+            lagging = conn.execute("""
+                SELECT COUNT(*) FROM (SELECT MAX(date) AS d FROM stock_data GROUP BY ticker)
+                WHERE d < ?""", (last,)).fetchone()[0] if last else 0
+            out.update(rows=rows, tickers=tickers, first=first, last=last, lagging_tickers=lagging)
+        if "zone_state" in tables:
+            out["zones"] = dict(conn.execute("SELECT zone, COUNT(*) FROM zone_state GROUP BY zone"))
+        if "corporate_actions" in tables:
+            out["corporate_actions"] = dict(conn.execute(
+                "SELECT kind, COUNT(*) FROM corporate_actions GROUP BY kind"))
+    finally:
+        conn.close()
+    if os.path.exists(ARCHIVE_PATH):
+        conn = sqlite3.connect(f"file:{ARCHIVE_PATH}?mode=ro", uri=True)
+        try:
+            rows, first, last = conn.execute(
+                "SELECT COUNT(*), MIN(date), MAX(date) FROM stock_data").fetchone()
+        except sqlite3.OperationalError:
+            rows, first, last = 0, None, None
+        finally:
+            conn.close()
+        out["archive"] = {"db": ARCHIVE_PATH, "size_mb": round(os.path.getsize(ARCHIVE_PATH) / 1e6, 1),
+                          "rows": rows, "first": first, "last": last}
+    return out
+
+
+def cmd_stats(args):
+    import scheduler
+
+    stats = db_stats()
+    status = scheduler.read_status()
+    stats["refresh"] = {k: status.get(k) for k in ("state", "last_success", "next_run", "last_error")}
+    if os.path.exists(scheduler.LAST_REFRESH_FILE):
+        with open(scheduler.LAST_REFRESH_FILE, "r") as f:
+            stats["last_refresh"] = f.read().strip()
+    stats["needs_refresh"] = scheduler.needs_refresh(settle=scheduler.SETTLE)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    if not stats["exists"]:
+        print(f"[ERR] {DB_PATH} not found. Run: python usadb.py build")
+        return 1
+    print(f"📦 {stats['db']}  {stats['size_mb']} MB")
+    if "rows" in stats:
+        print(f"   rows {stats['rows']:,} · tickers {stats['tickers']} · "
+              f"{stats['first']} → {stats['last']} · lagging {stats['lagging_tickers']}")
+    if stats.get("archive"):
+        a = stats["archive"]
+        print(f"🗄️ {a['db']}  {a['size_mb']} MB · rows {a['rows']:,} · {a['first']} → {a['last']}")
+    if stats.get("zones"):
+        print("   zones " + " · ".join(f"{k} {v}" for k, v in sorted(stats["zones"].items())))
+    if stats.get("corporate_actions"):
+        print("   actions " + " · ".join(f"{k} {v}" for k, v in sorted(stats["corporate_actions"].items())))
+    print(f"   last refresh {stats.get('last_refresh', '—')} · "
+          f"scheduler {stats['refresh']['state'] or 'not running'} · "
+          f"{'refresh due' if stats['needs_refresh'] else 'fresh'}")
+    return 0
+
+
+def cmd_fresh(args):
+    import scheduler
+
+    due = scheduler.needs_refresh(settle=scheduler.SETTLE)
+    print("[WARN] refresh due" if due else "[OK] fresh")
+    return 1 if due else 0
+
+
+# --------------------------
+# HEAVY COMMANDS (lazy imports)
+# --------------------------
+def cmd_build(args):
+    import refresh_db
+
+    refresh_db.ENGINE = args.engine
+    refresh_db.YF_PERIOD = args.period
+    if args.tickers:
+        failed = refresh_db.backfill_tickers([t.upper() for t in args.tickers])
+        return 1 if failed else 0
+    refresh_db.refresh_all_data()
+    return 0
+
+
+def cmd_refresh(args):
+    if args.if_due:
+        import scheduler
+        if not scheduler.needs_refresh(settle=scheduler.SETTLE):
+            print("[OK] Already fresh; nothing to do.")
+            return 0
+    import refresh_db
+
+    refresh_db.ENGINE = args.engine
+    refresh_db.refresh_incremental([t.upper() for t in args.tickers] or None)
+    return 0
+
+
+def cmd_retry(args):
+    import refresh_db
+
+    return 1 if refresh_db.retry_failed() else 0
+
+
+def cmd_reingest(args):
+    import refresh_db
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.failed and os.path.exists(refresh_db.FAILED_FILE):
+        with open(refresh_db.FAILED_FILE, "r") as f:
+            tickers += [x.strip() for x in f if x.strip()]
+    failed = refresh_db.reingest(list(dict.fromkeys(tickers)) or None)
+    if args.failed:
+        refresh_db.write_failed(failed)
+    return 1 if failed else 0
+
+
+def cmd_rawcache(args):
+    import rawcache
+
+    if args.prune:
+        rows, files = rawcache.prune()
+        print(f"[OK] pruned {rows} entries, {files} bodies")
+    rawcache.report(rawcache.stats())
+    return 0
+
+
+def cmd_verify(args):
+    import audit
+
+    return audit.main((["--repair"] if args.repair else []) + args.tickers)
+
+
+def cmd_compact(args):
+    import retention
+
+    retention.report(retention.compact(hot_days=args.hot_days or retention.HOT_DAYS,
+                                        vacuum=True if args.vacuum else None))
+    return 0
+
+
+def cmd_bench(args):
+    import bench_normalize
+
+    bench_normalize.main(args.tickers, args.bars)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="usadb.py", description="usa_data.db maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="full rebuild, or backfill the given tickers")
+    p.add_argument("--engine", choices=["threads", "async"], default="threads",
+                   help="download engine (async needs aiohttp)")
+    p.add_argument("--period", default="max", help="history to download, e.g. 1y, 5y, max (default max)")
+    p.add_argument("tickers", nargs="*")
+    p.set_defaults(fn=cmd_build)
+
+    p = sub.add_parser("refresh", help="incremental refresh")
+    p.add_argument("--if-due", action="store_true", help="skip when the data is already fresh")
+    p.add_argument("--engine", choices=["threads", "async"], default="threads",
+                   help="download engine (async needs aiohttp)")
+    p.add_argument("tickers", nargs="*")
+    p.set_defaults(fn=cmd_refresh)
+
+    p = sub.add_parser("retry", help="retry tickers in failed_tickers.txt")
+    p.set_defaults(fn=cmd_retry)
+
+    p = sub.add_parser("reingest", help="re-normalize cached raw responses, no downloads")
+    p.add_argument("--failed", action="store_true", help="also the tickers in failed_tickers.txt")
+    p.add_argument("tickers", nargs="*")
+    p.set_defaults(fn=cmd_reingest)
+
+    p = sub.add_parser("rawcache", help="raw response cache summary / prune")
+    p.add_argument("--prune", action="store_true", help="drop entries older than the TTL")
+    p.set_defaults(fn=cmd_rawcache)
+
+    p = sub.add_parser("verify", help="data-quality audit")
+    p.add_argument("--repair", action="store_true", help="re-fetch missing / bad ranges")
+    p.add_argument("tickers", nargs="*")
+    p.set_defaults(fn=cmd_verify)
+
+    p = sub.add_parser("compact", help="archive old bars, ANALYZE / VACUUM when due")
+    p.add_argument("--vacuum", action="store_true", help="VACUUM even when not due")
+    p.add_argument("--hot-days", type=int, help="calendar days kept in usa_data.db (default 730)")
+    p.set_defaults(fn=cmd_compact)
+
+    p = sub.add_parser("stats", help="database summary")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_stats)
+
+    p = sub.add_parser("fresh", help="exit 0 when fresh, 1 when a refresh is due")
+    p.set_defaults(fn=cmd_fresh)
+
+    p = sub.add_parser("bench", help="normalize-stage benchmark")
+    p.add_argument("tickers", nargs="?", type=int, default=5000)
+    p.add_argument("bars", nargs="?", type=int, default=252)
+    p.set_defaults(fn=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.fn(args)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped manually.")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
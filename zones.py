@@ -0,0 +1,174 @@
+# zones.py
+"""
+Incremental bull/bear zone tracking.
+
+Zone rule is the viewers' one: bull when vol50 > vol20, bear otherwise.
+update_zones() only looks at tickers that just received bars, walks the
+bars after each ticker's last evaluated date, records every flip in
+zone_events and keeps the current zone in zone_state. bull_zone_stocks.txt
+is regenerated from zone_state with an atomic replace. Volumes are
+split-adjusted (corporate_actions) so a split does not fake a zone flip.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+import corporate_actions
+import retention
+
+DB_PATH = "usa_data.db"
+BULL_FILE = "bull_zone_stocks.txt"
+FAST, SLOW = 20, 50
+HISTORY_BARS = 400  # bars read for a ticker seen for the first time
+
+
+# --------------------------
+# TABLES
+# --------------------------
+def create_zone_tables(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS zone_state (
+            ticker TEXT PRIMARY KEY,
+            date TEXT,
+            zone TEXT,
+            vol20 REAL,
+            vol50 REAL
+        );
+        CREATE TABLE IF NOT EXISTS zone_events (
+            ticker TEXT,
+            date TEXT,
+            from_zone TEXT,
+            to_zone TEXT,
+            detected_at TEXT,
+            PRIMARY KEY (ticker, date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_zone_events_date ON zone_events (date);
+    """)
+
+
+# --------------------------
+# ZONE SERIES FOR ONE TICKER
+# --------------------------
+def _rolling_mean(x, n):
+    if len(x) < n:
+        return np.full(len(x), np.nan)
+    c = np.cumsum(np.insert(x, 0, 0.0))
+    out = np.full(len(x), np.nan)
+    out[n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+
+def zone_series(conn, ticker, since=None):
+    """
+    (dates, zones, vol20, vol50) for bars after `since` (all loaded bars if
+    None), with enough earlier bars read to warm up the SLOW window.
+    """
+    if since:
+        rows = conn.execute("""
+            SELECT date, volume FROM (
+                SELECT date, volume FROM stock_data
+                WHERE ticker=? AND date<=? ORDER BY date DESC LIMIT ?)
+            UNION ALL
+            SELECT date, volume FROM stock_data WHERE ticker=? AND date>?
+            ORDER BY date
+        """, (ticker, since, SLOW, ticker, since)).fetchall()
+    else:
+        rows = conn.execute("""
+            SELECT date, volume FROM (
+                SELECT date, volume FROM stock_data
+                WHERE ticker=? ORDER BY date DESC LIMIT ?)
+            ORDER BY date
+        """, (ticker, HISTORY_BARS)).fetchall()
+
+    if not rows:
+        return [], [], np.array([]), np.array([])
+    dates = [r[0] for r in rows]
+    vol = np.array([r[1] for r in rows], dtype="float64")
+    actions = corporate_actions.load_actions(conn, [ticker])
+    if actions:
+        _, vol_factor = corporate_actions.factor_matrix(
+            [ticker], np.array(dates, dtype="datetime64[D]"), actions)
+        vol = vol * vol_factor[0]
+    v20, v50 = _rolling_mean(vol, FAST), _rolling_mean(vol, SLOW)
+
+    ok = ~np.isnan(v50)
+    if since:
+        ok &= np.array([d > since for d in dates])
+    zones = np.where(v50 > v20, "bull", "bear")
+    idx = np.flatnonzero(ok)
+    return [dates[i] for i in idx], zones[idx].tolist(), v20[idx], v50[idx]
+
+
+# --------------------------
+# INCREMENTAL UPDATE
+# --------------------------
+def update_zones(conn, tickers, bull_file=BULL_FILE):
+    """
+    Re-evaluate zones for tickers that received new bars. Returns the list
+    of (ticker, date, from_zone, to_zone) flips that were recorded.
+    """
+    create_zone_tables(conn)
+    detected_at = datetime.now().isoformat(timespec="seconds")
+    state = dict(((t, (d, z)) for t, d, z in
+                  conn.execute("SELECT ticker, date, zone FROM zone_state")))
+    flips = []
+
+    for ticker in tickers:
+        last_date, last_zone = state.get(ticker, (None, None))
+        dates, zones, v20, v50 = zone_series(conn, ticker, last_date)
+        if not dates:
+            continue
+
+        prev = last_zone
+        for d, z in zip(dates, zones):
+            if prev is not None and z != prev:
+                flips.append((ticker, d, prev, z))
+            prev = z
+
+        conn.execute("""
+            INSERT OR REPLACE INTO zone_state (ticker, date, zone, vol20, vol50)
+            VALUES (?, ?, ?, ?, ?)
+        """, (ticker, dates[-1], zones[-1], float(v20[-1]), float(v50[-1])))
+
+    conn.executemany("""
+        INSERT OR REPLACE INTO zone_events (ticker, date, from_zone, to_zone, detected_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, [f + (detected_at,) for f in flips])
+    conn.commit()
+
+    if bull_file:
+        write_bull_file(conn, bull_file)
+    return flips
+
+
+def write_bull_file(conn, path=BULL_FILE):
+    bulls = [r[0] for r in conn.execute(
+        "SELECT ticker FROM zone_state WHERE zone='bull' ORDER BY ticker")]
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(bulls) + ("\n" if bulls else ""))
+    os.replace(tmp, path)
+    return bulls
+
+
+# --------------------------
+# READ SIDE (UI)
+# --------------------------
+def latest_flips(db_path=DB_PATH, as_of=None):
+    """Flips on the most recent event date (on or before as_of), via the zone_events date index."""
+    conn = retention.open_read_only(db_path)
+    if conn is None:
+        return []
+    try:
+        if not retention.has_table(conn, "zone_events"):
+            return []
+        return conn.execute("""
+            SELECT ticker, date, from_zone, to_zone FROM zone_events
+            WHERE date = (SELECT MAX(date) FROM zone_events WHERE date <= COALESCE(?, date))
+            ORDER BY to_zone DESC, ticker
+        """, (as_of,)).fetchall()
+    finally:
+        conn.close()